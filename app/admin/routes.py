@@ -0,0 +1,132 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from app.database import pool_stats
+import app.database as database
+from app.auth.dependencies import require_platform_admin
+from app.auth.schemas import TokenData
+from app.auth.token_cache import token_cache
+from app.auth.hashing import password_hasher
+from app.auto_api.engine import invalidate_reflected_table
+from app.auto_api.audit import audit_sink
+from app.auto_api.ledger import audit_partitions
+from app.auto_api.registry import table_registry
+from app.auto_api.schema_cache import schema_cache
+from app.realtime.feed import change_hub, change_publisher
+from app.replicas import replica_router
+from app.shards import shard_map
+from app.auto_api.statements import statement_cache
+from app.auto_api.response_cache import response_cache
+from app.profiler import query_profiler
+
+router = APIRouter(prefix="/admin", tags=["Platform Admin"])
+
+@router.get("/schema-cache")
+def schema_cache_stats(context: TokenData = Depends(require_platform_admin)):
+    return schema_cache.stats()
+
+@router.post("/schema-cache/invalidate")
+def invalidate_schema_cache(
+    table_name: Optional[str] = None,
+    context: TokenData = Depends(require_platform_admin)
+):
+    """
+    Call after DDL (ALTER/DROP) so workers re-reflect the affected table.
+    Omitting table_name flushes every cached schema.
+    """
+    version = invalidate_reflected_table(table_name)
+    return {"status": "success", "table_name": table_name, "schema_version": version}
+
+@router.get("/statement-cache")
+def statement_cache_stats(context: TokenData = Depends(require_platform_admin)):
+    return statement_cache.stats()
+
+@router.get("/response-cache")
+def response_cache_stats(context: TokenData = Depends(require_platform_admin)):
+    return response_cache.stats()
+
+@router.get("/registry")
+def registry_stats(context: TokenData = Depends(require_platform_admin)):
+    return table_registry.stats()
+
+@router.post("/registry/refresh")
+def refresh_registry(context: TokenData = Depends(require_platform_admin)):
+    """
+    Signals a 'tables_meta' change: reloads every shard's allow-list snapshot immediately.
+    """
+    refreshed = {}
+    for shard in shard_map.shards.values():
+        db = shard.session_factory()
+        try:
+            refreshed[shard.name] = sorted(shard.table_registry.refresh(db))
+        finally:
+            db.close()
+    if not shard_map.enabled:
+        return {"status": "success", "active_tables": refreshed[shard_map.primary.name]}
+    return {"status": "success", "active_tables": refreshed}
+
+@router.get("/token-cache")
+def token_cache_stats(context: TokenData = Depends(require_platform_admin)):
+    return token_cache.stats()
+
+@router.get("/password-hasher")
+def password_hasher_stats(context: TokenData = Depends(require_platform_admin)):
+    return password_hasher.stats()
+
+@router.get("/audit-sink")
+def audit_sink_stats(context: TokenData = Depends(require_platform_admin)):
+    return audit_sink.stats()
+
+@router.get("/pool")
+def connection_pool_stats(context: TokenData = Depends(require_platform_admin)):
+    """
+    Checked-out / overflow / wait-time figures for sizing DB_POOL_SIZE and DB_MAX_OVERFLOW.
+    """
+    stats = {"sync": pool_stats()}
+    if database._async_engine is not None:
+        stats["async"] = pool_stats(database._async_engine.sync_engine)
+    return stats
+
+@router.get("/replicas")
+def replica_stats(context: TokenData = Depends(require_platform_admin)):
+    """
+    Replica health, lag and the primary/replica read split (read-your-writes included).
+    """
+    return replica_router.stats()
+
+@router.get("/shards")
+def shard_stats(context: TokenData = Depends(require_platform_admin)):
+    """
+    Shard map, placement cache and per-shard pool / schema cache / registry figures.
+    """
+    return shard_map.stats()
+
+@router.get("/audit-partitions")
+def audit_partition_stats(context: TokenData = Depends(require_platform_admin)):
+    return audit_partitions.stats()
+
+@router.post("/audit-partitions/run")
+def run_audit_partitions(context: TokenData = Depends(require_platform_admin)):
+    """Creates upcoming audit_logs partitions and applies retention now, on every shard."""
+    return audit_partitions.run_once()
+
+@router.get("/realtime")
+def realtime_stats(context: TokenData = Depends(require_platform_admin)):
+    return {"hub": change_hub.stats(), "publisher": change_publisher.stats()}
+
+@router.get("/profiles")
+def profiles(
+    limit: int = Query(20, ge=1, le=1000),
+    context: TokenData = Depends(require_platform_admin)
+):
+    """
+    Profiled requests that were slow, repeated a statement (likely N+1) or were
+    requested with the profiling header; newest first, the caller's tenant only.
+    """
+    return {"stats": query_profiler.stats(), "profiles": query_profiler.entries(context.tenant_id, limit)}
+
+@router.get("/profiles/{request_id}")
+def profile_detail(request_id: str, context: TokenData = Depends(require_platform_admin)):
+    entry = query_profiler.find(request_id, context.tenant_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found (not captured, or already rotated out).")
+    return entry
@@ -1,11 +1,53 @@
+import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.auth.jwt import SECRET_KEY, ALGORITHM
 from app.auth.schemas import TokenData
+from app.auth.token_cache import token_cache, token_digest
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Workspace roles allowed to manage their own tenant (e.g. read its audit trail).
+ADMIN_ROLES = ("owner", "admin")
+# Platform operators: user ids allowed on process-wide /admin routes (cache
+# flushes, partition retention, topology stats) and the forced profiler.
+# Every signup owns its workspace, so tenant roles never grant these. Empty = nobody.
+PLATFORM_ADMIN_USER_IDS = frozenset(
+    u.strip() for u in os.getenv("PLATFORM_ADMIN_USER_IDS", "").split(",") if u.strip()
+)
+
+def decode_access_token(token: str) -> TokenData:
+    """
+    Verifies the JWT signature/expiry and extracts the tenant claims.
+    Raises JWTError for any invalid, incomplete or revoked token.
+    Hot tokens are answered from the verified-token cache without re-running HMAC.
+    """
+    digest = token_digest(token)
+    if token_cache.is_revoked(digest):
+        raise JWTError("Token revoked")
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return cached
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id: str = payload.get("user_id")
+    tenant_id: str = payload.get("tenant_id")
+    role: str = payload.get("role")
+
+    if user_id is None or tenant_id is None:
+        raise JWTError("Missing tenant claims")
+
+    iat = payload.get("iat")
+    if token_cache.issued_before_revocation(user_id, iat):
+        raise JWTError("Token revoked")
+
+    data = TokenData(user_id=user_id, tenant_id=tenant_id, role=role)
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.put(digest, data, float(exp), iat)
+    return data
+
 async def get_current_tenant_context(token: str = Depends(oauth2_scheme)):
     """
     This dependency ensures the user is authenticated AND 
@@ -17,14 +59,35 @@ async def get_current_tenant_context(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("user_id")
-        tenant_id: str = payload.get("tenant_id")
-        role: str = payload.get("role")
-        
-        if user_id is None or tenant_id is None:
-            raise credentials_exception
-            
-        return TokenData(user_id=user_id, tenant_id=tenant_id, role=role)
+        return decode_access_token(token)
     except JWTError:
         raise credentials_exception
+
+
+def is_platform_admin(context: TokenData) -> bool:
+    return context is not None and context.user_id in PLATFORM_ADMIN_USER_IDS
+
+
+async def require_workspace_admin(context: TokenData = Depends(get_current_tenant_context)):
+    """
+    Restricts tenant-scoped management routes to the workspace's owners and admins.
+    """
+    if context.role not in ADMIN_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrative privileges required."
+        )
+    return context
+
+
+async def require_platform_admin(context: TokenData = Depends(get_current_tenant_context)):
+    """
+    Restricts process-level operational routes to the operators listed in
+    PLATFORM_ADMIN_USER_IDS, whatever their role in their own workspace.
+    """
+    if not is_platform_admin(context):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Platform operator privileges required."
+        )
+    return context
@@ -1,13 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import hashlib
 import os
+import secrets
+import time
 
 # Configuration (Use environment variables in production)
 SECRET_KEY = os.getenv("JWT_SECRET", "super-secret-novabase-key-2024")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 24 hours
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -23,6 +27,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # Fractional iat (a valid NumericDate) lets token_cache.revoke_user refuse
+    # exactly the tokens issued before it.
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are high-entropy random strings; a fast digest is enough
+    # and lets renewal be a single indexed lookup instead of a bcrypt verify.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def create_refresh_token():
+    """
+    Returns (raw_token, stored_digest, expires_at). Only the digest is persisted.
+    """
+    token = secrets.token_urlsafe(48)
+    expires_at = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    return token, hash_refresh_token(token), expires_at
@@ -23,6 +23,8 @@ class RefreshToken(Base):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users_auth.id"), nullable=False)
+    # Workspace the session was issued for; refresh renews exactly that membership.
+    tenant_id = Column(String, ForeignKey("tenants.id"), nullable=False)
     token = Column(String, unique=True, index=True, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     revoked = Column(Boolean, default=False)
@@ -1,15 +1,37 @@
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from jose import jwt as jose_jwt
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.auth import schemas, models, jwt
-from app.auth.dependencies import get_current_tenant_context
+from app.auth.dependencies import get_current_tenant_context, oauth2_scheme
+from app.auth.hashing import password_hasher
+from app.auth.token_cache import token_cache
 from app.tenants.models import Tenant
+from app.shards import shard_map
 import uuid
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-@router.post("/signup", response_model=schemas.Token)
-def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+# Handlers are async so that bcrypt waits on the dedicated hashing executor
+# (app.auth.hashing) rather than holding a request threadpool thread; the
+# short synchronous DB sections still run via run_in_threadpool.
+
+def _issue_tokens(db: Session, user_id: str, tenant_id: str, role: str) -> dict:
+    """
+    Access JWT plus a rotating refresh token (only its digest is stored).
+    Caller commits.
+    """
+    refresh_token, digest, expires_at = jwt.create_refresh_token()
+    db.add(models.RefreshToken(user_id=user_id, tenant_id=tenant_id, token=digest, expires_at=expires_at))
+    access_token = jwt.create_access_token(
+        data={"user_id": user_id, "tenant_id": tenant_id, "role": role}
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+def _create_account(db: Session, user_in: schemas.UserCreate, hashed_password: str) -> dict:
     # 1. Check if user exists
     user = db.query(models.User).filter(models.User.email == user_in.email).first()
     if user:
@@ -18,7 +40,7 @@ def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     # 2. Create User (Hashed password!)
     new_user = models.User(
         email=user_in.email,
-        hashed_password=jwt.get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         full_name=user_in.full_name
     )
     db.add(new_user)
@@ -31,6 +53,8 @@ def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     )
     db.add(new_tenant)
     db.flush()
+    # Pin the workspace to its shard (no-op without DATABASE_SHARD_URLS).
+    shard_map.assign(db, new_tenant)
 
     # 4. Create Membership (Owner role)
     new_membership = models.Membership(
@@ -39,30 +63,102 @@ def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
         role="owner"
     )
     db.add(new_membership)
-    db.commit()
 
     # 5. Issue Token with Tenant Context
-    access_token = jwt.create_access_token(
-        data={"user_id": new_user.id, "tenant_id": new_tenant.id, "role": "owner"}
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    tokens = _issue_tokens(db, new_user.id, new_tenant.id, "owner")
+    db.commit()
+    return tokens
 
-@router.post("/login", response_model=schemas.Token)
-def login(user_in: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == user_in.email).first()
-    if not user or not jwt.verify_password(user_in.password, user.hashed_password):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+@router.post("/signup", response_model=schemas.Token)
+async def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+    exists = await run_in_threadpool(
+        lambda: db.query(models.User.id).filter(models.User.email == user_in.email).first()
+    )
+    if exists:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    hashed_password = await password_hasher.hash(user_in.password)
+    return await run_in_threadpool(_create_account, db, user_in, hashed_password)
 
+def _login_session(db: Session, user_id: str) -> dict:
     # Find their primary/first workspace
-    membership = db.query(models.Membership).filter(models.Membership.user_id == user.id).first()
+    membership = db.query(models.Membership).filter(models.Membership.user_id == user_id).first()
     if not membership:
         raise HTTPException(status_code=404, detail="No workspace found for user")
+    tokens = _issue_tokens(db, user_id, membership.tenant_id, membership.role)
+    db.commit()
+    return tokens
 
-    access_token = jwt.create_access_token(
-        data={"user_id": user.id, "tenant_id": membership.tenant_id, "role": membership.role}
+@router.post("/login", response_model=schemas.Token)
+async def login(user_in: schemas.UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(
+        lambda: db.query(models.User).filter(models.User.email == user_in.email).first()
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    if not user or not await password_hasher.verify(user_in.password, user.hashed_password):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    return await run_in_threadpool(_login_session, db, user.id)
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh(body: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Renews the session without a password. The refresh token is claimed with
+    a single conditional UPDATE on its digest, so of two concurrent refreshes
+    with the same token only one gets a row back; the other is rejected.
+    The new tokens carry the workspace the session was issued for.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    # Rotation: each refresh token is single-use.
+    claimed = db.execute(
+        update(models.RefreshToken)
+        .where(
+            models.RefreshToken.token == jwt.hash_refresh_token(body.refresh_token),
+            models.RefreshToken.revoked == False,
+            models.RefreshToken.expires_at > datetime.now(timezone.utc),
+        )
+        .values(revoked=True)
+        .returning(models.RefreshToken.user_id, models.RefreshToken.tenant_id)
+    ).first()
+    if not claimed:
+        raise invalid
+    membership = db.query(models.Membership.role).filter(
+        models.Membership.user_id == claimed.user_id,
+        models.Membership.tenant_id == claimed.tenant_id,
+    ).first()
+    if not membership:
+        # Removed from the workspace since login: the session ends here.
+        db.commit()
+        raise invalid
+
+    tokens = _issue_tokens(db, claimed.user_id, claimed.tenant_id, membership.role)
+    db.commit()
+    return tokens
+
+@router.post("/logout")
+def logout(
+    body: schemas.RefreshRequest,
+    token: str = Depends(oauth2_scheme),
+    current_user: schemas.TokenData = Depends(get_current_tenant_context),
+    db: Session = Depends(get_db)
+):
+    """
+    Revokes the refresh token and evicts the presented access token from the
+    verified-token cache so it stops working immediately on this worker.
+    The access-token denylist is per worker: other workers keep accepting
+    the token until it expires (ACCESS_TOKEN_EXPIRE_MINUTES), but none of
+    them can renew it, since the refresh token is revoked in the database.
+    """
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.token == jwt.hash_refresh_token(body.refresh_token),
+        models.RefreshToken.user_id == current_user.user_id
+    ).update({"revoked": True})
+    db.commit()
+    exp = jose_jwt.get_unverified_claims(token).get("exp")
+    token_cache.revoke(token, float(exp) if exp else datetime.now(timezone.utc).timestamp())
+    return {"status": "success", "message": "Logged out."}
 
 @router.get("/me")
 def get_me(current_user: schemas.TokenData = Depends(get_current_tenant_context)):
-    return current_user
\ No newline at end of file
+    return current_user
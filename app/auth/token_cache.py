@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from app.auth.jwt import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.auth.schemas import TokenData
+
+# Bounded LRU of already-verified bearer tokens
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "50000"))
+
+
+def token_digest(token: str) -> bytes:
+    # Raw tokens are never kept in memory as dictionary keys.
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """
+    Maps sha256(token) -> TokenData for tokens whose signature and claims were
+    already verified. Each entry dies at the token's own `exp`, so a hit is
+    exactly as valid as a fresh jwt.decode.
+
+    Revoked tokens are evicted and remembered until they expire, so they are
+    rejected even though their signature would still verify. Revoking a user
+    records a not-before time instead: tokens issued (iat) before it are
+    refused on the verify path and never re-cached.
+
+    Both are per worker process: a revocation is enforced by the worker that
+    handled it, and elsewhere only once the token expires.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()  # digest -> (TokenData, exp)
+        self._revoked: dict = {}  # digest -> exp
+        self._not_before: dict = {}  # user_id -> epoch time; older iat is refused
+        self._lock = threading.Lock()
+        self._revocation_hooks: List[Callable[[bytes], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revocations = 0
+
+    def get(self, digest: bytes) -> Optional[TokenData]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest: bytes, data: TokenData, exp: float, iat: Optional[float] = None):
+        with self._lock:
+            # A verify that raced with revoke_user must not re-cache the old token.
+            if self._issued_before_revocation(data.user_id, iat):
+                return
+            self._entries[digest] = (data, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def is_revoked(self, digest: bytes) -> bool:
+        with self._lock:
+            exp = self._revoked.get(digest)
+            if exp is None:
+                return False
+            if exp <= time.time():
+                # Expired tokens fail verification on their own.
+                del self._revoked[digest]
+                return False
+            return True
+
+    def _issued_before_revocation(self, user_id: str, iat: Optional[float]) -> bool:
+        not_before = self._not_before.get(user_id)
+        # Tokens without iat predate the claim and count as issued at 0.
+        return not_before is not None and (iat or 0) < not_before
+
+    def issued_before_revocation(self, user_id: str, iat: Optional[float]) -> bool:
+        with self._lock:
+            return self._issued_before_revocation(user_id, iat)
+
+    def revoke(self, token: str, exp: float) -> None:
+        """Evicts a token immediately and denies it until `exp`."""
+        digest = token_digest(token)
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked[digest] = exp
+            self.revocations += 1
+            # Opportunistic purge keeps the denylist bounded by live tokens.
+            now = time.time()
+            for stale in [d for d, e in self._revoked.items() if e <= now]:
+                del self._revoked[stale]
+        for hook in self._revocation_hooks:
+            hook(digest)
+
+    def revoke_user(self, user_id: str) -> int:
+        """
+        Refuses every token of a user issued before now (e.g. password change)
+        and evicts the cached ones.
+        """
+        now = time.time()
+        with self._lock:
+            self._not_before[user_id] = max(now, self._not_before.get(user_id, 0))
+            victims = [d for d, (data, _) in self._entries.items() if data.user_id == user_id]
+            for digest in victims:
+                del self._entries[digest]
+            self.revocations += 1
+            # Past one access-token lifetime every older token has expired anyway.
+            horizon = now - ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            for stale in [u for u, at in self._not_before.items() if at <= horizon]:
+                del self._not_before[stale]
+        return len(victims)
+
+    def on_revoke(self, hook: Callable[[bytes], None]) -> None:
+        """
+        Registers a callback fired with the token digest on revocation,
+        e.g. to broadcast the eviction to other workers.
+        """
+        self._revocation_hooks.append(hook)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "revoked": len(self._revoked),
+                "revoked_users": len(self._not_before),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "revocations": self.revocations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+token_cache = VerifiedTokenCache()
@@ -0,0 +1,192 @@
+
+from fastapi import APIRouter, Depends, Body, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.database import set_db_tenant_context_async
+from app.replicas import get_async_read_db, replica_router
+from app.shards import get_async_tenant_db
+from app.auth.dependencies import get_current_tenant_context, require_workspace_admin
+from app.auth.schemas import TokenData
+from app.auto_api.engine import AsyncCrudEngine, BULK_MAX_ROWS
+from app.auto_api import validators, batch, ledger
+from app.auto_api.schemas import BatchRequest
+from app.auto_api.query import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.auto_api.export import EXPORT_MEDIA_TYPES
+from app.auto_api.response_cache import response_cache
+from app.auto_api.serialization import RowJSONResponse
+from app.auto_api.statements import ROW_ID_PARAM
+from app.auto_api.router import _audit_response
+
+# Event-loop twin of app.auto_api.router, mounted instead of it when DB_MODE=async.
+router = APIRouter(prefix="/api", tags=["Auto-CRUD API"], default_response_class=RowJSONResponse)
+
+async def _validate_table_registry(db: AsyncSession, table_name: str):
+    await db.run_sync(validators.validate_table_registry, table_name)
+
+async def _sanitize(db: AsyncSession, table_name: str, data: dict, is_update: bool = False):
+    return await db.run_sync(
+        lambda s: validators.sanitize_and_validate_payload(table_name, data, is_update, bind=s.connection())
+    )
+
+@router.post("/_batch")
+async def batch_records(
+    body: BatchRequest,
+    db: AsyncSession = Depends(get_async_tenant_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    if len(body.operations) > batch.BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {batch.BATCH_MAX_OPERATIONS} operations.")
+    return await db.run_sync(batch.run_batch, context.tenant_id, context.user_id, body.operations, atomic=body.atomic)
+
+@router.get("/_audit")
+async def audit_records(
+    request: Request,
+    limit: int = Query(ledger.AUDIT_PAGE_SIZE, ge=1, le=ledger.AUDIT_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    table: Optional[str] = None,
+    record_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    context: TokenData = Depends(require_workspace_admin)
+):
+    await set_db_tenant_context_async(db, context.tenant_id, context.user_id)
+    rows, next_cursor = await db.run_sync(
+        ledger.read_audit_page, context.tenant_id, limit=limit, cursor=cursor,
+        table_name=table, record_id=record_id, action=action, since=since, until=until,
+    )
+    return _audit_response(request, rows, next_cursor)
+
+@router.get("/{table_name}")
+async def list_records(
+    table_name: str,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    select: Optional[str] = None,
+    order: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    await _validate_table_registry(db, table_name)
+    query_items = request.query_params.multi_items()
+
+    async def load():
+        await set_db_tenant_context_async(db, context.tenant_id, context.user_id)
+        return await AsyncCrudEngine.read_rows(
+            db, table_name,
+            limit=limit,
+            cursor=cursor,
+            select_param=select,
+            order_param=order,
+            filter_params=list(query_items),
+        )
+
+    entry = await response_cache.get_or_load_async(context.tenant_id, table_name, query_items, load)
+    return response_cache.respond(request, entry)
+
+@router.get("/{table_name}/export")
+async def export_records(
+    table_name: str,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    select: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    await _validate_table_registry(db, table_name)
+    # The stream runs on its own session; hand this one's connection back first.
+    await db.close()
+    chunks = await AsyncCrudEngine.stream_rows(
+        table_name, context.tenant_id, context.user_id,
+        session_factory=replica_router.async_session_factory_for(context.tenant_id),
+        fmt=format,
+        compress=gzip,
+        select_param=select,
+        filter_params=list(request.query_params.multi_items()),
+    )
+    headers = {"Content-Disposition": f'attachment; filename="{table_name}.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+@router.get("/{table_name}/{row_id}")
+async def read_record(
+    table_name: str,
+    row_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    await _validate_table_registry(db, table_name)
+
+    async def load():
+        await set_db_tenant_context_async(db, context.tenant_id, context.user_id)
+        return await AsyncCrudEngine.read_row(db, table_name, row_id), None
+
+    entry = await response_cache.get_or_load_async(context.tenant_id, table_name, [(ROW_ID_PARAM, row_id)], load)
+    return response_cache.respond(request, entry)
+
+@router.post("/{table_name}")
+async def create_record(
+    table_name: str,
+    data: Dict[str, Any] = Body(...),
+    db: AsyncSession = Depends(get_async_tenant_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    await _validate_table_registry(db, table_name)
+    await set_db_tenant_context_async(db, context.tenant_id, context.user_id)
+    clean_data = await _sanitize(db, table_name, data)
+    return await AsyncCrudEngine.create_row(db, table_name, context.tenant_id, context.user_id, clean_data)
+
+@router.post("/{table_name}/bulk")
+async def bulk_create_records(
+    table_name: str,
+    rows: List[Any] = Body(...),
+    on_conflict: Optional[str] = None,
+    conflict_action: str = Query("update", pattern="^(update|ignore)$"),
+    db: AsyncSession = Depends(get_async_tenant_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Bulk payload exceeds {BULK_MAX_ROWS} rows.")
+    await _validate_table_registry(db, table_name)
+    await set_db_tenant_context_async(db, context.tenant_id, context.user_id)
+    valid, errors = await db.run_sync(
+        lambda s: validators.sanitize_rows(table_name, rows, bind=s.connection())
+    )
+    conflict_columns = [c.strip() for c in on_conflict.split(",") if c.strip()] if on_conflict else None
+    return await AsyncCrudEngine.bulk_create_rows(
+        db, table_name, context.tenant_id, context.user_id, valid,
+        errors=errors,
+        on_conflict=conflict_columns,
+        conflict_action=conflict_action,
+    )
+
+@router.patch("/{table_name}/{row_id}")
+async def update_record(
+    table_name: str,
+    row_id: str,
+    data: Dict[str, Any] = Body(...),
+    db: AsyncSession = Depends(get_async_tenant_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    await _validate_table_registry(db, table_name)
+    await set_db_tenant_context_async(db, context.tenant_id, context.user_id)
+    clean_data = await _sanitize(db, table_name, data, is_update=True)
+    return await AsyncCrudEngine.update_row(db, table_name, row_id, context.tenant_id, context.user_id, clean_data)
+
+@router.delete("/{table_name}/{row_id}")
+async def delete_record(
+    table_name: str,
+    row_id: str,
+    db: AsyncSession = Depends(get_async_tenant_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    await _validate_table_registry(db, table_name)
+    await set_db_tenant_context_async(db, context.tenant_id, context.user_id)
+    return await AsyncCrudEngine.delete_row(db, table_name, row_id, context.tenant_id, context.user_id)
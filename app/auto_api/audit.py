@@ -0,0 +1,224 @@
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from app.auto_api.models import AuditLog
+from app.shards import shard_map
+
+# "sync": audit rows share the request transaction (default, strongest durability)
+# "write_behind": rows are buffered after commit and flushed in batches off the request path
+AUDIT_MODE = os.getenv("AUDIT_MODE", "sync")
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "50000"))
+AUDIT_FLUSH_BATCH = int(os.getenv("AUDIT_FLUSH_BATCH", "1000"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5"))  # seconds
+# Overflow area for rows arriving while the buffer is full; drained by the writer thread.
+AUDIT_SPILL_SIZE = int(os.getenv("AUDIT_SPILL_SIZE", "10000"))
+AUDIT_FLUSH_RETRIES = int(os.getenv("AUDIT_FLUSH_RETRIES", "3"))
+
+logger = logging.getLogger("novabase.audit")
+
+_PENDING_KEY = "novabase_pending_audit"
+
+
+class SyncAuditSink:
+    """Writes audit rows inside the caller's transaction."""
+
+    mode = "sync"
+
+    def record(self, db: Session, entry: dict):
+        db.add(AuditLog(**entry))
+
+    def record_many(self, db: Session, entries: list):
+        if entries:
+            db.execute(insert(AuditLog), entries)
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"mode": self.mode}
+
+
+class WriteBehindAuditSink:
+    """
+    Buffers audit rows per session and hands them to a bounded in-process
+    queue only once the session commits, so rolled-back mutations are never
+    audited. A background thread drains the queue in multi-row INSERTs of up
+    to AUDIT_FLUSH_BATCH rows, or every AUDIT_FLUSH_INTERVAL seconds.
+
+    Handing rows over never blocks: it runs in the after_commit hook, which is
+    on the event loop under DB_MODE=async. Rows that find the buffer full go
+    to a bounded spill list the writer drains first; past AUDIT_SPILL_SIZE
+    they are dropped and counted. Failed flushes are retried; only batches
+    that exhaust AUDIT_FLUSH_RETRIES are dropped.
+    Rows are written to their tenant's shard unless a session_factory is given.
+    """
+
+    mode = "write_behind"
+
+    def __init__(
+        self,
+        buffer_size: int = AUDIT_BUFFER_SIZE,
+        flush_batch: int = AUDIT_FLUSH_BATCH,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        session_factory=None,
+        spill_size: int = AUDIT_SPILL_SIZE,
+    ):
+        self.queue: "queue.Queue[dict]" = queue.Queue(maxsize=buffer_size)
+        self.spill_size = spill_size
+        self._spill: list = []
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.flushed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.overflow_dropped = 0
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    # --- request path ---
+    def record(self, db: Session, entry: dict):
+        self.record_many(db, [entry])
+
+    def record_many(self, db: Session, entries: list):
+        stamped = datetime.now(timezone.utc)
+        for entry in entries:
+            entry.setdefault("timestamp", stamped)
+        db.info.setdefault(_PENDING_KEY, []).extend(entries)
+
+    def enqueue(self, entries: list):
+        overflow = []
+        for i, entry in enumerate(entries):
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                overflow = entries[i:]
+                break
+        dropped = 0
+        with self._lock:
+            self.enqueued += len(entries) - len(overflow)
+            if overflow:
+                room = max(self.spill_size - len(self._spill), 0)
+                self._spill.extend(overflow[:room])
+                self.spilled += min(room, len(overflow))
+                dropped = len(overflow) - room
+                if dropped > 0:
+                    self.overflow_dropped += dropped
+                    self.dropped += dropped
+        if dropped > 0:
+            logger.error(f"Audit buffer and spill are full, dropped {dropped} records")
+
+    # --- background writer ---
+    def _drain(self) -> list:
+        with self._lock:
+            batch, self._spill = self._spill[:self.flush_batch], self._spill[self.flush_batch:]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list):
+        if self.session_factory is not None:
+            self._write_to(self.session_factory, batch)
+            return
+        groups = {}
+        for entry in batch:
+            try:
+                shard = shard_map.shard_for_tenant(entry["tenant_id"])
+            except Exception as e:
+                with self._lock:
+                    self.dropped += 1
+                logger.error(f"Audit flush could not place tenant {entry['tenant_id']}, dropped 1 record: {str(e)}")
+                continue
+            groups.setdefault(shard.name, (shard.session_factory, []))[1].append(entry)
+        for session_factory, entries in groups.values():
+            self._write_to(session_factory, entries)
+
+    def _write_to(self, session_factory, batch: list):
+        for attempt in range(AUDIT_FLUSH_RETRIES + 1):
+            db = session_factory()
+            try:
+                db.execute(insert(AuditLog), batch)
+                db.commit()
+                with self._lock:
+                    self.flushed += len(batch)
+                return
+            except Exception as e:
+                db.rollback()
+                if attempt < AUDIT_FLUSH_RETRIES:
+                    with self._lock:
+                        self.retried += len(batch)
+                    time.sleep(min(0.1 * 2 ** attempt, 2.0))
+                else:
+                    with self._lock:
+                        self.dropped += len(batch)
+                    logger.error(f"Audit flush failed, dropped {len(batch)} records: {str(e)}")
+            finally:
+                db.close()
+
+    def _run(self):
+        while not (self._stop.is_set() and self.queue.empty() and not self._spill):
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+
+    def close(self, timeout: float = 10.0):
+        """Flushes everything still buffered; call on shutdown."""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "buffer_depth": self.queue.qsize(),
+                "buffer_size": self.queue.maxsize,
+                "spill_depth": len(self._spill),
+                "enqueued": self.enqueued,
+                "flushed": self.flushed,
+                "retried": self.retried,
+                "dropped": self.dropped,
+                "spilled": self.spilled,
+                "overflow_dropped": self.overflow_dropped,
+            }
+
+
+def create_audit_sink(mode: str = AUDIT_MODE):
+    if mode == "write_behind":
+        return WriteBehindAuditSink()
+    if mode == "sync":
+        return SyncAuditSink()
+    raise ValueError(f"Unknown AUDIT_MODE '{mode}'. Use 'sync' or 'write_behind'.")
+
+
+audit_sink = create_audit_sink()
+
+
+@event.listens_for(Session, "after_commit")
+def _release_pending_audit(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and isinstance(audit_sink, WriteBehindAuditSink):
+        audit_sink.enqueue(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_audit(session: Session, previous_transaction):
+    # Savepoint rollbacks (bulk/batch row isolation) keep the outer transaction's rows.
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
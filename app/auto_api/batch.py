@@ -0,0 +1,112 @@
+import os
+from typing import Any, Dict, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+from app.database import set_db_tenant_context
+from app.auto_api import validators
+from app.auto_api.engine import get_reflected_table, log_mutations, _record_id
+from app.auto_api.response_cache import response_cache
+from app.auto_api.schemas import BatchOperation
+from app.auto_api.statements import statement_cache, ROW_ID_PARAM
+
+# Upper bound on operations per POST /api/_batch
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "100"))
+
+# "$<ref>.<column>" reads a column of an earlier result; "$$..." escapes a literal "$".
+REF_PREFIX = "$"
+
+INTEGRITY_DETAIL = "Database integrity violation. Please check unique constraints or foreign keys."
+
+
+def _resolve(value: Any, results: Dict[str, Any]) -> Any:
+    if not isinstance(value, str) or not value.startswith(REF_PREFIX):
+        return value
+    if value.startswith(REF_PREFIX * 2):
+        return value[1:]
+    label, _, column = value[1:].partition(".")
+    row = results.get(label)
+    if row is None or column not in row:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unresolved reference '{value}'.")
+    return row[column]
+
+
+def _apply(db: Session, tenant_id: str, user_id: str, op: BatchOperation, results: Dict[str, Any]):
+    """Runs one operation without committing. Returns (result, audit entry)."""
+    validators.validate_table_registry(db, op.table)
+    table = get_reflected_table(op.table, bind=db.connection())
+    row_id = _resolve(op.id, results)
+    if op.op != "create" and row_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"'{op.op}' requires an id.")
+    data = {key: _resolve(value, results) for key, value in op.data.items()}
+    audit = {"tenant_id": tenant_id, "user_id": user_id, "table_name": op.table, "payload": None}
+
+    if op.op == "create":
+        clean_data = validators.sanitize_and_validate_payload(op.table, data, bind=db.connection())
+        # CORE SECURITY: system-validated identity always wins.
+        clean_data["tenant_id"] = tenant_id
+        if "user_id" in table.columns:
+            clean_data["user_id"] = user_id
+        row = db.execute(statement_cache.insert(table, clean_data), clean_data).mappings().first()
+        audit.update(action="CREATE", record_id=_record_id(row), payload=clean_data)
+        return row, audit
+
+    if op.op == "update":
+        clean_data = validators.sanitize_and_validate_payload(op.table, data, is_update=True, bind=db.connection())
+        row = db.execute(
+            statement_cache.update(table, clean_data), {**clean_data, ROW_ID_PARAM: row_id}
+        ).mappings().first()
+        action, payload = "UPDATE", clean_data
+    else:
+        row = db.execute(statement_cache.delete(table), {ROW_ID_PARAM: row_id}).mappings().first()
+        action, payload = "DELETE", None
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found or access denied.")
+    audit.update(action=action, record_id=str(row_id), payload=payload)
+    return row, audit
+
+
+def run_batch(db: Session, tenant_id: str, user_id: str, operations: List[BatchOperation], atomic: bool = True) -> dict:
+    """
+    Executes an ordered list of create/update/delete operations in one
+    transaction behind a single tenant-context handshake, with one batched
+    audit insert and one commit.
+
+    atomic=True: the first failure rolls everything back and is raised with its index.
+    atomic=False: each operation runs in a savepoint; failures are reported per
+    operation and the rest commit.
+    """
+    set_db_tenant_context(db, tenant_id, user_id)
+    results: Dict[str, Any] = {}
+    report, audit_entries, touched = [], [], set()
+
+    for index, op in enumerate(operations):
+        try:
+            if atomic:
+                row, audit = _apply(db, tenant_id, user_id, op, results)
+            else:
+                with db.begin_nested():
+                    row, audit = _apply(db, tenant_id, user_id, op, results)
+        except (HTTPException, exc.DBAPIError) as e:
+            code = e.status_code if isinstance(e, HTTPException) else status.HTTP_400_BAD_REQUEST
+            detail = e.detail if isinstance(e, HTTPException) else INTEGRITY_DETAIL
+            if atomic:
+                db.rollback()
+                raise HTTPException(status_code=code, detail={"index": index, "ref": op.ref, "detail": detail})
+            report.append({"index": index, "ref": op.ref, "status": code, "detail": detail})
+            continue
+
+        results[str(index)] = row
+        if op.ref:
+            results[op.ref] = row
+        audit_entries.append(audit)
+        touched.add(op.table)
+        report.append({"index": index, "ref": op.ref, "status": status.HTTP_200_OK, "data": row})
+
+    log_mutations(db, audit_entries)
+    db.commit()
+    for table_name in touched:
+        response_cache.bump(tenant_id, table_name)
+    failed = len(operations) - len(audit_entries)
+    return {"status": "success" if not failed else "partial", "failed": failed, "results": report}
@@ -1,54 +1,221 @@
 
-from sqlalchemy import Table, MetaData, select, insert, update, delete, exc
+import os
+import uuid
+from sqlalchemy import Table, MetaData, exc
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from app.database import engine as db_engine
-from app.auto_api.models import AuditLog
+from app.database import (
+    engine as db_engine,
+    SessionLocal,
+    AsyncSessionLocal,
+    set_db_tenant_context,
+    set_db_tenant_context_async,
+)
+from app.auto_api.audit import audit_sink
+from app.realtime.feed import record_changes
+from app.replicas import mark_tenant_write
+from app.shards import shard_map
+from app.auto_api.statements import statement_cache, ROW_ID_PARAM, SHARD_INFO_KEY
+from app.auto_api.response_cache import response_cache
+from app.auto_api import query as list_query
+from app.auto_api import export
 
 metadata = MetaData()
 
-def get_reflected_table(table_name: str):
+# Bulk write tuning
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "50000"))
+
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def _reflect_table(table_name: str, bind=None, shard_name: str = None) -> Table:
+    local_metadata = MetaData()
+    table = Table(table_name, local_metadata, autoload_with=bind if bind is not None else db_engine)
+    table.info[SHARD_INFO_KEY] = shard_name
+    return table
+
+def get_reflected_table(table_name: str, bind=None):
     """
-    Retrieves the table schema directly from the database engine using reflection.
+    Retrieves the table schema using reflection.
+    Served from the schema cache of the bind's shard; the database is only hit on a miss.
+    `bind` (a Connection) reflects on the caller's connection instead of the
+    default engine, which the async path needs to stay off blocking drivers.
     """
+    shard = shard_map.for_bind(bind)
     try:
-        local_metadata = MetaData()
-        table = Table(table_name, local_metadata, autoload_with=db_engine)
-        return table
+        return shard.schema_cache.get_or_load(table_name, lambda name: _reflect_table(name, bind, shard.name))
     except exc.NoSuchTableError:
         raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
 
+def invalidate_reflected_table(table_name: str = None) -> int:
+    """
+    Drops cached schema (and the statements built on it) after DDL so the
+    next request re-reflects.
+    """
+    statement_cache.invalidate(table_name)
+    versions = [shard.schema_cache.invalidate(table_name) for shard in shard_map.shards.values()]
+    return versions[0]
+
 def log_mutation(db: Session, tenant_id: str, user_id: str, action: str, table: str, rec_id: str, data: dict = None):
     """
     Creates an immutable audit log for every mutation.
+    Routed through the configured audit sink (AUDIT_MODE): in-transaction or write-behind.
+    """
+    log_mutations(db, [{
+        "tenant_id": tenant_id,
+        "user_id": user_id,
+        "action": action,
+        "table_name": table,
+        "record_id": rec_id,
+        "payload": data,
+    }])
+
+def log_mutations(db: Session, records: list):
+    """
+    Batched audit trail: one multi-row INSERT for a list of log_mutation-style dicts.
+    Each record also becomes a change-feed event whose id is the audit log id,
+    so realtime clients can resume from audit_logs.
     """
-    log = AuditLog(
-        tenant_id=tenant_id,
-        user_id=user_id,
-        action=action,
-        table_name=table,
-        record_id=rec_id,
-        payload=data
-    )
-    db.add(log)
+    if records:
+        tenants = {record["tenant_id"] for record in records}
+        for tenant_id in tenants:
+            # Writes pause while the tenant is being moved to another shard.
+            shard_map.guard_write(db, tenant_id)
+        for record in records:
+            record.setdefault("id", str(uuid.uuid4()))
+        audit_sink.record_many(db, records)
+        record_changes(db, records)
+        for tenant_id in tenants:
+            mark_tenant_write(db, tenant_id)
+
+def _export_query(table: Table, select_param: str = None, filter_params: list = None):
+    columns = list_query.parse_columns(table, select_param)
+    clauses = list_query.parse_filters(table, filter_params or [])
+    query = statement_cache.select(table, columns)
+    if clauses:
+        query = query.where(*clauses)
+    return columns, query.execution_options(stream_results=True, yield_per=export.EXPORT_BATCH_ROWS)
+
+def _record_id(row) -> str:
+    return str(row.get('id') or row.get('user_id') or 'unknown')
 
 class CrudEngine:
     @staticmethod
-    def read_rows(db: Session, table_name: str):
-        table = get_reflected_table(table_name)
-        # RLS SECURITY: We do not add a WHERE clause here. 
+    def read_rows(
+        db: Session,
+        table_name: str,
+        limit: int = list_query.DEFAULT_PAGE_SIZE,
+        cursor: str = None,
+        select_param: str = None,
+        order_param: str = None,
+        filter_params: list = None,
+    ):
+        """
+        Returns one keyset-paginated page as (rows, next_cursor).
+        next_cursor is None once the last page has been served.
+        """
+        table = get_reflected_table(table_name, bind=db.connection())
+        limit = max(1, min(limit, list_query.MAX_PAGE_SIZE))
+
+        columns = list_query.parse_columns(table, select_param)
+        key_columns, descending = list_query.parse_order(table, order_param)
+        clauses = list_query.parse_filters(table, filter_params or [])
+
+        # Keyset values must be readable even when the caller projected them away.
+        selected_names = [c.name for c in columns]
+        hidden_keys = [c for c in key_columns if c.name not in selected_names]
+
+        # RLS SECURITY: We do not add a tenant WHERE clause here. 
         # The Postgres session GUC 'app.current_tenant' (set in middleware)
         # causes the database to transparently filter rows for us.
-        query = select(table)
+        query = statement_cache.select(table, [*columns, *hidden_keys])
+        if cursor and key_columns:
+            after = list_query.keyset_predicate(
+                key_columns, list_query.decode_cursor(cursor, order_param, key_columns), descending
+            )
+            if after is None:
+                return [], None
+            clauses.append(after)
+        if clauses:
+            query = query.where(*clauses)
+        query = query.order_by(*list_query.order_clauses(key_columns, descending)).limit(limit + 1)
+
         try:
-            return db.execute(query).mappings().all()
+            rows = db.execute(query).mappings().all()
         except exc.InternalError as e:
             # Usually triggered if the RLS variable isn't set
             raise HTTPException(status_code=403, detail="Unauthorized: Security Context Missing.")
 
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = list_query.next_page_cursor(order_param, key_columns, rows[limit - 1], rows[limit])
+            rows = rows[:limit]
+        if hidden_keys:
+            rows = [{name: row[name] for name in selected_names} for row in rows]
+        return rows, next_cursor
+
+    @staticmethod
+    def read_row(db: Session, table_name: str, row_id: str):
+        table = get_reflected_table(table_name, bind=db.connection())
+        try:
+            row = db.execute(statement_cache.select_row(table), {ROW_ID_PARAM: row_id}).mappings().first()
+        except exc.InternalError:
+            raise HTTPException(status_code=403, detail="Unauthorized: Security Context Missing.")
+        if not row:
+            raise HTTPException(status_code=404, detail="Resource not found or access denied.")
+        return row
+
+    @staticmethod
+    def stream_rows(
+        table_name: str,
+        tenant_id: str,
+        user_id: str,
+        fmt: str = "ndjson",
+        compress: bool = False,
+        select_param: str = None,
+        filter_params: list = None,
+        session_factory=SessionLocal,
+    ):
+        """
+        Full-table export through a server-side cursor.
+
+        Runs on a dedicated session so the transaction (and with it the RLS
+        'SET LOCAL' context) stays open until the last chunk is written,
+        independent of the request-scoped session lifecycle.
+        The query is executed eagerly so security/validation errors surface
+        as normal HTTP errors before any bytes are sent.
+        `session_factory` selects the database (e.g. a read replica).
+        """
+        db = session_factory()
+        try:
+            table = get_reflected_table(table_name, bind=db.connection())
+            columns, query = _export_query(table, select_param, filter_params)
+            set_db_tenant_context(db, tenant_id, user_id)
+            result = db.execute(query)
+        except exc.InternalError:
+            db.close()
+            raise HTTPException(status_code=403, detail="Unauthorized: Security Context Missing.")
+        except Exception:
+            db.close()
+            raise
+
+        def generate():
+            try:
+                yield from export.encode_batches(fmt, [c.name for c in columns], result.partitions(), compress)
+            finally:
+                result.close()
+                db.close()
+
+        return generate()
+
     @staticmethod
     def create_row(db: Session, table_name: str, tenant_id: str, user_id: str, sanitized_data: dict):
-        table = get_reflected_table(table_name)
+        table = get_reflected_table(table_name, bind=db.connection())
         
         # CORE SECURITY: Overwrite/Inject the system-validated tenant_id.
         # This prevents any possibility of a user masquerading as another tenant.
@@ -58,40 +225,146 @@ class CrudEngine:
         if "user_id" in table.columns:
             sanitized_data["user_id"] = user_id
         
-        query = insert(table).values(**sanitized_data).returning(table)
+        query = statement_cache.insert(table, sanitized_data)
         try:
-            result = db.execute(query)
+            result = db.execute(query, sanitized_data)
             row = result.mappings().first()
             
             # Identify the primary key for the audit log
-            pk_val = str(row.get('id') or row.get('user_id') or 'unknown')
+            pk_val = _record_id(row)
             log_mutation(db, tenant_id, user_id, "CREATE", table_name, pk_val, sanitized_data)
             
             db.commit()
+            response_cache.bump(tenant_id, table_name)
             return row
         except exc.IntegrityError as e:
             db.rollback()
             raise HTTPException(status_code=400, detail="Database integrity violation. Please check unique constraints or foreign keys.")
 
+    @staticmethod
+    def bulk_create_rows(
+        db: Session,
+        table_name: str,
+        tenant_id: str,
+        user_id: str,
+        sanitized_rows: list,
+        errors: list = None,
+        on_conflict: list = None,
+        conflict_action: str = "update",
+    ):
+        """
+        Inserts pre-validated (index, row) pairs in multi-row batches of
+        BULK_BATCH_SIZE with one batched audit insert and one commit per batch.
+        A failing batch is retried row-by-row inside savepoints so only the
+        offending rows are reported and the rest of the import proceeds.
+        """
+        table = get_reflected_table(table_name, bind=db.connection())
+        valid = sanitized_rows
+        errors = list(errors or [])
+        received = len(valid) + len(errors)
+        inject_user = "user_id" in table.columns
+        for _, data in valid:
+            # CORE SECURITY: system-validated identity always wins.
+            data["tenant_id"] = tenant_id
+            if inject_user:
+                data["user_id"] = user_id
+
+        action = "CREATE"
+        if on_conflict:
+            for name in on_conflict:
+                if name not in table.columns:
+                    raise HTTPException(status_code=400, detail=f"Property '{name}' does not exist on this resource.")
+            dialect_insert = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+            if dialect_insert is None:
+                raise HTTPException(status_code=400, detail="Upsert is not supported on this database.")
+            action = "UPSERT"
+
+        def build_statement(keys):
+            if not on_conflict:
+                return statement_cache.insert(table, keys)
+            return statement_cache.upsert(table, keys, dialect_insert, on_conflict, conflict_action)
+
+        def execute_batch(batch):
+            # executemany needs a uniform key set; group heterogeneous rows.
+            groups = {}
+            for index, data in batch:
+                groups.setdefault(tuple(sorted(data)), []).append((index, data))
+            written = []
+            for keys, group in groups.items():
+                result = db.execute(build_statement(keys), [data for _, data in group])
+                # RETURNING order isn't tied to the parameter order, so each
+                # audit payload is the row's own values for the supplied columns.
+                written.extend((row, {key: row[key] for key in keys}) for row in result.mappings().all())
+            return written
+
+        written_count = 0
+        failed_count = 0
+        for start in range(0, len(valid), BULK_BATCH_SIZE):
+            batch = valid[start:start + BULK_BATCH_SIZE]
+            written = []
+            try:
+                with db.begin_nested():
+                    written = execute_batch(batch)
+            except exc.DBAPIError:
+                for index, data in batch:
+                    try:
+                        with db.begin_nested():
+                            written.extend(execute_batch([(index, data)]))
+                    except exc.DBAPIError:
+                        failed_count += 1
+                        errors.append({
+                            "index": index,
+                            "detail": "Database integrity violation. Please check unique constraints or foreign keys."
+                        })
+
+            log_mutations(db, [
+                {
+                    "tenant_id": tenant_id,
+                    "user_id": user_id,
+                    "action": action,
+                    "table_name": table_name,
+                    "record_id": _record_id(row),
+                    "payload": payload,
+                }
+                for row, payload in written
+            ])
+            db.commit()
+            if written:
+                response_cache.bump(tenant_id, table_name)
+            # SET LOCAL is transaction-scoped: restore the identity for the next batch.
+            set_db_tenant_context(db, tenant_id, user_id)
+            written_count += len(written)
+
+        errors.sort(key=lambda e: e["index"])
+        return {
+            "status": "success" if not errors else "partial",
+            "received": received,
+            "written": written_count,
+            # Rows left untouched by on_conflict=...&conflict_action=ignore
+            "skipped": len(valid) - written_count - failed_count,
+            "errors": errors,
+        }
+
     @staticmethod
     def update_row(db: Session, table_name: str, row_id: str, tenant_id: str, user_id: str, sanitized_data: dict):
-        table = get_reflected_table(table_name)
+        table = get_reflected_table(table_name, bind=db.connection())
         
         # Ensure 'tenant_id' is NOT in the update payload to prevent cross-tenant migration
         sanitized_data.pop("tenant_id", None)
         
         # Postgres RLS will automatically block this update if the row_id doesn't 
         # belong to the active 'app.current_tenant'.
-        query = update(table).where(table.c.id == row_id).values(**sanitized_data).returning(table)
+        query = statement_cache.update(table, sanitized_data)
         
         try:
-            result = db.execute(query)
+            result = db.execute(query, {**sanitized_data, ROW_ID_PARAM: row_id})
             row = result.mappings().first()
             if not row:
                 raise HTTPException(status_code=404, detail="Resource not found or access denied.")
             
             log_mutation(db, tenant_id, user_id, "UPDATE", table_name, row_id, sanitized_data)
             db.commit()
+            response_cache.bump(tenant_id, table_name)
             return row
         except exc.DBAPIError:
             db.rollback()
@@ -99,16 +372,96 @@ class CrudEngine:
 
     @staticmethod
     def delete_row(db: Session, table_name: str, row_id: str, tenant_id: str, user_id: str):
-        table = get_reflected_table(table_name)
+        table = get_reflected_table(table_name, bind=db.connection())
         
         # RLS prevents deletion of other tenant's rows.
-        query = delete(table).where(table.c.id == row_id).returning(table.c.id)
+        query = statement_cache.delete(table)
         
-        result = db.execute(query)
+        result = db.execute(query, {ROW_ID_PARAM: row_id})
         res = result.fetchone()
         if not res:
             raise HTTPException(status_code=404, detail="Resource not found or access denied.")
         
         log_mutation(db, tenant_id, user_id, "DELETE", table_name, row_id)
         db.commit()
+        response_cache.bump(tenant_id, table_name)
         return {"status": "success", "message": f"Record {row_id} deleted."}
+
+
+class AsyncCrudEngine:
+    """
+    AsyncSession front-end for DB_MODE=async.
+
+    Statement building, validation and audit logic live in CrudEngine; each
+    operation runs it through AsyncSession.run_sync, so the I/O happens on the
+    event loop via the async driver instead of holding a threadpool thread.
+    """
+
+    @staticmethod
+    async def get_table(db: AsyncSession, table_name: str) -> Table:
+        table = shard_map.for_session(db).schema_cache.get(table_name)
+        if table is not None:
+            return table
+        return await db.run_sync(lambda s: get_reflected_table(table_name, bind=s.connection()))
+
+    @staticmethod
+    async def read_rows(db: AsyncSession, table_name: str, **kwargs):
+        return await db.run_sync(CrudEngine.read_rows, table_name, **kwargs)
+
+    @staticmethod
+    async def read_row(db: AsyncSession, table_name: str, row_id: str):
+        return await db.run_sync(CrudEngine.read_row, table_name, row_id)
+
+    @staticmethod
+    async def create_row(db: AsyncSession, table_name: str, tenant_id: str, user_id: str, sanitized_data: dict):
+        return await db.run_sync(CrudEngine.create_row, table_name, tenant_id, user_id, sanitized_data)
+
+    @staticmethod
+    async def bulk_create_rows(db: AsyncSession, table_name: str, tenant_id: str, user_id: str, sanitized_rows: list, **kwargs):
+        return await db.run_sync(CrudEngine.bulk_create_rows, table_name, tenant_id, user_id, sanitized_rows, **kwargs)
+
+    @staticmethod
+    async def update_row(db: AsyncSession, table_name: str, row_id: str, tenant_id: str, user_id: str, sanitized_data: dict):
+        return await db.run_sync(CrudEngine.update_row, table_name, row_id, tenant_id, user_id, sanitized_data)
+
+    @staticmethod
+    async def delete_row(db: AsyncSession, table_name: str, row_id: str, tenant_id: str, user_id: str):
+        return await db.run_sync(CrudEngine.delete_row, table_name, row_id, tenant_id, user_id)
+
+    @staticmethod
+    async def stream_rows(
+        table_name: str,
+        tenant_id: str,
+        user_id: str,
+        fmt: str = "ndjson",
+        compress: bool = False,
+        select_param: str = None,
+        filter_params: list = None,
+        session_factory=AsyncSessionLocal,
+    ):
+        """
+        Async export: AsyncSession.stream() keeps a server-side cursor open on
+        a dedicated session (and tenant context) for the life of the response.
+        """
+        db = session_factory()
+        try:
+            table = await AsyncCrudEngine.get_table(db, table_name)
+            columns, query = _export_query(table, select_param, filter_params)
+            await set_db_tenant_context_async(db, tenant_id, user_id)
+            result = await db.stream(query)
+        except exc.InternalError:
+            await db.close()
+            raise HTTPException(status_code=403, detail="Unauthorized: Security Context Missing.")
+        except BaseException:
+            await db.close()
+            raise
+
+        async def generate():
+            try:
+                async for chunk in export.encode_batches_async(fmt, [c.name for c in columns], result.partitions(), compress):
+                    yield chunk
+            finally:
+                await result.close()
+                await db.close()
+
+        return generate()
@@ -0,0 +1,128 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import os
+import uuid
+import zlib
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+# Rows fetched per server-side cursor round trip and written per chunk
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "2000"))
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    raise TypeError(f"Unserializable value of type {type(value).__name__}")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (dict, list)):
+        # JSON/JSONB columns: one cell holding the JSON text
+        return json.dumps(value, default=_json_default)
+    return _json_default(value)
+
+
+class NdjsonEncoder:
+    """One JSON object per line."""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, batch: list) -> bytes:
+        lines = [json.dumps(dict(zip(self.columns, row)), default=_json_default) for row in batch]
+        return ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+class CsvEncoder:
+    """RFC 4180 CSV with a header row."""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return self._drain()
+
+    def encode(self, batch: list) -> bytes:
+        self._writer.writerows([_csv_value(v) for v in row] for row in batch)
+        return self._drain()
+
+
+class GzipStream:
+    """Incremental gzip framing for a chunked response body."""
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def encode_batches(fmt: str, columns: List[str], batches: Iterable[list], compress: bool = False) -> Iterator[bytes]:
+    """Sync body generator: header, one chunk per fetched batch, gzip trailer."""
+    encoder = ENCODERS[fmt](columns)
+    gz = GzipStream() if compress else None
+
+    def emit(chunk: bytes) -> bytes:
+        return gz.compress(chunk) if gz else chunk
+
+    yield emit(encoder.header())
+    for batch in batches:
+        chunk = emit(encoder.encode(batch))
+        if chunk:
+            yield chunk
+    if gz:
+        yield gz.flush()
+
+
+async def encode_batches_async(fmt: str, columns: List[str], batches: AsyncIterable[list], compress: bool = False) -> AsyncIterator[bytes]:
+    """Async counterpart of encode_batches for AsyncResult.partitions()."""
+    encoder = ENCODERS[fmt](columns)
+    gz = GzipStream() if compress else None
+
+    def emit(chunk: bytes) -> bytes:
+        return gz.compress(chunk) if gz else chunk
+
+    yield emit(encoder.header())
+    async for batch in batches:
+        chunk = emit(encoder.encode(batch))
+        if chunk:
+            yield chunk
+    if gz:
+        yield gz.flush()
+
+
+ENCODERS = {
+    "ndjson": NdjsonEncoder,
+    "csv": CsvEncoder,
+}
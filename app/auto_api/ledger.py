@@ -0,0 +1,258 @@
+"""
+Audit ledger storage and reads.
+
+On Postgres audit_logs is range-partitioned by month on "timestamp"
+(audit_logs_yYYYYmMM, plus audit_logs_default for anything outside them).
+AuditPartitionMaintainer keeps AUDIT_PARTITION_PREMAKE_MONTHS partitions
+ahead on every shard and applies retention by detaching (or dropping) whole
+months, which costs no DELETE and no vacuum. Run it from cron with
+
+    python -m app.auto_api.ledger
+
+or let each worker run it every AUDIT_PARTITION_CHECK_SECONDS; an advisory
+lock keeps concurrent runs from racing. A ledger created before partitioning
+is reported as unpartitioned and left alone.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, select, text, tuple_
+from sqlalchemy.orm import Session
+from app.auto_api.models import AuditLog
+from app.auto_api.query import decode_cursor, encode_cursor
+from app.shards import shard_map
+
+AUDIT_PARTITION_PREMAKE_MONTHS = int(os.getenv("AUDIT_PARTITION_PREMAKE_MONTHS", "3"))
+# 0 keeps every month. Otherwise months entirely older than this are detached
+# (AUDIT_RETENTION_ACTION=detach, left as standalone tables to archive) or dropped.
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "0"))
+AUDIT_RETENTION_ACTION = os.getenv("AUDIT_RETENTION_ACTION", "detach")
+AUDIT_PARTITION_CHECK_SECONDS = float(os.getenv("AUDIT_PARTITION_CHECK_SECONDS", "3600"))  # 0 = cron only
+
+AUDIT_PAGE_SIZE = int(os.getenv("AUDIT_PAGE_SIZE", "50"))
+AUDIT_MAX_PAGE_SIZE = int(os.getenv("AUDIT_MAX_PAGE_SIZE", "500"))
+
+PARENT = AuditLog.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+_PARTITION_NAME = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+# pg_advisory lock key shared by every worker and the CLI.
+_LOCK_KEY = 0x6E6F7661_6175646C  # "novaaudl"
+
+# Newest first. Both key columns are NOT NULL, so a plain row comparison
+# matches the (tenant_id, timestamp, id) index.
+AUDIT_ORDER = "-timestamp"
+_KEY_COLUMNS = [AuditLog.__table__.c.timestamp, AuditLog.__table__.c.id]
+
+logger = logging.getLogger("novabase.ledger")
+
+
+def _month_add(year: int, month: int, delta: int):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def partition_name(year: int, month: int) -> str:
+    return f"{PARENT}_y{year:04d}m{month:02d}"
+
+
+def _bound(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}-01 00:00:00+00"
+
+
+# --- partition maintenance ---
+def _is_partitioned(conn) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent)"), {"parent": PARENT}
+    ).first() is not None
+
+
+def _attached(conn) -> List[str]:
+    return list(conn.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:parent)"),
+        {"parent": PARENT},
+    ).scalars())
+
+
+def maintain(engine, now: Optional[datetime] = None) -> dict:
+    """Creates missing month partitions and applies retention on one database."""
+    report = {"partitioned": False, "created": [], "detached": [], "dropped": [], "skipped": None}
+    if engine.dialect.name != "postgresql":
+        report["skipped"] = "not postgres"
+        return report
+    now = now or datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            logger.warning(f"{PARENT} on {engine.url.render_as_string(hide_password=True)} predates partitioning; left unpartitioned.")
+            report["skipped"] = "audit_logs is not partitioned"
+            return report
+        report["partitioned"] = True
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}).scalar():
+            report["skipped"] = "another maintainer holds the lock"
+            return report
+        attached = set(_attached(conn))
+        if DEFAULT_PARTITION not in attached:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+            report["created"].append(DEFAULT_PARTITION)
+
+        for delta in range(0, AUDIT_PARTITION_PREMAKE_MONTHS + 1):
+            year, month = _month_add(now.year, now.month, delta)
+            name = partition_name(year, month)
+            if name in attached:
+                continue
+            upper = _month_add(year, month, 1)
+            try:
+                # A savepoint per month: rows already sitting in the default
+                # partition for that range make the CREATE fail, not the run.
+                with conn.begin_nested():
+                    conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {PARENT} "
+                        f"FOR VALUES FROM ('{_bound(year, month)}') TO ('{_bound(*upper)}')"
+                    ))
+                report["created"].append(name)
+            except Exception as e:
+                logger.error(f"Could not create audit partition {name}: {str(e).splitlines()[0]}")
+
+        if AUDIT_RETENTION_MONTHS > 0:
+            cutoff = _month_add(now.year, now.month, -AUDIT_RETENTION_MONTHS)
+            for name in sorted(attached):
+                match = _PARTITION_NAME.match(name)
+                if not match or (int(match.group(1)), int(match.group(2))) >= cutoff:
+                    continue
+                conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+                if AUDIT_RETENTION_ACTION == "drop":
+                    conn.execute(text(f"DROP TABLE {name}"))
+                    report["dropped"].append(name)
+                else:
+                    report["detached"].append(name)
+    return report
+
+
+def ensure_indexes(engine):
+    """Adds ledger indexes missing from tables created before they existed."""
+    for index in AuditLog.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+class AuditPartitionMaintainer:
+    """Runs maintain() on every shard now and then, off the request path."""
+
+    def __init__(self, interval: float = AUDIT_PARTITION_CHECK_SECONDS):
+        if AUDIT_RETENTION_ACTION not in ("detach", "drop"):
+            raise ValueError(f"Unknown AUDIT_RETENTION_ACTION '{AUDIT_RETENTION_ACTION}'. Use 'detach' or 'drop'.")
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.last_run = None
+        self.last_error = None
+        self.last_report = {}
+
+    def run_once(self, now: Optional[datetime] = None) -> dict:
+        reports = {}
+        for name, shard in shard_map.shards.items():
+            try:
+                reports[name] = maintain(shard.engine, now)
+            except Exception as e:
+                self.last_error = str(e).splitlines()[0] if str(e) else type(e).__name__
+                logger.error(f"Audit partition maintenance failed on shard '{name}': {self.last_error}")
+                reports[name] = {"error": self.last_error}
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_report = reports
+        return reports
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-partitions", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "premake_months": AUDIT_PARTITION_PREMAKE_MONTHS,
+            "retention_months": AUDIT_RETENTION_MONTHS,
+            "retention_action": AUDIT_RETENTION_ACTION,
+            "check_seconds": self.interval,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+            "last_report": self.last_report,
+        }
+
+
+audit_partitions = AuditPartitionMaintainer()
+
+
+# --- reads ---
+def read_audit_page(
+    db: Session,
+    tenant_id: str,
+    limit: int = AUDIT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    table_name: Optional[str] = None,
+    record_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    One page of the tenant's ledger, newest first -> (rows, next_cursor).
+    The caller has run the tenant handshake, so RLS applies on top of the
+    explicit tenant predicate that drives the (tenant_id, timestamp, id)
+    index. Time bounds, including the cursor's, prune partitions.
+    """
+    ledger = AuditLog.__table__
+    timestamp, row_id = _KEY_COLUMNS
+    query = select(ledger).where(ledger.c.tenant_id == tenant_id)
+    if table_name:
+        query = query.where(ledger.c.table_name == table_name)
+    if record_id:
+        query = query.where(ledger.c.record_id == record_id)
+    if action:
+        query = query.where(ledger.c.action == action.upper())
+    if since:
+        query = query.where(timestamp >= since)
+    if until:
+        query = query.where(timestamp < until)
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor, AUDIT_ORDER, _KEY_COLUMNS)
+        query = query.where(and_(
+            timestamp <= last_timestamp,
+            tuple_(timestamp, row_id) < tuple_(last_timestamp, last_id),
+        ))
+    rows = db.execute(
+        query.order_by(timestamp.desc(), row_id.desc()).limit(limit + 1)
+    ).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(AUDIT_ORDER, [rows[-1]["timestamp"].isoformat(), rows[-1]["id"]])
+    return rows, next_cursor
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print(json.dumps(audit_partitions.run_once(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
 import uuid
+from datetime import datetime, timezone
 
 class TableMeta(Base):
     """
@@ -23,10 +24,23 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id = Column(String, index=True)
+    tenant_id = Column(String)
     user_id = Column(String, index=True)
     action = Column(String) # CREATE, UPDATE, DELETE
     table_name = Column(String)
     record_id = Column(String)
     payload = Column(JSON, nullable=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Part of the key because Postgres range-partitions the ledger by month on it.
+    timestamp = Column(
+        DateTime(timezone=True), primary_key=True, nullable=False,
+        default=lambda: datetime.now(timezone.utc), server_default=func.now(),
+    )
+
+    __table_args__ = (
+        # Tenant-scoped, newest-first reads (GET /api/_audit, realtime replay).
+        Index("ix_audit_logs_tenant_timestamp", "tenant_id", "timestamp", "id"),
+        Index("ix_audit_logs_tenant_record", "tenant_id", "table_name", "record_id"),
+        # Tiny index for time-range scans over append-ordered data.
+        Index("ix_audit_logs_timestamp_brin", "timestamp", postgresql_using="brin"),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
@@ -0,0 +1,202 @@
+import base64
+import datetime
+import decimal
+import json
+import os
+import uuid
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import JSON, Column, Table, and_, or_, String
+from fastapi import HTTPException, status
+
+# Page size guardrails for list endpoints
+DEFAULT_PAGE_SIZE = int(os.getenv("API_DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+
+# Query-string keys that are not column filters
+RESERVED_PARAMS = {"limit", "cursor", "select", "order", "format", "gzip"}
+
+# PostgREST-style operators: ?age=gt.30&status=in.(active,trial)&name=like.Ann*
+FILTER_OPERATORS = {
+    "eq": lambda col, v: col == v,
+    "neq": lambda col, v: col != v,
+    "lt": lambda col, v: col < v,
+    "lte": lambda col, v: col <= v,
+    "gt": lambda col, v: col > v,
+    "gte": lambda col, v: col >= v,
+    "in": lambda col, v: col.in_(v),
+    "like": lambda col, v: col.like(v),
+}
+
+
+def _bad_request(detail: str):
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _get_column(table: Table, name: str) -> Column:
+    if name not in table.columns:
+        raise _bad_request(f"Property '{name}' does not exist on this resource.")
+    return table.columns[name]
+
+
+def utc_suffix(parse: Callable[[str], Any]) -> Callable[[str], Any]:
+    # fromisoformat() rejects a trailing "Z" before Python 3.11; Postgres accepts it.
+    def parse_iso(value: str):
+        if value[-1:] in ("Z", "z"):
+            value = value[:-1] + "+00:00"
+        return parse(value)
+    return parse_iso
+
+
+_parse_datetime = utc_suffix(datetime.datetime.fromisoformat)
+_parse_time = utc_suffix(datetime.time.fromisoformat)
+
+
+def coerce_value(column: Column, raw: Any) -> Any:
+    """
+    Converts a query-string (or cursor) value into the column's Python type.
+    """
+    if raw is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    if isinstance(raw, python_type):
+        return raw
+    try:
+        if python_type is bool:
+            lowered = str(raw).lower()
+            if lowered not in ("true", "false", "1", "0"):
+                raise ValueError(raw)
+            return lowered in ("true", "1")
+        if python_type is datetime.datetime:
+            return _parse_datetime(str(raw))
+        if python_type is datetime.date:
+            return datetime.date.fromisoformat(str(raw))
+        if python_type is datetime.time:
+            return _parse_time(str(raw))
+        if python_type is uuid.UUID:
+            return uuid.UUID(str(raw))
+        if python_type in (int, float, decimal.Decimal, str):
+            return python_type(raw)
+    except (ValueError, TypeError, decimal.InvalidOperation):
+        raise _bad_request(f"Invalid value for '{column.name}'.")
+    return raw
+
+
+def parse_columns(table: Table, select_param: Optional[str]) -> List[Column]:
+    """`select=id,name` column projection; all columns when omitted."""
+    if not select_param:
+        return list(table.columns)
+    names = [n.strip() for n in select_param.split(",") if n.strip()]
+    if not names:
+        raise _bad_request("Empty column selection.")
+    return [_get_column(table, n) for n in dict.fromkeys(names)]
+
+
+def parse_filters(table: Table, params: Iterable[Tuple[str, str]]) -> list:
+    """
+    Turns `column=op.value` pairs into SQL clauses, validated against reflected columns.
+    """
+    clauses = []
+    for key, raw in params:
+        if key in RESERVED_PARAMS:
+            continue
+        column = _get_column(table, key)
+        op, sep, value = raw.partition(".")
+        if not sep or op not in FILTER_OPERATORS:
+            raise _bad_request(
+                f"Invalid filter on '{key}'. Use one of: {', '.join(FILTER_OPERATORS)} (e.g. {key}=eq.value)."
+            )
+        if op == "in":
+            if not (value.startswith("(") and value.endswith(")")):
+                raise _bad_request(f"'in' filter on '{key}' must look like in.(a,b,c).")
+            items = [v.strip() for v in value[1:-1].split(",") if v.strip()]
+            if not items:
+                raise _bad_request(f"'in' filter on '{key}' has no values.")
+            operand = [coerce_value(column, v) for v in items]
+        elif op == "like":
+            if not isinstance(column.type, String):
+                raise _bad_request(f"'like' filter requires a text column; '{key}' is not.")
+            operand = value.replace("*", "%")
+        elif value.lower() == "null" and op in ("eq", "neq"):
+            clauses.append(column.is_(None) if op == "eq" else column.is_not(None))
+            continue
+        else:
+            operand = coerce_value(column, value)
+        clauses.append(FILTER_OPERATORS[op](column, operand))
+    return clauses
+
+
+def parse_order(table: Table, order_param: Optional[str]) -> Tuple[List[Column], bool]:
+    """
+    `order=created_at` or `order=-created_at`. Returns the keyset columns
+    (sort column plus primary key as tie-breaker) and whether it is descending.
+    Tables without a primary key break ties on every comparable column.
+    """
+    pk_columns = list(table.primary_key.columns) or [
+        c for c in table.columns if not isinstance(c.type, JSON)
+    ]
+    if not order_param:
+        return pk_columns, False
+    descending = order_param.startswith("-")
+    sort_column = _get_column(table, order_param.lstrip("-"))
+    return [sort_column] + [c for c in pk_columns if c.name != sort_column.name], descending
+
+
+def order_clauses(key_columns: List[Column], descending: bool) -> list:
+    return [(c.desc() if descending else c.asc()).nulls_last() for c in key_columns]
+
+
+def keyset_predicate(key_columns: List[Column], values: list, descending: bool):
+    """
+    Lexicographic "rows after the cursor" predicate for NULLS LAST ordering.
+    """
+    terms = []
+    for i, column in enumerate(key_columns):
+        value = values[i]
+        if value is None:
+            # Nothing sorts after NULL at this position.
+            continue
+        after = column < value if descending else column > value
+        if column.nullable:
+            after = or_(after, column.is_(None))
+        prefix = [
+            key_columns[j].is_(None) if values[j] is None else key_columns[j] == values[j]
+            for j in range(i)
+        ]
+        terms.append(and_(*prefix, after))
+    return or_(*terms) if terms else None
+
+
+def next_page_cursor(order_param: Optional[str], key_columns: List[Column], last: Mapping, following: Mapping) -> str:
+    """
+    Cursor for the page after `last`; `following` is the first row past it.
+    Refuses to page when the two tie on every key column (a table without a
+    primary key holding duplicate rows): the cursor would skip the rest of the tie.
+    """
+    if all(following[c.name] == last[c.name] for c in key_columns):
+        raise _bad_request(
+            "Rows cannot be paged past this point: the resource has no primary key and the "
+            "page ends inside a run of identical rows. Narrow the filter or raise the limit."
+        )
+    return encode_cursor(order_param, [last[c.name] for c in key_columns])
+
+
+def encode_cursor(order_param: Optional[str], values: list) -> str:
+    raw = json.dumps({"o": order_param or "", "k": values}, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_param: Optional[str], key_columns: List[Column]) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = decoded["k"]
+        cursor_order = decoded["o"]
+    except (ValueError, KeyError, TypeError):
+        raise _bad_request("Malformed pagination cursor.")
+    if cursor_order != (order_param or "") or len(values) != len(key_columns):
+        raise _bad_request("Pagination cursor does not match the requested ordering.")
+    return [coerce_value(c, v) for c, v in zip(key_columns, values)]
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import FrozenSet
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.auto_api.models import TableMeta
+
+# Snapshot of the 'tables_meta' allow-list held in memory per worker.
+REGISTRY_REFRESH_SECONDS = float(os.getenv("REGISTRY_REFRESH_SECONDS", "30"))
+# Unknown names are denied from memory this long. Only the worker that commits
+# a registration clears its entry, so other workers may keep refusing a newly
+# registered table for up to this long.
+REGISTRY_NEGATIVE_TTL_SECONDS = float(os.getenv("REGISTRY_NEGATIVE_TTL_SECONDS", "60"))
+REGISTRY_NEGATIVE_MAX = int(os.getenv("REGISTRY_NEGATIVE_MAX", "4096"))
+
+
+class TableRegistry:
+    """
+    Immutable set of active table names, swapped wholesale on refresh.
+
+    Lookups for registered tables are a frozenset membership test. Unknown names
+    get one targeted query and are then remembered in a bounded negative cache,
+    so repeated probes for unregistered tables never reach Postgres.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float = REGISTRY_REFRESH_SECONDS,
+        negative_ttl_seconds: float = REGISTRY_NEGATIVE_TTL_SECONDS,
+        negative_max: int = REGISTRY_NEGATIVE_MAX,
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.negative_max = negative_max
+        self._active: FrozenSet[str] = frozenset()
+        self._loaded_at = 0.0
+        self._stale = True
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.db_lookups = 0
+        self.negative_hits = 0
+
+    @property
+    def active_tables(self) -> FrozenSet[str]:
+        return self._active
+
+    def _needs_refresh(self) -> bool:
+        return self._stale or (time.monotonic() - self._loaded_at) >= self.refresh_seconds
+
+    def refresh(self, db: Session) -> FrozenSet[str]:
+        """Reloads the full allow-list in a single query."""
+        rows = db.query(TableMeta.table_name).filter(TableMeta.is_active == True).all()
+        snapshot = frozenset(r[0] for r in rows)
+        with self._lock:
+            self._active = snapshot
+            self._loaded_at = time.monotonic()
+            self._stale = False
+            self.refreshes += 1
+        return snapshot
+
+    def mark_stale(self, table_name: str = None):
+        """
+        Change signal: the next lookup reloads the snapshot.
+        """
+        with self._lock:
+            self._stale = True
+            if table_name is None:
+                self._negative.clear()
+            else:
+                self._negative.pop(table_name, None)
+
+    def is_registered(self, db: Session, table_name: str) -> bool:
+        # Only one request per worker pays for the reload; the others never wait
+        # for it (under DB_MODE=async a blocked waiter would stall the event loop
+        # the reload runs on) and serve the previous snapshot meanwhile. Names
+        # missing from it still get the targeted lookup below.
+        if self._needs_refresh() and self._refresh_lock.acquire(blocking=False):
+            try:
+                if self._needs_refresh():
+                    self.refresh(db)
+            finally:
+                self._refresh_lock.release()
+
+        if table_name in self._active:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            denied_at = self._negative.get(table_name)
+            if denied_at is not None and (now - denied_at) < self.negative_ttl_seconds:
+                self._negative.move_to_end(table_name)
+                self.negative_hits += 1
+                return False
+
+        # Catch registrations made by other workers since the last refresh.
+        self.db_lookups += 1
+        meta = db.query(TableMeta.table_name).filter(
+            TableMeta.table_name == table_name,
+            TableMeta.is_active == True
+        ).first()
+
+        with self._lock:
+            if meta:
+                self._active = self._active | {table_name}
+                self._negative.pop(table_name, None)
+                return True
+            self._negative[table_name] = now
+            self._negative.move_to_end(table_name)
+            while len(self._negative) > self.negative_max:
+                self._negative.popitem(last=False)
+        return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active_tables": len(self._active),
+                "negative_entries": len(self._negative),
+                "stale": self._needs_refresh(),
+                "refreshes": self.refreshes,
+                "db_lookups": self.db_lookups,
+                "negative_hits": self.negative_hits,
+            }
+
+
+table_registry = TableRegistry()
+
+_CHANGED_KEY = "novabase_changed_tables"
+
+
+def note_table_change(target: TableMeta, key: str, value) -> bool:
+    """
+    Remembers a tables_meta change on its session until the transaction
+    commits. Marking a registry stale at flush time would let a concurrent
+    lookup reload the pre-commit rows and negative-cache the new name.
+    Returns False when the row has no session to wait for.
+    """
+    session = object_session(target)
+    if session is None:
+        return False
+    session.info.setdefault(key, set()).add(value)
+    return True
+
+
+@event.listens_for(TableMeta, "after_insert")
+@event.listens_for(TableMeta, "after_update")
+@event.listens_for(TableMeta, "after_delete")
+def _on_table_meta_change(mapper, connection, target):
+    if not note_table_change(target, _CHANGED_KEY, target.table_name):
+        table_registry.mark_stale(target.table_name)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed_changes(session: Session):
+    for table_name in session.info.pop(_CHANGED_KEY, ()):
+        table_registry.mark_stale(table_name)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session: Session, previous_transaction):
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,303 @@
+import fcntl
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from app.auto_api.serialization import dumps
+from app.auto_api.singleflight import SingleFlight
+
+# Tenant-scoped cache of rendered GET /api/{table} responses.
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 0 = store nothing
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))  # bounds out-of-band writes
+# Version backend: "shm" (a write on any worker invalidates every worker on the host)
+# or "memory" (per worker: only for single-worker deployments, since other workers
+# would keep serving pre-write bodies for up to RESPONSE_CACHE_TTL_SECONDS).
+# Across several hosts, set RESPONSE_CACHE_MAX_BYTES=0 or a short TTL.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "shm")
+RESPONSE_CACHE_SHM_NAME = os.getenv("RESPONSE_CACHE_SHM_NAME", "novabase_response_versions")
+RESPONSE_CACHE_SHM_SLOTS = int(os.getenv("RESPONSE_CACHE_SHM_SLOTS", "65536"))
+
+
+def _scope(tenant_id: str, table_name: str) -> str:
+    return f"{tenant_id}:{table_name}"
+
+
+class MemoryVersionStore:
+    """Per-process (tenant, table) write counters."""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    def bump(self, scope: str) -> int:
+        with self._lock:
+            version = self._versions.get(scope, 0) + 1
+            self._versions[scope] = version
+            return version
+
+
+class SharedMemoryVersionStore:
+    """
+    Fixed array of counters in POSIX shared memory, so a write on any worker
+    invalidates every worker's cached responses. Scopes are addressed by a
+    stable hash; colliding scopes share a counter, which only costs extra
+    invalidations and never serves stale data. Counters never go backwards.
+    """
+
+    _SLOT = struct.Struct("=Q")
+
+    def __init__(self, name: str = RESPONSE_CACHE_SHM_NAME, slots: int = RESPONSE_CACHE_SHM_SLOTS):
+        from multiprocessing import shared_memory, resource_tracker
+
+        self.slots = slots
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        # The segment outlives any single worker; don't let its exit unlink it.
+        try:
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        except Exception:
+            pass
+        self._lock_file = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a+")
+        self._thread_lock = threading.Lock()
+
+    def _offset(self, scope: str) -> int:
+        slot = int.from_bytes(hashlib.blake2b(scope.encode(), digest_size=8).digest(), "little") % self.slots
+        return slot * self._SLOT.size
+
+    def get(self, scope: str) -> int:
+        return self._SLOT.unpack_from(self._shm.buf, self._offset(scope))[0]
+
+    def bump(self, scope: str) -> int:
+        offset = self._offset(scope)
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                version = self._SLOT.unpack_from(self._shm.buf, offset)[0] + 1
+                self._SLOT.pack_into(self._shm.buf, offset, version)
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        return version
+
+
+VERSION_STORES = {
+    "memory": MemoryVersionStore,
+    "shm": SharedMemoryVersionStore,
+}
+
+
+def create_version_store(backend: str = RESPONSE_CACHE_BACKEND):
+    if backend not in VERSION_STORES:
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND '{backend}'. Use one of: {', '.join(VERSION_STORES)}.")
+    return VERSION_STORES[backend]()
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "next_cursor", "version", "stored_at")
+
+    def __init__(self, body: bytes, next_cursor: Optional[str], version: int):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.next_cursor = next_cursor
+        self.version = version
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """
+    LRU of rendered read responses keyed by (tenant, table, normalised query),
+    bounded by total body bytes.
+
+    Every entry records the (tenant, table) version it was rendered under.
+    CrudEngine bumps that version after each committed write, so an entry is
+    served only while no write has happened since it was built. The version is
+    read before the query runs, so a write racing with a load can only make the
+    new entry unusable and never lets it serve stale rows.
+
+    Concurrent misses on the same key are coalesced: one caller runs the query,
+    the rest wait for its result.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        max_entry_bytes: int = RESPONSE_CACHE_MAX_ENTRY_BYTES,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+        versions=None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl_seconds = ttl_seconds
+        self.versions = versions if versions is not None else create_version_store()
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(tenant_id: str, table_name: str, query_items) -> tuple:
+        return (tenant_id, table_name, tuple(sorted(query_items)))
+
+    def bump(self, tenant_id: str, table_name: str) -> int:
+        """Called after a committed write to (tenant, table)."""
+        return self.versions.bump(_scope(tenant_id, table_name))
+
+    def _lookup(self, key: tuple, version: int, count: bool = True) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version or (
+                self.ttl_seconds and time.monotonic() - entry.stored_at >= self.ttl_seconds
+            ):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry
+
+    def _drop(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def _store(self, key: tuple, entry: CachedResponse):
+        size = len(entry.body)
+        if size > self.max_entry_bytes or size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _build(self, key: tuple, version: int, loaded: Tuple[object, Optional[str]]) -> CachedResponse:
+        content, next_cursor = loaded
+        entry = CachedResponse(dumps(content), next_cursor, version)
+        self._store(key, entry)
+        return entry
+
+    def get_or_load(
+        self,
+        tenant_id: str,
+        table_name: str,
+        query_items,
+        loader: Callable[[], Tuple[object, Optional[str]]],
+    ) -> CachedResponse:
+        """
+        Returns the cached response, or runs `loader` -> (content, next_cursor)
+        once for all concurrent callers and caches the rendered result.
+        """
+        key = self.key(tenant_id, table_name, query_items)
+        version = self.versions.get(_scope(tenant_id, table_name))
+        entry = self._lookup(key, version)
+        if entry is not None:
+            return entry
+
+        def load() -> CachedResponse:
+            entry = self._lookup(key, version)
+            if entry is not None:
+                return entry
+            with self._lock:
+                self.misses += 1
+            return self._build(key, version, loader())
+
+        # Waiters get the leader's response even when it was too big to store.
+        entry, shared = self._loading.run((key, version), load)
+        if shared:
+            with self._lock:
+                self.coalesced += 1
+        return entry
+
+    async def get_or_load_async(
+        self,
+        tenant_id: str,
+        table_name: str,
+        query_items,
+        loader: Callable[[], Awaitable[Tuple[object, Optional[str]]]],
+    ) -> CachedResponse:
+        """Event-loop variant of get_or_load; it shares flights with the sync path."""
+        key = self.key(tenant_id, table_name, query_items)
+        version = self.versions.get(_scope(tenant_id, table_name))
+        entry = self._lookup(key, version)
+        if entry is not None:
+            return entry
+
+        async def load() -> CachedResponse:
+            entry = self._lookup(key, version)
+            if entry is not None:
+                return entry
+            with self._lock:
+                self.misses += 1
+            return self._build(key, version, await loader())
+
+        entry, shared = await self._loading.run_async((key, version), load)
+        if shared:
+            with self._lock:
+                self.coalesced += 1
+        return entry
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        """Renders the entry, or a 304 when the client already holds this ETag."""
+        headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+        if entry.next_cursor:
+            headers["X-Next-Cursor"] = entry.next_cursor
+            next_url = request.url.include_query_params(cursor=entry.next_cursor)
+            headers["Link"] = f'<{next_url}>; rel="next"'
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or entry.etag in tags:
+                with self._lock:
+                    self.not_modified += 1
+                return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def clear(self) -> int:
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return dropped
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "backend": type(self.versions).__name__,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
@@ -1,55 +1,210 @@
 
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Any, Dict
-from app.database import get_db, set_db_tenant_context
-from app.auth.dependencies import get_current_tenant_context
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.database import set_db_tenant_context
+from app.replicas import get_read_db, replica_router
+from app.shards import get_tenant_db
+from app.auth.dependencies import get_current_tenant_context, require_workspace_admin
 from app.auth.schemas import TokenData
-from app.auto_api.engine import CrudEngine
-from app.auto_api import validators
+from app.auto_api.engine import CrudEngine, BULK_MAX_ROWS
+from app.auto_api import validators, batch, ledger
+from app.auto_api.schemas import BatchRequest
+from app.auto_api.query import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.auto_api.export import EXPORT_MEDIA_TYPES
+from app.auto_api.response_cache import response_cache
+from app.auto_api.serialization import RowJSONResponse
+from app.auto_api.statements import ROW_ID_PARAM
 
-router = APIRouter(prefix="/api", tags=["Auto-CRUD API"])
+router = APIRouter(prefix="/api", tags=["Auto-CRUD API"], default_response_class=RowJSONResponse)
+
+# Declared before the /{table_name} routes so "_batch" is never taken for a table name.
+@router.post("/_batch")
+def batch_records(
+    body: BatchRequest,
+    db: Session = Depends(get_tenant_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    """
+    Runs several dependent create/update/delete operations in one transaction.
+    Later operations can use "$<ref>.<column>" (or "$<index>.<column>") to
+    reference results of earlier ones.
+    """
+    if len(body.operations) > batch.BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {batch.BATCH_MAX_OPERATIONS} operations.")
+    return batch.run_batch(db, context.tenant_id, context.user_id, body.operations, atomic=body.atomic)
+
+def _audit_response(request: Request, rows, next_cursor: Optional[str]) -> RowJSONResponse:
+    headers = {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return RowJSONResponse(content=rows, headers=headers)
+
+@router.get("/_audit")
+def audit_records(
+    request: Request,
+    limit: int = Query(ledger.AUDIT_PAGE_SIZE, ge=1, le=ledger.AUDIT_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    table: Optional[str] = None,
+    record_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+    context: TokenData = Depends(require_workspace_admin)
+):
+    """
+    The tenant's audit trail, newest first, optionally narrowed to one table,
+    record, action (CREATE/UPDATE/DELETE) or [since, until) time range.
+    The next page is addressed by the opaque cursor in the X-Next-Cursor header.
+    """
+    set_db_tenant_context(db, context.tenant_id, context.user_id)
+    rows, next_cursor = ledger.read_audit_page(
+        db, context.tenant_id, limit=limit, cursor=cursor,
+        table_name=table, record_id=record_id, action=action, since=since, until=until,
+    )
+    return _audit_response(request, rows, next_cursor)
 
 @router.get("/{table_name}")
 def list_records(
     table_name: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    select: Optional[str] = None,
+    order: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     context: TokenData = Depends(get_current_tenant_context)
 ):
+    """
+    Paginated listing. Any other query parameter is a column filter (e.g. ?qty=gt.5).
+    The next page is addressed by the opaque cursor in the X-Next-Cursor header.
+    """
     validators.validate_table_registry(db, table_name)
-    set_db_tenant_context(db, context.tenant_id, context.user_id)
-    return CrudEngine.read_rows(db, table_name)
+    query_items = request.query_params.multi_items()
+
+    def load():
+        set_db_tenant_context(db, context.tenant_id, context.user_id)
+        return CrudEngine.read_rows(
+            db, table_name,
+            limit=limit,
+            cursor=cursor,
+            select_param=select,
+            order_param=order,
+            filter_params=list(query_items),
+        )
+
+    # Served from the tenant's response cache until the next write to this table.
+    entry = response_cache.get_or_load(context.tenant_id, table_name, query_items, load)
+    return response_cache.respond(request, entry)
+
+@router.get("/{table_name}/export")
+def export_records(
+    table_name: str,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    select: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    """
+    Streams the tenant's whole table as NDJSON or CSV with flat memory usage.
+    Accepts the same select= projection and column filters as list_records.
+    """
+    validators.validate_table_registry(db, table_name)
+    # The stream runs on its own session; hand this one's connection back first.
+    db.close()
+    chunks = CrudEngine.stream_rows(
+        table_name, context.tenant_id, context.user_id,
+        session_factory=replica_router.session_factory_for(context.tenant_id),
+        fmt=format,
+        compress=gzip,
+        select_param=select,
+        filter_params=list(request.query_params.multi_items()),
+    )
+    headers = {"Content-Disposition": f'attachment; filename="{table_name}.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+@router.get("/{table_name}/{row_id}")
+def read_record(
+    table_name: str,
+    row_id: str,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    validators.validate_table_registry(db, table_name)
+
+    def load():
+        set_db_tenant_context(db, context.tenant_id, context.user_id)
+        return CrudEngine.read_row(db, table_name, row_id), None
+
+    entry = response_cache.get_or_load(context.tenant_id, table_name, [(ROW_ID_PARAM, row_id)], load)
+    return response_cache.respond(request, entry)
 
 @router.post("/{table_name}")
 def create_record(
     table_name: str,
     data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db),
     context: TokenData = Depends(get_current_tenant_context)
 ):
     validators.validate_table_registry(db, table_name)
     set_db_tenant_context(db, context.tenant_id, context.user_id)
-    clean_data = validators.sanitize_and_validate_payload(table_name, data)
+    clean_data = validators.sanitize_and_validate_payload(table_name, data, bind=db.connection())
     return CrudEngine.create_row(db, table_name, context.tenant_id, context.user_id, clean_data)
 
+@router.post("/{table_name}/bulk")
+def bulk_create_records(
+    table_name: str,
+    rows: List[Any] = Body(...),
+    on_conflict: Optional[str] = None,
+    conflict_action: str = Query("update", pattern="^(update|ignore)$"),
+    db: Session = Depends(get_tenant_db),
+    context: TokenData = Depends(get_current_tenant_context)
+):
+    """
+    Inserts an array of rows. With ?on_conflict=col1,col2 rows are upserted
+    (conflict_action=update) or skipped (conflict_action=ignore).
+    Invalid rows are reported by index without aborting the import.
+    """
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Bulk payload exceeds {BULK_MAX_ROWS} rows.")
+    validators.validate_table_registry(db, table_name)
+    set_db_tenant_context(db, context.tenant_id, context.user_id)
+    valid, errors = validators.sanitize_rows(table_name, rows, bind=db.connection())
+    conflict_columns = [c.strip() for c in on_conflict.split(",") if c.strip()] if on_conflict else None
+    return CrudEngine.bulk_create_rows(
+        db, table_name, context.tenant_id, context.user_id, valid,
+        errors=errors,
+        on_conflict=conflict_columns,
+        conflict_action=conflict_action,
+    )
+
 @router.patch("/{table_name}/{row_id}")
 def update_record(
     table_name: str,
     row_id: str,
     data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db),
     context: TokenData = Depends(get_current_tenant_context)
 ):
     validators.validate_table_registry(db, table_name)
     set_db_tenant_context(db, context.tenant_id, context.user_id)
-    clean_data = validators.sanitize_and_validate_payload(table_name, data, is_update=True)
+    clean_data = validators.sanitize_and_validate_payload(table_name, data, is_update=True, bind=db.connection())
     return CrudEngine.update_row(db, table_name, row_id, context.tenant_id, context.user_id, clean_data)
 
 @router.delete("/{table_name}/{row_id}")
 def delete_record(
     table_name: str,
     row_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db),
     context: TokenData = Depends(get_current_tenant_context)
 ):
     validators.validate_table_registry(db, table_name)
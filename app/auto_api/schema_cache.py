@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from sqlalchemy import Table
+from app.auto_api.singleflight import SingleFlight
+
+# Bounded, process-wide cache of reflected table schemas.
+SCHEMA_CACHE_MAX_TABLES = int(os.getenv("SCHEMA_CACHE_MAX_TABLES", "512"))
+SCHEMA_CACHE_TTL_SECONDS = float(os.getenv("SCHEMA_CACHE_TTL_SECONDS", "0"))  # 0 = no expiry
+
+
+class SchemaCache:
+    """
+    Thread-safe LRU of reflected `Table` objects keyed by table name.
+
+    Each invalidation bumps a schema version. A reflection that started under an
+    older version is never stored, so a table is reflected at most once per version.
+    """
+
+    def __init__(self, max_tables: int = SCHEMA_CACHE_MAX_TABLES, ttl_seconds: float = SCHEMA_CACHE_TTL_SECONDS):
+        self.max_tables = max_tables
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # name -> (table, loaded_at)
+        self._lock = threading.Lock()
+        self._loading = SingleFlight()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _is_fresh(self, loaded_at: float) -> bool:
+        return not self.ttl_seconds or (time.monotonic() - loaded_at) < self.ttl_seconds
+
+    def get(self, table_name: str) -> Optional[Table]:
+        """Returns the cached table (counting a hit) or None without loading."""
+        with self._lock:
+            entry = self._entries.get(table_name)
+            if entry and self._is_fresh(entry[1]):
+                self._entries.move_to_end(table_name)
+                self.hits += 1
+                return entry[0]
+            return None
+
+    def get_or_load(self, table_name: str, loader: Callable[[str], Table]) -> Table:
+        table = self.get(table_name)
+        if table is not None:
+            return table
+
+        # One reflection per table at a time; concurrent callers share its result.
+        def load() -> Table:
+            with self._lock:
+                entry = self._entries.get(table_name)
+                if entry and self._is_fresh(entry[1]):
+                    self._entries.move_to_end(table_name)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+                version = self.version
+
+            table = loader(table_name)
+            with self._lock:
+                if version == self.version:
+                    self._entries[table_name] = (table, time.monotonic())
+                    self._entries.move_to_end(table_name)
+                    while len(self._entries) > self.max_tables:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            return table
+
+        return self._loading.run(table_name, load)[0]
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """
+        Drops one table (or every table when no name is given) after DDL.
+        Returns the new schema version.
+        """
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(table_name, None)
+            self.version += 1
+            return self.version
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_tables": self.max_tables,
+                "ttl_seconds": self.ttl_seconds,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+schema_cache = SchemaCache()
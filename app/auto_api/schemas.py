@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional, Union
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    table: str
+    id: Optional[Union[int, str]] = None # Target row for update/delete; may be a "$ref.column" reference
+    data: Dict[str, Any] = {}
+    ref: Optional[str] = None # Label later operations use to reference this result
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    atomic: bool = True # False: failed operations are rolled back individually, the rest commit
@@ -0,0 +1,65 @@
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import Row, RowMapping
+
+# orjson is optional: without it the same output is produced by the stdlib encoder.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+
+def _decimal(value: decimal.Decimal):
+    # Same rule as FastAPI's jsonable_encoder: integral decimals stay integers.
+    return int(value) if value.as_tuple().exponent >= 0 else float(value)
+
+
+def _fast_default(value: Any):
+    """Types orjson does not encode natively (UUID/datetime/date/time are native)."""
+    if isinstance(value, RowMapping):
+        return dict(value)
+    if isinstance(value, Row):
+        return value._asdict()
+    if isinstance(value, decimal.Decimal):
+        return _decimal(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).decode()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Unserializable value of type {type(value).__name__}")
+
+
+def _stdlib_default(value: Any):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return _fast_default(value)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Reflected rows (RowMapping lists, dicts, scalars) -> JSON bytes in one pass,
+    without the intermediate copy jsonable_encoder builds.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_fast_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_stdlib_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class RowJSONResponse(JSONResponse):
+    """Default response class of the auto-CRUD routers."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.util import await_only
+
+
+class Flight:
+    """
+    One in-progress load. Waiters get the leader's result (or exception)
+    whether or not it ends up cached.
+
+    Coroutines await wait_async(), which suspends on an asyncio future. Sync
+    callers use wait(): worker threads block on a threading.Event, and sync
+    code running inside AsyncSession.run_sync (a greenlet on the event-loop
+    thread, where blocking would stall the loop the leader needs to finish
+    its I/O) suspends on the same kind of future through the greenlet bridge.
+    """
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._futures: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.result: Any = None
+        self.error: BaseException = None
+
+    def resolve(self, result: Any = None, error: BaseException = None):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self._done.set()
+            futures, self._futures = self._futures, []
+        for loop, future in futures:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def _outcome(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    async def wait_async(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = None
+            if not self._done.is_set():
+                future = loop.create_future()
+                self._futures.append((loop, future))
+        if future is not None:
+            await future
+        return self._outcome()
+
+    def wait(self) -> Any:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._done.wait()
+            return self._outcome()
+        try:
+            return await_only(self.wait_async())
+        except MissingGreenlet:
+            # Plain sync code on the loop thread, outside run_sync: it cannot
+            # yield to the loop, so it blocks like any other sync call there.
+            self._done.wait()
+            return self._outcome()
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SingleFlight:
+    """Coalesces concurrent loads of the same key into one call."""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: Hashable) -> Tuple[Flight, bool]:
+        """Returns (flight, leader); the leader must run the load and call done()."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def done(self, key: Hashable, flight: Flight, result: Any = None, error: BaseException = None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.resolve(result, error)
+
+    def run(self, key: Hashable, loader: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Runs `loader` once for all concurrent callers -> (result, shared)."""
+        flight, leader = self.join(key)
+        if not leader:
+            return flight.wait(), True
+        try:
+            result = loader()
+        except BaseException as e:
+            self.done(key, flight, error=e)
+            raise
+        self.done(key, flight, result)
+        return result, False
+
+    async def run_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Coroutine form of run(): awaits `loader()` once for all concurrent callers."""
+        flight, leader = self.join(key)
+        if not leader:
+            return await flight.wait_async(), True
+        try:
+            result = await loader()
+        except BaseException as e:
+            self.done(key, flight, error=e)
+            raise
+        self.done(key, flight, result)
+        return result, False
+
+    def __len__(self) -> int:
+        return len(self._flights)
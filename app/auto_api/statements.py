@@ -0,0 +1,132 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import Table, bindparam, delete, insert, select, update
+from sqlalchemy.sql import Executable
+
+# Bounded, process-wide cache of parameterised CRUD statements.
+STATEMENT_CACHE_MAX_ENTRIES = int(os.getenv("STATEMENT_CACHE_MAX_ENTRIES", "2048"))
+
+# Bind name of the row id in UPDATE/DELETE; kept clear of real column names.
+ROW_ID_PARAM = "__row_id"
+
+# table.info key naming the shard a table was reflected from; the same table
+# name on two shards gets separate entries instead of evicting each other.
+SHARD_INFO_KEY = "novabase_shard"
+
+
+class StatementCache:
+    """
+    Thread-safe LRU of Core statements keyed by (kind, table, column set, options).
+
+    Statements are built with bindparam() placeholders once per schema version
+    and then executed with plain parameter dicts, so SQLAlchemy's compiled cache
+    keeps hitting as well. Each entry remembers the reflected `Table` it was
+    built from; once the schema cache hands out a new Table (re-reflection after
+    DDL), the stale entry is rebuilt on first use.
+    """
+
+    def __init__(self, max_entries: int = STATEMENT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (table, statement)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, table: Table, kind: str, columns: Iterable[str], builder: Callable[[], Executable], *options) -> Executable:
+        key = (kind, table.name, table.info.get(SHARD_INFO_KEY), tuple(columns), options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is table:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Building is cheap and idempotent; a racing duplicate just overwrites.
+        statement = builder()
+        with self._lock:
+            self._entries[key] = (table, statement)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return statement
+
+    # --- statement factories ---
+    def insert(self, table: Table, columns: Iterable[str]) -> Executable:
+        columns = tuple(sorted(columns))
+        return self.get_or_build(
+            table, "insert", columns,
+            lambda: insert(table).values({name: bindparam(name) for name in columns}).returning(table),
+        )
+
+    def upsert(self, table: Table, columns: Iterable[str], dialect_insert, on_conflict: list, conflict_action: str) -> Executable:
+        columns = tuple(sorted(columns))
+
+        def build():
+            stmt = dialect_insert(table).values({name: bindparam(name) for name in columns})
+            updatable = {k: stmt.excluded[k] for k in columns if k not in on_conflict and k != "tenant_id"}
+            if conflict_action == "ignore" or not updatable:
+                stmt = stmt.on_conflict_do_nothing(index_elements=on_conflict)
+            else:
+                stmt = stmt.on_conflict_do_update(index_elements=on_conflict, set_=updatable)
+            return stmt.returning(table)
+
+        return self.get_or_build(table, "upsert", columns, build, tuple(on_conflict), conflict_action, dialect_insert.__module__)
+
+    def update(self, table: Table, columns: Iterable[str]) -> Executable:
+        columns = tuple(sorted(columns))
+        return self.get_or_build(
+            table, "update", columns,
+            lambda: update(table)
+            .where(table.c.id == bindparam(ROW_ID_PARAM))
+            .values({name: bindparam(name) for name in columns})
+            .returning(table),
+        )
+
+    def delete(self, table: Table) -> Executable:
+        return self.get_or_build(
+            table, "delete", (),
+            lambda: delete(table).where(table.c.id == bindparam(ROW_ID_PARAM)).returning(table.c.id),
+        )
+
+    def select_row(self, table: Table) -> Executable:
+        return self.get_or_build(
+            table, "select_row", (),
+            lambda: select(table).where(table.c.id == bindparam(ROW_ID_PARAM)),
+        )
+
+    def select(self, table: Table, columns: list) -> Executable:
+        """Base projection; callers add WHERE/ORDER BY/LIMIT generatively."""
+        return self.get_or_build(table, "select", tuple(c.name for c in columns), lambda: select(*columns))
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """Drops one table's statements (or all of them). Returns the number dropped."""
+        with self._lock:
+            if table_name is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            stale = [key for key in self._entries if key[1] == table_name]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+statement_cache = StatementCache()
@@ -1,77 +1,256 @@
+import datetime
+import decimal
+import threading
+import uuid
+from typing import Any, Callable, Dict, Tuple
 
-from sqlalchemy import inspect
+from sqlalchemy import JSON, Column, Enum, String, Table
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from app.auto_api.models import TableMeta
 from app.auto_api.engine import get_reflected_table
+from app.auto_api.query import utc_suffix
+from app.shards import shard_map
+
+# SYSTEM PROTECTED FIELDS: Immutable from the public API
+PROTECTED_FIELDS = frozenset({
+    "tenant_id",
+    "id",
+    "user_id",
+    "created_at",
+    "updated_at",
+    "deleted_at",
+    "owner_id",
+    "is_verified",
+    "version",
+    "metadata",
+    "hashed_password",
+    "salt",
+})
+
+_VALIDATOR_KEY = "novabase_validator"
+_compile_lock = threading.Lock()
 
 def validate_table_registry(db: Session, table_name: str):
     """
     Explicit Allow-list Enforcement.
     Only tables explicitly registered and marked active in 'tables_meta' are reachable. 
+    Answered from the in-memory registry snapshot of the session's shard;
+    Postgres is only consulted on refresh.
     """
-    meta = db.query(TableMeta).filter(
-        TableMeta.table_name == table_name,
-        TableMeta.is_active == True
-    ).first()
-    
-    if not meta:
+    if not shard_map.for_session(db).table_registry.is_registered(db, table_name):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Endpoint not found."
         )
     return True
 
-def sanitize_and_validate_payload(table_name: str, payload: dict, is_update: bool = False):
+def _invalid(column: Column, expected: str):
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Invalid value for '{column.name}': expected {expected}."
+    )
+
+def _coercer(column: Column) -> Callable[[Any], Any]:
     """
-    Strict Column-Level Allow-listing.
-    Filters out any fields that are system-managed or protected.
-    REJECTS requests that attempt to write to protected fields.
+    Builds the JSON -> Python conversion for one column once, so payload checks
+    are a dict lookup and a direct call per field.
     """
-    table = get_reflected_table(table_name)
-    db_columns = {c.name: c for c in table.columns}
-    
-    # SYSTEM PROTECTED FIELDS: Immutable from the public API
-    PROTECTED_FIELDS = [
-        "tenant_id", 
-        "id", 
-        "user_id", 
-        "created_at", 
-        "updated_at", 
-        "deleted_at", 
-        "owner_id", 
-        "is_verified",
-        "version",
-        "metadata",
-        "hashed_password",
-        "salt"
-    ]
-    
-    sanitized_data = {}
-    
-    for key, value in payload.items():
-        lowered_key = key.lower()
-        
-        # 1. Block known protected fields
-        if lowered_key in PROTECTED_FIELDS:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Security Violation: Property '{key}' is system-protected and cannot be modified."
+    column_type = column.type
+    if isinstance(column_type, Enum) and column_type.enums:
+        choices = frozenset(column_type.enums)
+        def coerce(value):
+            if value not in choices:
+                raise _invalid(column, "one of " + ", ".join(sorted(choices)))
+            return value
+        return coerce
+    if isinstance(column_type, JSON):
+        # JSON/JSONB (python_type is dict) also accept arrays and scalars: the database decides.
+        return lambda value: value
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return lambda value: value  # custom types: the database decides
+
+    if python_type is bool:
+        def coerce(value):
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.lower() in ("true", "false"):
+                return value.lower() == "true"
+            raise _invalid(column, "boolean")
+        return coerce
+
+    if python_type is int:
+        def coerce(value):
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if isinstance(value, str):
+                try:
+                    return int(value)
+                except ValueError:
+                    pass
+            raise _invalid(column, "integer")
+        return coerce
+
+    if python_type in (float, decimal.Decimal):
+        def coerce(value):
+            if isinstance(value, bool):
+                raise _invalid(column, "number")
+            if isinstance(value, (int, float)):
+                return python_type(value) if python_type is float else decimal.Decimal(str(value))
+            if isinstance(value, str):
+                try:
+                    return python_type(value)
+                except (ValueError, decimal.InvalidOperation):
+                    pass
+            raise _invalid(column, "number")
+        return coerce
+
+    if python_type is str:
+        max_length = getattr(column_type, "length", None) if isinstance(column_type, String) else None
+        def coerce(value):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            if not isinstance(value, str):
+                raise _invalid(column, "string")
+            if max_length is not None and len(value) > max_length:
+                raise _invalid(column, f"at most {max_length} characters")
+            return value
+        return coerce
+
+    parsers = {
+        datetime.datetime: (utc_suffix(datetime.datetime.fromisoformat), "ISO 8601 datetime"),
+        datetime.date: (datetime.date.fromisoformat, "ISO 8601 date"),
+        datetime.time: (utc_suffix(datetime.time.fromisoformat), "ISO 8601 time"),
+        uuid.UUID: (uuid.UUID, "UUID"),
+    }
+    if python_type in parsers:
+        parse, expected = parsers[python_type]
+        def coerce(value):
+            if isinstance(value, python_type):
+                return value
+            if isinstance(value, str):
+                try:
+                    return parse(value)
+                except ValueError:
+                    pass
+            raise _invalid(column, expected)
+        return coerce
+
+    if python_type in (list, dict):
+        def coerce(value):
+            if not isinstance(value, python_type):
+                raise _invalid(column, "array" if python_type is list else "object")
+            return value
+        return coerce
+
+    return lambda value: value
+
+
+class CompiledValidator:
+    """
+    Payload validator specialised for one reflected table.
+
+    Built once per schema version (it lives in the reflected Table's `info`, so
+    a re-reflection after DDL compiles a fresh one) with the writable and
+    protected column sets, per-column coercers, nullability and required
+    columns precomputed. Bad rows are rejected in-process instead of costing a
+    database round trip and a rollback.
+    """
+
+    def __init__(self, table: Table):
+        self.table_name = table.name
+        self.fields: Dict[str, Tuple[Callable[[Any], Any], bool]] = {}
+        self.protected = frozenset(c.name for c in table.columns if c.name.lower() in PROTECTED_FIELDS)
+        required = []
+        for column in table.columns:
+            if column.name.lower() in PROTECTED_FIELDS:
+                continue
+            self.fields[column.name] = (_coercer(column), column.nullable)
+            has_default = (
+                column.server_default is not None
+                or column.default is not None
+                or (column.primary_key and column.autoincrement in (True, "auto"))
             )
-            
-        # 2. Block unknown columns
-        if key not in db_columns:
+            if not column.nullable and not has_default:
+                required.append(column.name)
+        self.required = tuple(required)
+
+    def validate(self, payload: dict, is_update: bool = False) -> dict:
+        sanitized_data = {}
+        fields = self.fields
+        for key, value in payload.items():
+            field = fields.get(key)
+            if field is None:
+                # 1. Block known protected fields
+                if key.lower() in PROTECTED_FIELDS:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail=f"Security Violation: Property '{key}' is system-protected and cannot be modified."
+                    )
+                # 2. Block unknown columns
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Property '{key}' does not exist on this resource."
+                )
+            coerce, nullable = field
+            if value is None:
+                if not nullable:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Property '{key}' cannot be null."
+                    )
+                sanitized_data[key] = None
+            else:
+                sanitized_data[key] = coerce(value)
+
+        if not sanitized_data and not is_update:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Property '{key}' does not exist on this resource."
+                detail="Payload contains no valid fields."
             )
-            
-        sanitized_data[key] = value
-        
-    if not sanitized_data and not is_update:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Payload contains no valid fields."
-        )
-        
-    return sanitized_data
+        if not is_update:
+            for name in self.required:
+                if name not in sanitized_data:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Property '{name}' is required."
+                    )
+        return sanitized_data
+
+def get_validator(table: Table) -> CompiledValidator:
+    validator = table.info.get(_VALIDATOR_KEY)
+    if validator is None:
+        with _compile_lock:
+            validator = table.info.get(_VALIDATOR_KEY)
+            if validator is None:
+                validator = table.info[_VALIDATOR_KEY] = CompiledValidator(table)
+    return validator
+
+def sanitize_and_validate_payload(table_name: str, payload: dict, is_update: bool = False, bind=None):
+    """
+    Strict Column-Level Allow-listing.
+    Filters out any fields that are system-managed or protected.
+    REJECTS requests that attempt to write to protected fields, unknown
+    columns, and values that do not fit the column type, length or nullability.
+    """
+    return get_validator(get_reflected_table(table_name, bind=bind)).validate(payload, is_update)
+
+def sanitize_rows(table_name: str, rows: list, bind=None):
+    """
+    Bulk variant: validates every row and collects per-row errors instead of
+    failing the whole request. Returns ([(index, clean_row)], [error]).
+    """
+    validator = get_validator(get_reflected_table(table_name, bind=bind))
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"index": index, "detail": "Row must be a JSON object."})
+            continue
+        try:
+            valid.append((index, validator.validate(row)))
+        except HTTPException as e:
+            errors.append({"index": index, "detail": e.detail})
+    return valid, errors
@@ -1,28 +1,62 @@
 
-from fastapi import FastAPI, Depends
-from app.database import engine, Base
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from app.database import DB_MODE
 from app.auth import routes as auth_routes
-from app.auto_api import router as auto_api_routes
+from app.auto_api import router as sync_auto_api_routes
+from app.auto_api import async_router as async_auto_api_routes
+from app.admin import routes as admin_routes
+from app.realtime import routes as realtime_routes
+from app.realtime.feed import change_publisher
+from app.replicas import replica_router
 from app.middleware import OperationalMiddleware
+from app.metrics import METRICS_ENABLED, CONTENT_TYPE as METRICS_CONTENT_TYPE, authorized, metrics
+from app.request_log import request_log
+from app.auth.hashing import password_hasher
+from app.auto_api.audit import audit_sink
+from app.auto_api.ledger import audit_partitions
+from app.migrate import DB_AUTO_MIGRATE, migrate
+from app.startup import worker_startup
 
-# Register all models
-from app.tenants import models as tenant_models
-from app.auth import models as auth_models
-from app.auto_api import models as auto_models
-
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation is `python -m app.migrate`; importing the app does no DDL.
+    if DB_AUTO_MIGRATE:
+        await run_in_threadpool(migrate)
+    # One LISTEN connection per worker (REALTIME_BACKEND=postgres).
+    change_publisher.start()
+    replica_router.start()
+    # Registry + reflection warm-up runs in the background; /ready reports when it is done.
+    worker_startup.start()
+    # Keeps audit_logs partitions ahead of the clock (Postgres only).
+    audit_partitions.start()
+    yield
+    audit_partitions.stop()
+    worker_startup.stop()
+    password_hasher.shutdown()
+    change_publisher.stop()
+    replica_router.stop()
+    audit_sink.close()
+    request_log.stop()
 
 app = FastAPI(
     title="NovaBase API Engine",
     description="High-Performance Multi-Tenant BaaS Backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Operational & Safety Middleware (Registered first to wrap everything)
 app.add_middleware(OperationalMiddleware)
 
 app.include_router(auth_routes.router)
+# DB_MODE=async swaps in event-loop handlers on the async engine
+auto_api_routes = async_auto_api_routes if DB_MODE == "async" else sync_auto_api_routes
 app.include_router(auto_api_routes.router)
+app.include_router(admin_routes.router)
+app.include_router(realtime_routes.router)
 
 @app.get("/")
 async def root():
@@ -32,3 +66,19 @@ async def root():
         "readiness": "Public SaaS Ready",
         "reliability": "RLS + SRE Guardrails Active"
     }
+
+@app.get("/ready", include_in_schema=False)
+async def readiness():
+    """Readiness probe: 503 until this worker's schema warm-up has finished."""
+    startup = worker_startup.stats()
+    if not worker_startup.ready:
+        return JSONResponse(status_code=503, headers={"Retry-After": "1"}, content={"status": "warming", **startup})
+    return {"status": "ready", **startup}
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics(request: Request):
+        """Prometheus scrape target for this worker (see app.metrics)."""
+        if not authorized(request.headers.get("authorization", "")):
+            raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+        return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
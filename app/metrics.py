@@ -0,0 +1,247 @@
+import bisect
+import contextvars
+import hmac
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition (format 0.0.4) without a client library. Values are
+# per worker process like every other stats() in the app; Prometheus sums the
+# workers' series at query time.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Bearer token a scraper must send to GET /metrics. The output names tenants
+# and the pool/shard/replica topology, so with no token every scrape is refused
+# unless METRICS_ALLOW_ANONYMOUS=true (a private network the operator trusts).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOW_ANONYMOUS = os.getenv("METRICS_ALLOW_ANONYMOUS", "false").lower() == "true"
+# Tenants beyond this many distinct ids are counted under tenant="other".
+METRICS_MAX_TENANTS = int(os.getenv("METRICS_MAX_TENANTS", "100"))
+METRICS_LATENCY_BUCKETS = tuple(
+    float(b) for b in os.getenv(
+        "METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+    ).split(",")
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+UNMATCHED_ROUTE = "unmatched"
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+OTHER_TENANT = "other"
+
+# [query count, seconds] of the current request; the list is shared with the
+# threadpool handlers because run_in_threadpool copies the context.
+_request_db: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("novabase_request_db", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a bisect and two additions under a lock."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()):
+        index = bisect.bisect_left(self.buckets, value)  # first bucket with value <= le; len() = +Inf
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        names = self.labelnames + ("le",)
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}")
+            base = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+
+
+def _scraped(lines: List[str], name: str, help: str, samples: List[Tuple[dict, float]], kind: str = "gauge"):
+    """Series read from a component's stats() at scrape time."""
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+
+
+class MetricsRegistry:
+    """
+    Request, database and tenant metrics recorded by OperationalMiddleware and
+    the engine's cursor hooks (app.database), plus gauges collected from the
+    pools and caches when /metrics is scraped.
+    """
+
+    def __init__(self, max_tenants: int = METRICS_MAX_TENANTS):
+        self.max_tenants = max_tenants
+        self.request_duration = Histogram(
+            "novabase_http_request_duration_seconds", "HTTP request latency by route template and status.",
+            ("method", "route", "status"),
+        )
+        self.request_db_time = Histogram(
+            "novabase_http_request_db_seconds", "Time spent in database queries per HTTP request.",
+            ("method", "route"),
+        )
+        self.request_db_queries = Histogram(
+            "novabase_http_request_db_queries", "Database queries issued per HTTP request.",
+            ("method", "route"), QUERY_COUNT_BUCKETS,
+        )
+        self.query_duration = Histogram(
+            "novabase_db_query_duration_seconds", "Duration of every database query, including background work.",
+        )
+        self.tenant_requests = Counter(
+            "novabase_tenant_requests_total", "Authenticated requests per tenant; tenants past METRICS_MAX_TENANTS count as other.",
+            ("tenant",),
+        )
+        self.rate_limited = Counter("novabase_rate_limited_total", "Requests rejected by the rate limiter.", ("scope",))
+        self._tenants = set()
+        self._tenant_lock = threading.Lock()
+
+    # --- recording ---
+    def begin_request(self):
+        return _request_db.set([0, 0.0])
+
+    def end_request(self, token, scope: dict, status_code: int, elapsed: float, tenant_id: Optional[str]):
+        """Labels come from the matched route template, never the raw path, to keep cardinality bounded."""
+        queries, db_seconds = _request_db.get() or (0, 0.0)
+        _request_db.reset(token)
+        route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+        self.request_duration.observe(elapsed, (method, route, str(status_code)))
+        self.request_db_time.observe(db_seconds, (method, route))
+        self.request_db_queries.observe(queries, (method, route))
+        if tenant_id:
+            self.tenant_requests.inc((self._tenant_label(tenant_id),))
+
+    def _tenant_label(self, tenant_id: str) -> str:
+        if tenant_id in self._tenants:
+            return tenant_id
+        with self._tenant_lock:
+            if len(self._tenants) < self.max_tenants:
+                self._tenants.add(tenant_id)
+                return tenant_id
+        return OTHER_TENANT
+
+    def observe_query(self, seconds: float):
+        self.query_duration.observe(seconds)
+        current = _request_db.get()
+        if current is not None:
+            current[0] += 1
+            current[1] += seconds
+
+    # --- exposition ---
+    def _collect_gauges(self, lines: List[str]):
+        from app.database import pool_stats
+        from app.auth.token_cache import token_cache
+        from app.auto_api.response_cache import response_cache
+        from app.auto_api.statements import statement_cache
+        from app.middleware import RATE_LIMIT_STORE
+        from app.replicas import replica_router
+        from app.shards import shard_map
+        from app.startup import worker_startup
+
+        pools = [({"database": name}, pool_stats(shard.engine)) for name, shard in shard_map.shards.items()]
+        pools += [({"database": f"replica-{r.index}"}, pool_stats(r.engine)) for r in replica_router.replicas]
+        for key, name, help, kind in (
+            ("checked_out", "novabase_db_pool_checked_out", "Connections currently checked out.", "gauge"),
+            ("size", "novabase_db_pool_size", "Configured pool size.", "gauge"),
+            ("overflow", "novabase_db_pool_overflow", "Overflow connections currently open.", "gauge"),
+            ("checkouts", "novabase_db_pool_checkouts_total", "Connection checkouts.", "counter"),
+            ("timeouts", "novabase_db_pool_timeouts_total", "Checkouts that timed out waiting for a connection.", "counter"),
+        ):
+            _scraped(lines, name, help, [(labels, s[key]) for labels, s in pools if key in s], kind)
+
+        startup = worker_startup.stats()
+        _scraped(lines, "novabase_worker_ready", "1 once the schema warm-up has finished.", [({}, int(startup["ready"]))])
+        _scraped(lines, "novabase_worker_startup_seconds", "Seconds from worker start to each startup milestone.", [
+            ({"milestone": milestone}, startup[key])
+            for milestone, key in (("ready", "seconds_to_ready"), ("first_success", "seconds_to_first_success"))
+            if startup[key] is not None
+        ])
+
+        _scraped(lines, "novabase_rate_limit_keys", "Keys held by the rate-limit store.", [
+            ({"backend": type(RATE_LIMIT_STORE).__name__}, RATE_LIMIT_STORE.size()),
+        ])
+
+        caches = [({"cache": "schema", "database": name}, shard.schema_cache.stats()) for name, shard in shard_map.shards.items()]
+        caches += [
+            ({"cache": "statement", "database": ""}, statement_cache.stats()),
+            ({"cache": "response", "database": ""}, response_cache.stats()),
+            ({"cache": "token", "database": ""}, token_cache.stats()),
+        ]
+        _scraped(lines, "novabase_cache_hits_total", "Cache hits.", [(l, s["hits"]) for l, s in caches], "counter")
+        _scraped(lines, "novabase_cache_misses_total", "Cache misses.", [(l, s["misses"]) for l, s in caches], "counter")
+        _scraped(lines, "novabase_cache_hit_ratio", "Cache hit rate since start.", [(l, s["hit_rate"]) for l, s in caches])
+        _scraped(lines, "novabase_cache_entries", "Entries held by the cache.", [
+            (l, s["entries"] if "entries" in s else s["size"]) for l, s in caches
+        ])
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (
+            self.request_duration, self.request_db_time, self.request_db_queries,
+            self.query_duration, self.tenant_requests, self.rate_limited,
+        ):
+            metric.render(lines)
+        self._collect_gauges(lines)
+        lines.append("")
+        return "\n".join(lines)
+
+
+def authorized(authorization: str) -> bool:
+    if not METRICS_TOKEN:
+        return METRICS_ALLOW_ANONYMOUS
+    scheme, _, token = authorization.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+
+
+metrics = MetricsRegistry()
@@ -1,79 +1,165 @@
 import time
 import uuid
-import json
+import math
 import logging
-from fastapi import Request, Response, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+import os
+from jose import JWTError
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.responses import JSONResponse
-from typing import Callable, Dict
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+from app.auth.dependencies import decode_access_token, is_platform_admin
+from app.auth.schemas import TokenData
+from app.metrics import METRICS_ENABLED, metrics
+from app.profiler import PROFILER_HEADER, query_profiler
+from app.startup import worker_startup
+from app.ratelimit import TokenBucketLimiter, create_store
+from app.request_log import request_log
 
-# Configure Structured Logging
+# Configure Structured Logging (records are written off-loop, see app.request_log)
 logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("novabase.sre")
+logger = request_log.logger
 
-# In-memory rate limiter (In prod, use Redis)
-RATE_LIMIT_STORAGE: Dict[str, list] = {}
-RATE_LIMIT_WINDOW = 60 # seconds
-MAX_REQUESTS_PER_IP = 100
-MAX_REQUESTS_PER_TENANT = 500
+MAX_PAYLOAD_BYTES = 5 * 1024 * 1024
 
-class OperationalMiddleware(BaseHTTPMiddleware):
+SECURITY_HEADERS = [
+    (b"x-frame-options", b"DENY"),
+    (b"content-security-policy", b"default-src 'self'"),
+]
+
+# Token-bucket rate limiting (backend chosen by RATE_LIMIT_BACKEND, see app.ratelimit)
+RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60")) # seconds
+MAX_REQUESTS_PER_IP = int(os.getenv("MAX_REQUESTS_PER_IP", "100"))
+MAX_REQUESTS_PER_TENANT = int(os.getenv("MAX_REQUESTS_PER_TENANT", "500"))
+
+RATE_LIMIT_STORE = create_store()
+ip_limiter = TokenBucketLimiter("ip", MAX_REQUESTS_PER_IP, RATE_LIMIT_WINDOW, RATE_LIMIT_STORE)
+tenant_limiter = TokenBucketLimiter("tenant", MAX_REQUESTS_PER_TENANT, RATE_LIMIT_WINDOW, RATE_LIMIT_STORE)
+
+def _claims_from_headers(headers: Headers) -> Optional[TokenData]:
+    """
+    Claims of a *verified* bearer token; forged tokens must not be able
+    to drain another tenant's budget. Invalid tokens fall back to per-IP limits
+    and are rejected later by the auth dependency.
+    """
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_access_token(token)
+    except JWTError:
+        return None
+
+def _rate_limited(request_id: str, retry_after: float, scope: str):
+    retry_after = max(1, math.ceil(retry_after))
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "error": "Rate limit exceeded",
+            "scope": scope,
+            "request_id": request_id,
+            "retry_after": retry_after
+        }
+    )
+
+class OperationalMiddleware:
     """
     SaaS Operational Layer: Handles Request Tracing, Rate Limiting, and Safety.
+
+    Raw ASGI middleware: headers are added by rewriting the
+    'http.response.start' message, so there are no extra tasks or memory
+    streams per request and streaming bodies pass straight through.
     """
-    async def dispatch(self, request: Request, call_next: Callable):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         request_id = str(uuid.uuid4())
-        start_time = time.time()
-        client_ip = request.client.host if request.client else "unknown"
-        
-        # 1. Per-IP Rate Limiting
-        now = time.time()
-        ip_history = RATE_LIMIT_STORAGE.get(client_ip, [])
-        ip_history = [t for t in ip_history if now - t < RATE_LIMIT_WINDOW]
-        RATE_LIMIT_STORAGE[client_ip] = ip_history + [now]
-        
-        if len(ip_history) >= MAX_REQUESTS_PER_IP:
-            return JSONResponse(
-                status_code=429, 
-                content={
-                    "error": "Rate limit exceeded", 
-                    "request_id": request_id,
-                    "retry_after": RATE_LIMIT_WINDOW
-                }
-            )
+        start_time = time.perf_counter()
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        headers = Headers(scope=scope)
+        # Expose the trace id to handlers as request.state.request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        # 1. Per-IP and Per-Tenant Rate Limiting (O(1) token buckets)
+        allowed, retry_after = ip_limiter.hit(client_ip)
+        if not allowed:
+            metrics.rate_limited.inc(("ip",))
+            await _rate_limited(request_id, retry_after, "ip")(scope, receive, send)
+            return
+
+        claims = _claims_from_headers(headers)
+        tenant_id = claims.tenant_id if claims else None
+        if tenant_id:
+            allowed, retry_after = tenant_limiter.hit(tenant_id)
+            if not allowed:
+                metrics.rate_limited.inc(("tenant",))
+                await _rate_limited(request_id, retry_after, "tenant")(scope, receive, send)
+                return
 
         # 2. Safety: Payload Size Limit (5MB)
-        content_length = request.headers.get("content-length")
-        if content_length and int(content_length) > 5 * 1024 * 1024:
-            return JSONResponse(status_code=413, content={"error": "Payload too large"})
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_PAYLOAD_BYTES:
+            await JSONResponse(status_code=413, content={"error": "Payload too large"})(scope, receive, send)
+            return
+
+        status_code = 500
+        response_started = False
 
-        # 3. Process Request
+        async def send_with_telemetry(message: Message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                # 4. Telemetry Generation
+                process_time = (time.perf_counter() - start_time) * 1000
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append("X-Request-ID", request_id)
+                response_headers.append("X-Process-Time", f"{process_time:.2f}ms")
+                message["headers"].extend(SECURITY_HEADERS)
+                if profile is not None:
+                    message["headers"].extend(profile[0].summary_headers())
+            await send(message)
+
+        # 3. Process Request (DB queries made on its behalf are attributed to it, see app.metrics)
+        metrics_token = metrics.begin_request() if METRICS_ENABLED else None
+        profile = query_profiler.start(
+            request_id, scope, tenant_id,
+            forced=is_platform_admin(claims) and headers.get(PROFILER_HEADER) == "1",
+        )
         try:
-            response: Response = await call_next(request)
+            await self.app(scope, receive, send_with_telemetry)
         except Exception as e:
             logger.error(f"Unhandled Exception: {str(e)}", extra={"request_id": request_id})
-            return JSONResponse(
+            if response_started:
+                # Headers are already on the wire; nothing left to send.
+                return
+            await JSONResponse(
                 status_code=500, 
                 content={"error": "Internal platform error", "trace_id": request_id}
-            )
-        
-        # 4. Telemetry Generation
-        process_time = (time.time() - start_time) * 1000
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Process-Time"] = f"{process_time:.2f}ms"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        
-        # 5. Structured Log Entry
-        log_entry = {
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            "request_id": request_id,
-            "method": request.method,
-            "path": request.url.path,
-            "status": response.status_code,
-            "latency_ms": f"{process_time:.2f}",
-            "ip": client_ip,
-        }
-        logger.info(json.dumps(log_entry))
-        
-        return response
+            )(scope, receive, send_with_telemetry)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            if metrics_token is not None:
+                metrics.end_request(metrics_token, scope, status_code, elapsed, tenant_id)
+            if profile is not None:
+                query_profiler.finish(profile, scope, status_code, elapsed)
+            worker_startup.observe(scope["path"], status_code)
+
+        # 5. Structured Log Entry (sampled; encoded and written off the event loop)
+        if request_log.should_log(status_code):
+            logger.info({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "latency_ms": f"{(time.perf_counter() - start_time) * 1000:.2f}",
+                "ip": client_ip,
+            })
@@ -0,0 +1,98 @@
+"""
+Creates the platform tables (tenants, users, tables_meta, audit_logs, ...)
+on the primary database and the shard-local ones on every tenant shard,
+then the current and upcoming audit_logs partitions (see app.auto_api.ledger).
+
+    python -m app.migrate
+
+Run it once per deploy, before starting the workers: they issue no DDL
+themselves. For local development DB_AUTO_MIGRATE=true runs it in each
+worker's startup instead. Existing tables are not recreated; columns added
+since they were created are applied by the upgrade steps below.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import inspect, text
+from app.database import Base, engine
+from app.shards import shard_map
+
+# Register all models
+from app.tenants import models as tenant_models
+from app.auth import models as auth_models
+from app.auto_api import models as auto_models
+from app.auto_api.ledger import audit_partitions, ensure_indexes
+
+# Development convenience: run migrate() in each worker's lifespan startup.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() == "true"
+
+logger = logging.getLogger("novabase.migrate")
+
+
+def _add_refresh_token_tenant(conn) -> bool:
+    """
+    refresh_tokens.tenant_id (the workspace a session renews). Existing tokens
+    get the user's first membership, as refresh picked before the column
+    existed; tokens of users without any membership could never be renewed
+    and are dropped.
+    """
+    if "tenant_id" in {c["name"] for c in inspect(conn).get_columns("refresh_tokens")}:
+        return False
+    conn.execute(text("ALTER TABLE refresh_tokens ADD COLUMN tenant_id VARCHAR REFERENCES tenants(id)"))
+    conn.execute(text(
+        "UPDATE refresh_tokens SET tenant_id = ("
+        "SELECT m.tenant_id FROM memberships m WHERE m.user_id = refresh_tokens.user_id "
+        "ORDER BY m.created_at, m.id LIMIT 1)"
+    ))
+    conn.execute(text("DELETE FROM refresh_tokens WHERE tenant_id IS NULL"))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE refresh_tokens ALTER COLUMN tenant_id SET NOT NULL"))
+    return True
+
+
+# Applied in order to databases created by an older release.
+UPGRADES = [
+    ("refresh_tokens.tenant_id", _add_refresh_token_tenant),
+]
+
+
+def upgrade() -> list:
+    applied = []
+    with engine.begin() as conn:
+        for name, step in UPGRADES:
+            if step(conn):
+                logger.info(f"Applied upgrade {name}")
+                applied.append(name)
+    return applied
+
+
+def migrate() -> dict:
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    upgrades = upgrade()
+    shard_map.create_tables(Base.metadata)
+    for shard in shard_map.shards.values():
+        ensure_indexes(shard.engine)
+    report = {
+        "databases": sorted(shard_map.shards),
+        "tables": sorted(Base.metadata.tables),
+        "upgrades": upgrades,
+        "audit_partitions": audit_partitions.run_once(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Schema ready on {len(report['databases'])} database(s) in {report['seconds']}s")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print(json.dumps(migrate(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
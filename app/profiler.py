@@ -0,0 +1,179 @@
+import collections
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+from typing import List, Optional
+
+# Opt-in per-request SQL profiler. A request is profiled when a platform operator
+# token sends PROFILER_HEADER: 1, or at random with PROFILER_SAMPLE_RATE.
+PROFILER_HEADER = os.getenv("PROFILER_HEADER", "x-profile").lower()
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0.0"))
+# Profiled requests slower than this (or with repeated statements) are kept for /admin/profiles.
+PROFILER_SLOW_MS = float(os.getenv("PROFILER_SLOW_MS", "500"))
+PROFILER_RING_SIZE = int(os.getenv("PROFILER_RING_SIZE", "100"))
+# The same statement text this many times in one request is flagged as a likely N+1.
+PROFILER_REPEAT_THRESHOLD = int(os.getenv("PROFILER_REPEAT_THRESHOLD", "3"))
+PROFILER_MAX_STATEMENTS = int(os.getenv("PROFILER_MAX_STATEMENTS", "200"))
+PROFILER_STATEMENT_CHARS = int(os.getenv("PROFILER_STATEMENT_CHARS", "2000"))
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Frames in these files are the instrumentation itself, not a call site.
+_SKIP_FILES = {os.path.join(APP_DIR, "database.py"), os.path.join(APP_DIR, "profiler.py")}
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("novabase_profile", default=None)
+
+
+def _call_site() -> str:
+    """Innermost app frame that led to the statement, e.g. 'auto_api/engine.py:120 in read_rows'."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename not in _SKIP_FILES:
+            return f"{os.path.relpath(filename, APP_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    # e.g. asyncpg statements, which run in a greenlet without the caller's frames
+    return "?"
+
+
+class RequestProfile:
+    """Statements of one request, filled by the engine's cursor hooks."""
+
+    def __init__(self, request_id: str, method: str, path: str, tenant_id: Optional[str], forced: bool):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.tenant_id = tenant_id
+        self.forced = forced
+        self.started_at = time.time()
+        self.statements: List[dict] = []
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.truncated = 0
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float, rows: int, executemany: bool):
+        entry = {
+            "statement": statement[:PROFILER_STATEMENT_CHARS],
+            "duration_ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "executemany": executemany,
+            "call_site": _call_site(),
+        }
+        with self._lock:
+            self.query_count += 1
+            self.db_seconds += seconds
+            self._counts[statement] += 1
+            if len(self.statements) < PROFILER_MAX_STATEMENTS:
+                self.statements.append(entry)
+            else:
+                self.truncated += 1
+
+    def repeated(self) -> List[dict]:
+        with self._lock:
+            counts = list(self._counts.items())
+            statements = list(self.statements)
+        flagged = []
+        for statement, count in counts:
+            if count >= PROFILER_REPEAT_THRESHOLD:
+                sites = sorted({s["call_site"] for s in statements if s["statement"] == statement[:PROFILER_STATEMENT_CHARS]})
+                flagged.append({"statement": statement[:PROFILER_STATEMENT_CHARS], "count": count, "call_sites": sites})
+        return sorted(flagged, key=lambda f: -f["count"])
+
+    def summary_headers(self) -> list:
+        return [
+            (b"x-db-queries", str(self.query_count).encode()),
+            (b"x-db-time", f"{self.db_seconds * 1000:.2f}ms".encode()),
+        ]
+
+
+class QueryProfiler:
+    """
+    Decides which requests are profiled and keeps the interesting ones (slow
+    or N+1) in a bounded ring buffer for GET /admin/profiles.
+    """
+
+    def __init__(self, ring_size: int = PROFILER_RING_SIZE, sample_rate: float = PROFILER_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._ring = collections.deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self.profiled = 0
+        self.captured = 0
+        self.flagged = 0
+
+    def start(self, request_id: str, scope: dict, tenant_id: Optional[str], forced: bool):
+        """Begins profiling the current request (returns a token for finish()), or returns None."""
+        if not forced and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return None
+        profile = RequestProfile(request_id, scope["method"], scope["path"], tenant_id, forced)
+        return profile, _current.set(profile)
+
+    def finish(self, started, scope: dict, status_code: int, elapsed: float) -> RequestProfile:
+        profile, token = started
+        _current.reset(token)
+        repeated = profile.repeated()
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            self.profiled += 1
+            self.flagged += bool(repeated)
+        if not (profile.forced or repeated or elapsed_ms >= PROFILER_SLOW_MS):
+            return profile
+        entry = {
+            "request_id": profile.request_id,
+            "method": profile.method,
+            "path": profile.path,
+            "route": getattr(scope.get("route"), "path", None),
+            "status": status_code,
+            "tenant_id": profile.tenant_id,
+            "started_at": profile.started_at,
+            "duration_ms": round(elapsed_ms, 3),
+            "slow": elapsed_ms >= PROFILER_SLOW_MS,
+            "db_queries": profile.query_count,
+            "db_time_ms": round(profile.db_seconds * 1000, 3),
+            "repeated_statements": repeated,
+            "statements": profile.statements,
+            "truncated_statements": profile.truncated,
+        }
+        with self._lock:
+            self.captured += 1
+            self._ring.append(entry)
+        return profile
+
+    def record(self, statement: str, seconds: float, rows: int, executemany: bool):
+        profile = _current.get()
+        if profile is not None:
+            profile.record(statement, seconds, rows, executemany)
+
+    def entries(self, tenant_id: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """Newest first; restricted to one tenant when tenant_id is given."""
+        with self._lock:
+            ring = list(self._ring)
+        matching = [e for e in reversed(ring) if tenant_id is None or e["tenant_id"] == tenant_id]
+        return matching[:limit]
+
+    def find(self, request_id: str, tenant_id: Optional[str] = None) -> Optional[dict]:
+        with self._lock:
+            ring = list(self._ring)
+        for entry in ring:
+            if entry["request_id"] == request_id and (tenant_id is None or entry["tenant_id"] == tenant_id):
+                return entry
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "slow_ms": PROFILER_SLOW_MS,
+                "repeat_threshold": PROFILER_REPEAT_THRESHOLD,
+                "ring_size": self._ring.maxlen,
+                "buffered": len(self._ring),
+                "profiled": self.profiled,
+                "captured": self.captured,
+                "flagged_repeats": self.flagged,
+            }
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,175 @@
+import fcntl
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+# Storage backend: "memory" (per worker) or "shm" (shared by every worker on the host)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_SHM_NAME = os.getenv("RATE_LIMIT_SHM_NAME", "novabase_ratelimit")
+RATE_LIMIT_SHM_SLOTS = int(os.getenv("RATE_LIMIT_SHM_SLOTS", "65536"))
+RATE_LIMIT_SHM_PROBE = int(os.getenv("RATE_LIMIT_SHM_PROBE", "8"))  # slots searched per key
+
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """
+    Per-process token buckets in an LRU-ordered dict.
+
+    Every operation is O(1). A bucket idle for longer than a full refill is
+    indistinguishable from a fresh one, so it is evicted from the cold end;
+    RATE_LIMIT_MAX_KEYS is a hard ceiling against scanning traffic.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()  # key -> [tokens, updated, idle_after]
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens = _refill(bucket[0], bucket[1], now, capacity, rate)
+                self._buckets.move_to_end(key)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = [tokens, now, now + (capacity - tokens) / rate]
+
+            # Amortised O(1): drop at most a couple of idle/overflow keys per call.
+            for _ in range(2):
+                oldest_key, oldest = next(iter(self._buckets.items()))
+                if oldest_key == key or (oldest[2] > now and len(self._buckets) <= self.max_keys):
+                    break
+                self._buckets.popitem(last=False)
+
+            retry_after = 0.0 if allowed else (1 - tokens) / rate
+            return allowed, retry_after
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class SharedMemoryBucketStore:
+    """
+    Fixed-size open-addressing table of buckets in POSIX shared memory, so
+    every uvicorn worker on the host enforces one budget. Each slot stores a
+    64-bit fingerprint of its key; a key lives in the first matching slot of
+    the RATE_LIMIT_SHM_PROBE slots after its hash. Another key never takes
+    over a slot whose bucket is still refilling, because that would hand the
+    owner a full budget. It only reuses empty or fully refilled slots. When
+    every slot in the window is busy with other keys, the request is refused
+    (fail closed) until one goes idle. Memory is bounded by construction.
+    Cross-process exclusion uses a flock on a sidecar lock file.
+    """
+
+    _SLOT = struct.Struct("=Qddd")  # key fingerprint, tokens, updated, idle_after
+
+    def __init__(self, name: str = RATE_LIMIT_SHM_NAME, slots: int = RATE_LIMIT_SHM_SLOTS, probe: int = RATE_LIMIT_SHM_PROBE):
+        from multiprocessing import shared_memory, resource_tracker
+
+        self.slots = slots
+        self.probe = max(1, min(probe, slots))
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if self._shm.size < size:
+                raise ValueError(
+                    f"Shared memory segment '{name}' has an older layout; unlink /dev/shm/{name} and restart."
+                )
+        # The segment outlives any single worker; don't let its exit unlink it.
+        try:
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        except Exception:
+            pass
+        self._lock_file = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a+")
+        self._thread_lock = threading.Lock()
+        self.saturated = 0
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def _find(self, key_hash: int, now: float):
+        """-> (offset, tokens, updated) of the key's slot or a reusable one, or (None, None, earliest_idle)."""
+        home = key_hash % self.slots
+        reusable = None
+        earliest_idle = None
+        for i in range(self.probe):
+            offset = ((home + i) % self.slots) * self._SLOT.size
+            stored_hash, tokens, updated, idle_after = self._SLOT.unpack_from(self._shm.buf, offset)
+            if stored_hash == key_hash:
+                return offset, tokens, updated
+            if stored_hash == 0 or idle_after <= now:
+                if reusable is None:
+                    reusable = offset
+            elif earliest_idle is None or idle_after < earliest_idle:
+                earliest_idle = idle_after
+        if reusable is not None:
+            return reusable, None, None
+        return None, None, earliest_idle
+
+    def take(self, key: str, capacity: float, rate: float, now: float) -> Tuple[bool, float]:
+        key_hash = self._hash(key)
+        # Wall clock: monotonic clocks are not comparable across processes.
+        now = time.time()
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                offset, tokens, updated = self._find(key_hash, now)
+                if offset is None:
+                    self.saturated += 1
+                    return False, max(updated - now, 1 / rate)
+                tokens = capacity if tokens is None else _refill(tokens, updated, now, capacity, rate)
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                self._SLOT.pack_into(self._shm.buf, offset, key_hash, tokens, now, now + (capacity - tokens) / rate)
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def size(self) -> int:
+        return self.slots
+
+
+STORES = {
+    "memory": MemoryBucketStore,
+    "shm": SharedMemoryBucketStore,
+}
+
+
+class TokenBucketLimiter:
+    """
+    Allows `limit` requests per `window` seconds per key with bursts up to `limit`.
+    """
+
+    def __init__(self, scope: str, limit: int, window: float, store):
+        self.scope = scope
+        self.capacity = float(limit)
+        self.rate = limit / window
+        self.store = store
+
+    def hit(self, key: str) -> Tuple[bool, float]:
+        """Consumes one token. Returns (allowed, retry_after_seconds)."""
+        return self.store.take(f"{self.scope}:{key}", self.capacity, self.rate, time.monotonic())
+
+
+def create_store(backend: str = RATE_LIMIT_BACKEND):
+    if backend not in STORES:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}'. Use one of: {', '.join(STORES)}.")
+    return STORES[backend]()
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import select
+import threading
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app.database import DATABASE_URL, DATABASE_SHARD_URLS
+
+# Change-feed transport: "postgres" (NOTIFY on commit, one LISTEN connection per
+# worker, fan-out across every worker) or "memory" (in-process, single worker/tests)
+REALTIME_BACKEND = os.getenv(
+    "REALTIME_BACKEND",
+    "postgres" if make_url(DATABASE_URL).get_backend_name() == "postgresql" else "memory"
+)
+REALTIME_CHANNEL = os.getenv("REALTIME_CHANNEL", "novabase_changes")
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "256"))  # per subscriber
+REALTIME_HEARTBEAT_SECONDS = float(os.getenv("REALTIME_HEARTBEAT_SECONDS", "15"))
+REALTIME_REPLAY_MAX = int(os.getenv("REALTIME_REPLAY_MAX", "1000"))
+
+# NOTIFY payloads must stay below 8000 bytes; events are packed into JSON arrays under this.
+NOTIFY_PAYLOAD_LIMIT = 7500
+
+logger = logging.getLogger("novabase.realtime")
+
+_PENDING_KEY = "novabase_pending_changes"
+
+
+def change_event(entry: dict) -> dict:
+    """Compact event for one audited mutation; its id is the audit log id."""
+    timestamp = entry.get("timestamp") or datetime.now(timezone.utc)
+    return {
+        "id": entry["id"],
+        "tenant_id": entry["tenant_id"],
+        "table": entry["table_name"],
+        "op": entry["action"],
+        "record_id": entry["record_id"],
+        "ts": timestamp.isoformat(),
+    }
+
+
+class Subscription:
+    __slots__ = ("tenant_id", "tables", "queue", "dropped")
+
+    def __init__(self, tenant_id: str, tables: Optional[FrozenSet[str]], queue_size: int):
+        self.tenant_id = tenant_id
+        self.tables = tables
+        self.queue: "asyncio.Queue[Optional[dict]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """
+        Next event, or None on heartbeat timeout. Raises LookupError once the
+        subscriber has been dropped for falling behind.
+        """
+        try:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if item is None:
+            raise LookupError("Subscriber dropped")
+        return item
+
+
+class ChangeHub:
+    """
+    Per-worker fan-out of change events to subscribed clients, indexed by tenant.
+
+    Runs on the event loop. Publishers on other threads hand events over with
+    publish(), which schedules the dispatch on the loop. Every subscriber has a
+    bounded queue; one that falls REALTIME_QUEUE_SIZE events behind is dropped
+    (and told so) instead of buffering without limit. It resumes with its last
+    event id, replayed from audit_logs.
+    """
+
+    def __init__(self, queue_size: int = REALTIME_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, tenant_id: str, tables: Optional[FrozenSet[str]] = None) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(tenant_id, tables, self.queue_size)
+        self._subscribers.setdefault(tenant_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.tenant_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.tenant_id]
+
+    def publish(self, events: List[dict]):
+        """Thread-safe entry point for publishers and the LISTEN thread."""
+        loop = self._loop
+        if loop is None or not self._subscribers or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.dispatch, events)
+
+    def dispatch(self, events: List[dict]):
+        for change in events:
+            for subscription in list(self._subscribers.get(change["tenant_id"], ())):
+                if subscription.dropped:
+                    continue
+                if subscription.tables is not None and change["table"] not in subscription.tables:
+                    continue
+                try:
+                    subscription.queue.put_nowait(change)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        subscription.dropped = True
+        self.dropped += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "queue_size": self.queue_size,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+change_hub = ChangeHub()
+
+
+class MemoryChangePublisher:
+    """In-process publisher: committed changes go straight to this worker's hub."""
+
+    backend = "memory"
+
+    def __init__(self, hub: ChangeHub = change_hub):
+        self.hub = hub
+        self.published = 0
+
+    def before_commit(self, session: Session, events: List[dict]):
+        pass
+
+    def after_commit(self, events: List[dict]):
+        self.published += len(events)
+        self.hub.publish(events)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "published": self.published}
+
+
+class PostgresChangePublisher:
+    """
+    Publishes through NOTIFY inside the committing transaction, so listeners
+    only ever see committed changes. Each worker keeps one dedicated LISTEN
+    connection per database (a daemon thread, reconnecting with backoff) that
+    feeds its hub; with tenant shards, NOTIFY fires on the tenant's shard.
+    """
+
+    backend = "postgres"
+
+    def __init__(self, hub: ChangeHub = change_hub, channel: str = REALTIME_CHANNEL, urls: List[str] = None):
+        if not re.fullmatch(r"[a-z_][a-z0-9_]*", channel):
+            raise ValueError(f"Invalid REALTIME_CHANNEL '{channel}'.")
+        self.hub = hub
+        self.channel = channel
+        # libpq URIs for psycopg2 (strips any "+driver" suffix)
+        self.dsns = [
+            make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+            for url in (urls or [DATABASE_URL, *DATABASE_SHARD_URLS.values()])
+        ]
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+
+    @staticmethod
+    def _payloads(events: List[dict]) -> List[str]:
+        payloads, chunk, size = [], [], 2
+        for change in events:
+            encoded = json.dumps(change, separators=(",", ":"))
+            if chunk and size + len(encoded) + 1 > NOTIFY_PAYLOAD_LIMIT:
+                payloads.append("[" + ",".join(chunk) + "]")
+                chunk, size = [], 2
+            chunk.append(encoded)
+            size += len(encoded) + 1
+        if chunk:
+            payloads.append("[" + ",".join(chunk) + "]")
+        return payloads
+
+    def before_commit(self, session: Session, events: List[dict]):
+        payloads = self._payloads(events)
+        calls = ", ".join(f"pg_notify(:channel, :p{i})" for i in range(len(payloads)))
+        params = {f"p{i}": payload for i, payload in enumerate(payloads)}
+        session.execute(text(f"SELECT {calls}"), {"channel": self.channel, **params})
+        self.published += len(events)
+
+    def after_commit(self, events: List[dict]):
+        pass
+
+    def start(self):
+        if not self._threads:
+            self._stop.clear()
+            for index, dsn in enumerate(self.dsns):
+                thread = threading.Thread(target=self._listen, args=(dsn,), name=f"realtime-listener-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _listen(self, dsn: str):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f"LISTEN {self.channel}")
+                backoff = 1.0
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    events = []
+                    while conn.notifies:
+                        events.extend(json.loads(conn.notifies.pop(0).payload))
+                    if events:
+                        self.received += len(events)
+                        self.hub.publish(events)
+            except Exception as e:
+                self.reconnects += 1
+                logger.warning(f"Change-feed listener disconnected, retrying in {backoff:.0f}s: {str(e)}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "channel": self.channel,
+            "listening": sum(thread.is_alive() for thread in self._threads),
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+        }
+
+
+PUBLISHERS = {
+    "memory": MemoryChangePublisher,
+    "postgres": PostgresChangePublisher,
+}
+
+
+def create_publisher(backend: str = REALTIME_BACKEND):
+    if backend not in PUBLISHERS:
+        raise ValueError(f"Unknown REALTIME_BACKEND '{backend}'. Use one of: {', '.join(PUBLISHERS)}.")
+    return PUBLISHERS[backend]()
+
+
+change_publisher = create_publisher()
+
+
+def record_changes(db: Session, entries: list):
+    """Queues change events for audited mutations; they are published only if the transaction commits."""
+    db.info.setdefault(_PENDING_KEY, []).extend(change_event(entry) for entry in entries)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_pending_changes(session: Session):
+    pending = session.info.get(_PENDING_KEY)
+    if pending:
+        change_publisher.before_commit(session, pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_changes(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        change_publisher.after_commit(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_changes(session: Session, previous_transaction):
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
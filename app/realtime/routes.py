@@ -0,0 +1,192 @@
+import asyncio
+import json
+from typing import FrozenSet, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from jose import JWTError
+from sqlalchemy import select
+from app.database import set_db_tenant_context
+from app.auth.dependencies import decode_access_token
+from app.auth.schemas import TokenData
+from app.auto_api.models import AuditLog
+from app.replicas import replica_router
+from app.shards import shard_map
+from app.realtime.feed import change_hub, REALTIME_HEARTBEAT_SECONDS, REALTIME_REPLAY_MAX
+
+router = APIRouter(prefix="/realtime", tags=["Realtime"])
+
+# EventSource and browser WebSockets cannot send an Authorization header, so the
+# bearer token may also be passed as ?access_token=.
+
+def _authenticate(authorization: Optional[str], access_token: Optional[str]) -> TokenData:
+    token = access_token
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    try:
+        return decode_access_token(token)
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+def _parse_tables(tables: Optional[str]) -> Optional[FrozenSet[str]]:
+    names = frozenset(n.strip() for n in tables.split(",") if n.strip()) if tables else None
+    return names or None
+
+def _prepare(context: TokenData, names: Optional[FrozenSet[str]], last_event_id: Optional[str]):
+    """
+    Checks the requested tables against the registry allow-list and loads the
+    events missed since `last_event_id` from audit_logs (oldest first).
+    Returns (replayed events, reset) where reset means the id is unknown or
+    too old and the client should refetch instead.
+    """
+    db = replica_router.session_factory_for(context.tenant_id)()
+    try:
+        registry = shard_map.for_session(db).table_registry
+        for name in names or ():
+            if not registry.is_registered(db, name):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endpoint not found.")
+        if not last_event_id:
+            return [], False
+
+        set_db_tenant_context(db, context.tenant_id, context.user_id)
+        anchor = select(AuditLog.timestamp).where(
+            AuditLog.id == last_event_id, AuditLog.tenant_id == context.tenant_id
+        ).scalar_subquery()
+        if db.execute(select(anchor)).scalar() is None:
+            return [], True
+        query = select(AuditLog).where(
+            AuditLog.tenant_id == context.tenant_id,
+            AuditLog.timestamp >= anchor,  # >=: same-timestamp events may repeat; clients dedupe by id
+            AuditLog.id != last_event_id,
+        )
+        if names is not None:
+            query = query.where(AuditLog.table_name.in_(names))
+        rows = db.execute(
+            query.order_by(AuditLog.timestamp, AuditLog.id).limit(REALTIME_REPLAY_MAX + 1)
+        ).scalars().all()
+        if len(rows) > REALTIME_REPLAY_MAX:
+            return [], True
+        return [
+            {
+                "id": row.id,
+                "tenant_id": row.tenant_id,
+                "table": row.table_name,
+                "op": row.action,
+                "record_id": row.record_id,
+                "ts": row.timestamp.isoformat() if row.timestamp else None,
+            }
+            for row in rows
+        ], False
+    finally:
+        db.close()
+
+def _client_event(change: dict) -> dict:
+    return {k: v for k, v in change.items() if k != "tenant_id"}
+
+def _sse(change: dict) -> str:
+    return f"id: {change['id']}\nevent: change\ndata: {json.dumps(_client_event(change))}\n\n"
+
+@router.get("/changes")
+async def stream_changes(
+    request: Request,
+    tables: Optional[str] = None,
+    access_token: Optional[str] = None,
+    last_event_id: Optional[str] = Query(None, description="Resume point; the Last-Event-ID header takes precedence."),
+):
+    """
+    Server-Sent Events feed of committed changes in the caller's tenant,
+    optionally limited to ?tables=a,b. Reconnecting with Last-Event-ID
+    replays what was missed; an `event: reset` asks the client to refetch.
+    """
+    context = _authenticate(request.headers.get("authorization"), access_token)
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    # Subscribe before replaying so nothing committed in between is lost.
+    names = _parse_tables(tables)
+    subscription = change_hub.subscribe(context.tenant_id, names)
+    try:
+        replay, reset = await run_in_threadpool(_prepare, context, names, resume_from)
+    except BaseException:
+        change_hub.unsubscribe(subscription)
+        raise
+
+    async def events():
+        try:
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for change in replay:
+                yield _sse(change)
+            while True:
+                try:
+                    change = await subscription.next(REALTIME_HEARTBEAT_SECONDS)
+                except LookupError:
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                yield _sse(change) if change is not None else ": ping\n\n"
+        finally:
+            change_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def websocket_changes(
+    websocket: WebSocket,
+    tables: Optional[str] = None,
+    access_token: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+):
+    """WebSocket variant of /realtime/changes: one JSON message per event."""
+    try:
+        context = _authenticate(websocket.headers.get("authorization"), access_token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    names = _parse_tables(tables)
+    subscription = change_hub.subscribe(context.tenant_id, names)
+    try:
+        try:
+            replay, reset = await run_in_threadpool(_prepare, context, names, last_event_id)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        await websocket.accept()
+        sender = asyncio.create_task(_send_changes(websocket, subscription, replay, reset))
+        # Client messages are ignored; reading them is how a disconnect is noticed.
+        receiver = asyncio.create_task(_drain_client(websocket))
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if not task.cancelled() and not isinstance(task.exception(), (WebSocketDisconnect, type(None))):
+                raise task.exception()
+    finally:
+        change_hub.unsubscribe(subscription)
+
+async def _drain_client(websocket: WebSocket):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+async def _send_changes(websocket: WebSocket, subscription, replay: list, reset: bool):
+    if reset:
+        await websocket.send_json({"event": "reset"})
+    for change in replay:
+        await websocket.send_json({"event": "change", **_client_event(change)})
+    while True:
+        try:
+            change = await subscription.next(REALTIME_HEARTBEAT_SECONDS)
+        except LookupError:
+            # Fell too far behind: reconnect with the last received id.
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        if change is None:
+            await websocket.send_json({"event": "ping"})
+        else:
+            await websocket.send_json({"event": "change", **_client_event(change)})
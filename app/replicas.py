@@ -0,0 +1,359 @@
+import fcntl
+import hashlib
+import itertools
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from app.database import (
+    SessionLocal,
+    AsyncSessionLocal,
+    async_url,
+    engine_options,
+)
+from app.auth.dependencies import get_current_tenant_context
+from app.auth.schemas import TokenData
+from app.shards import shard_map
+
+# Comma-separated replica URLs; empty = every read goes to the primary
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+# Read-your-writes: a tenant's reads stay on the primary this long after its last write...
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# ...or, with "lsn", only until the replica has replayed past the write's WAL position.
+REPLICA_STICKY_MODE = os.getenv("REPLICA_STICKY_MODE", "window")  # "window" | "lsn"
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "2"))  # seconds
+# Replicas lagging more than this leave rotation; keep it <= REPLICA_STICKY_SECONDS.
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# Write tracker: "memory" (per worker) or "shm" (shared by every worker on the host).
+# Shared by default: response-cache versions are, so a worker that missed
+# another's write would read a lagging replica and cache it as current.
+REPLICA_TRACKER_BACKEND = os.getenv("REPLICA_TRACKER_BACKEND", "shm" if DATABASE_REPLICA_URLS else "memory")
+REPLICA_TRACKER_SHM_NAME = os.getenv("REPLICA_TRACKER_SHM_NAME", "novabase_tenant_writes")
+REPLICA_TRACKER_SHM_SLOTS = int(os.getenv("REPLICA_TRACKER_SHM_SLOTS", "65536"))
+
+logger = logging.getLogger("novabase.replicas")
+
+_WRITTEN_KEY = "novabase_written_tenants"
+_CONNECTION_KEY = "novabase_primary_connection"
+
+# Hot-standby health probe: replay position and lag (0 when fully caught up,
+# so an idle primary does not look like a lagging replica).
+_PG_HEALTH_SQL = text(
+    "SELECT pg_last_wal_replay_lsn()::text, "
+    "CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def parse_lsn(lsn: Optional[str]) -> int:
+    """'16/B374D848' -> comparable integer (0 when unknown)."""
+    if not lsn:
+        return 0
+    high, _, low = lsn.partition("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+class MemoryWriteTracker:
+    """Per-process record of each tenant's last write: (wall time, WAL position)."""
+
+    def __init__(self):
+        self._writes: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def note(self, tenant_id: str, at: float, lsn: int):
+        with self._lock:
+            self._writes[tenant_id] = (at, lsn)
+            # Entries older than the window carry no information any more.
+            if len(self._writes) > 10000:
+                cutoff = at - REPLICA_STICKY_SECONDS
+                for stale in [t for t, (w, _) in self._writes.items() if w < cutoff]:
+                    del self._writes[stale]
+
+    def last(self, tenant_id: str) -> tuple:
+        return self._writes.get(tenant_id, (0.0, 0))
+
+
+class SharedMemoryWriteTracker:
+    """
+    Last-write table in POSIX shared memory so a write on one worker pins the
+    tenant's reads to the primary on every worker. Colliding tenants share a
+    slot, which only makes them sticky together.
+    """
+
+    _SLOT = struct.Struct("=dQ")  # wall time, lsn
+
+    def __init__(self, name: str = REPLICA_TRACKER_SHM_NAME, slots: int = REPLICA_TRACKER_SHM_SLOTS):
+        from multiprocessing import shared_memory, resource_tracker
+
+        self.slots = slots
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        # The segment outlives any single worker; don't let its exit unlink it.
+        try:
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        except Exception:
+            pass
+        self._lock_file = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a+")
+        self._thread_lock = threading.Lock()
+
+    def _offset(self, tenant_id: str) -> int:
+        slot = int.from_bytes(hashlib.blake2b(tenant_id.encode(), digest_size=8).digest(), "little") % self.slots
+        return slot * self._SLOT.size
+
+    def note(self, tenant_id: str, at: float, lsn: int):
+        offset = self._offset(tenant_id)
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                prev_at, prev_lsn = self._SLOT.unpack_from(self._shm.buf, offset)
+                self._SLOT.pack_into(self._shm.buf, offset, max(at, prev_at), max(lsn, prev_lsn))
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def last(self, tenant_id: str) -> tuple:
+        return self._SLOT.unpack_from(self._shm.buf, self._offset(tenant_id))
+
+
+TRACKERS = {
+    "memory": MemoryWriteTracker,
+    "shm": SharedMemoryWriteTracker,
+}
+
+
+class Replica:
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.url = url
+        self.engine = create_engine(url, **engine_options(url))
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.is_postgres = make_url(url).get_backend_name() == "postgresql"
+        self.healthy = True
+        self.replay_lsn = 0
+        self.lag_seconds = 0.0
+        self.failures = 0
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def host(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                if self.is_postgres:
+                    lsn, lag = conn.execute(_PG_HEALTH_SQL).one()
+                    self.replay_lsn = parse_lsn(lsn)
+                    self.lag_seconds = float(lag or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+            self.healthy = self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+            self.last_error = None if self.healthy else f"lag {self.lag_seconds:.1f}s"
+            if self.healthy:
+                self.failures = 0
+        except Exception as e:
+            self.healthy = False
+            self.failures += 1
+            self.last_error = str(e).splitlines()[0] if str(e) else type(e).__name__
+        self.checked_at = time.time()
+
+
+class ReplicaRouter:
+    """
+    Picks the database for a tenant's read-only request.
+
+    Writes always use the primary. Reads rotate over healthy replicas unless
+    the tenant wrote within REPLICA_STICKY_SECONDS (read-your-writes). In "lsn"
+    mode the tenant is released early once the chosen replica has replayed
+    past the WAL position captured after the write's commit. A background
+    thread probes every replica each REPLICA_HEALTH_INTERVAL and takes
+    unreachable or lagging ones out of rotation until they recover.
+    """
+
+    def __init__(self, urls: List[str] = DATABASE_REPLICA_URLS, tracker_backend: str = REPLICA_TRACKER_BACKEND):
+        if tracker_backend not in TRACKERS:
+            raise ValueError(f"Unknown REPLICA_TRACKER_BACKEND '{tracker_backend}'. Use one of: {', '.join(TRACKERS)}.")
+        self.replicas = [Replica(i, url) for i, url in enumerate(urls)]
+        self.tracker = TRACKERS[tracker_backend]() if self.replicas else MemoryWriteTracker()
+        self._rotation = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._async_factories: Dict[int, Callable] = {}
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self.sticky_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # --- write side ---
+    def note_write(self, tenant_id: str, lsn: int = 0):
+        self.tracker.note(tenant_id, time.time(), lsn)
+
+    # --- read side ---
+    def choose(self, tenant_id: str) -> Optional[Replica]:
+        """The replica to read from, or None for the primary."""
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            self.primary_reads += 1
+            return None
+        replica = healthy[next(self._rotation) % len(healthy)]
+        written_at, lsn = self.tracker.last(tenant_id)
+        if time.time() - written_at < REPLICA_STICKY_SECONDS:
+            caught_up = REPLICA_STICKY_MODE == "lsn" and lsn and replica.replay_lsn >= lsn
+            if not caught_up:
+                self.sticky_reads += 1
+                self.primary_reads += 1
+                return None
+        self.replica_reads += 1
+        return replica
+
+    def session_factory_for(self, tenant_id: str) -> Callable[[], Session]:
+        # Replicas belong to the primary; tenants on other shards read from their shard.
+        shard = shard_map.shard_for_tenant(tenant_id)
+        if shard is not shard_map.primary:
+            return shard.session_factory
+        replica = self.choose(tenant_id)
+        return replica.session_factory if replica else SessionLocal
+
+    def async_session_factory_for(self, tenant_id: str) -> Callable:
+        shard = shard_map.shard_for_tenant(tenant_id)
+        if shard is not shard_map.primary:
+            return shard.async_session_factory()
+        replica = self.choose(tenant_id)
+        if replica is None:
+            return AsyncSessionLocal
+        factory = self._async_factories.get(replica.index)
+        if factory is None:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            url = async_url(replica.url)
+            async_engine = create_async_engine(url, **engine_options(url, async_driver=True))
+            factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+            self._async_factories[replica.index] = factory
+        return factory
+
+    # --- health checks ---
+    def check_all(self):
+        for replica in self.replicas:
+            was_healthy = replica.healthy
+            replica.check()
+            if was_healthy and not replica.healthy:
+                logger.warning(f"Replica {replica.host} removed from rotation: {replica.last_error}")
+            elif replica.healthy and not was_healthy:
+                logger.warning(f"Replica {replica.host} back in rotation")
+
+    def _run(self):
+        while not self._stop.wait(REPLICA_HEALTH_INTERVAL):
+            self.check_all()
+
+    def start(self):
+        if self.replicas and self._thread is None:
+            self._stop.clear()
+            self.check_all()
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sticky_mode": REPLICA_STICKY_MODE,
+            "sticky_seconds": REPLICA_STICKY_SECONDS,
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+            "sticky_reads": self.sticky_reads,
+            "replicas": [
+                {
+                    "host": r.host,
+                    "healthy": r.healthy,
+                    "lag_seconds": round(r.lag_seconds, 3),
+                    "replay_lsn": r.replay_lsn,
+                    "failures": r.failures,
+                    "last_error": r.last_error,
+                }
+                for r in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+def mark_tenant_write(db: Session, tenant_id: str):
+    """Flags the session's transaction as a write for read-your-writes routing."""
+    if replica_router.enabled:
+        db.info.setdefault(_WRITTEN_KEY, set()).add(tenant_id)
+
+
+@event.listens_for(Session, "after_begin")
+def _remember_connection(session: Session, transaction, connection):
+    if REPLICA_STICKY_MODE == "lsn" and replica_router.enabled and connection.dialect.name == "postgresql":
+        session.info[_CONNECTION_KEY] = connection
+
+
+@event.listens_for(Session, "after_commit")
+def _note_tenant_writes(session: Session):
+    connection = session.info.pop(_CONNECTION_KEY, None)
+    tenants = session.info.pop(_WRITTEN_KEY, None)
+    if not tenants:
+        return
+    lsn = 0
+    if connection is not None and not connection.closed:
+        # The session releases its connection only after this hook, so the
+        # position is read on the connection that just committed: one extra
+        # statement, no second checkout, and it is at or past the commit
+        # record. (Async sessions run their hooks inside run_sync's greenlet.)
+        try:
+            lsn = parse_lsn(connection.exec_driver_sql("SELECT pg_current_wal_lsn()::text").scalar())
+        except Exception as e:
+            logger.warning(f"Could not read primary WAL position: {str(e)}")
+    for tenant_id in tenants:
+        replica_router.note_write(tenant_id, lsn)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_tenant_writes(session: Session, previous_transaction):
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_WRITTEN_KEY, None)
+        session.info.pop(_CONNECTION_KEY, None)
+
+
+def get_read_db(context: TokenData = Depends(get_current_tenant_context)):
+    """
+    Request Session for read-only routes: a healthy replica unless the tenant
+    has just written (then the primary, see ReplicaRouter). Tenants placed on
+    another shard read from that shard.
+    """
+    db = replica_router.session_factory_for(context.tenant_id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(context: TokenData = Depends(get_current_tenant_context)):
+    if shard_map.enabled:
+        # A placement miss reads the catalog through the sync driver; keep it off the loop.
+        factory = await run_in_threadpool(replica_router.async_session_factory_for, context.tenant_id)
+    else:
+        factory = replica_router.async_session_factory_for(context.tenant_id)
+    async with factory() as db:
+        yield db
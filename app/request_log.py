@@ -0,0 +1,81 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Structured request log pipeline: the event loop only enqueues a dict,
+# JSON encoding and stream/disk I/O happen on the QueueListener thread.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # fraction of non-error requests logged
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
+class JsonFormatter(logging.Formatter):
+    """Encodes dict messages as one JSON line; plain messages pass through."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            return json.dumps(record.msg)
+        return super().format(record)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that skips formatting in the caller: the stock prepare()
+    would run the formatter (and json.dumps) on the event loop.
+    A full queue drops the record instead of blocking the request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogPipeline:
+    def __init__(self, logger_name: str = "novabase.sre", sample_rate: float = LOG_SAMPLE_RATE):
+        self.logger = logging.getLogger(logger_name)
+        self.sample_rate = sample_rate
+        self.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.handler = DeferredQueueHandler(self.queue)
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter("%(levelname)s:%(name)s:%(message)s"))
+        self.listener = logging.handlers.QueueListener(self.queue, output, respect_handler_level=True)
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self._running = False
+
+    def start(self):
+        if not self._running:
+            self.listener.start()
+            self._running = True
+
+    def stop(self):
+        """Flushes queued records; call on shutdown."""
+        if self._running:
+            self.listener.stop()
+            self._running = False
+
+    def should_log(self, status_code: int) -> bool:
+        # Errors are always kept; successful traffic is sampled.
+        return status_code >= 400 or self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def stats(self) -> dict:
+        return {"queue_depth": self.queue.qsize(), "dropped": self.handler.dropped, "sample_rate": self.sample_rate}
+
+
+request_log = RequestLogPipeline()
+request_log.start()
+atexit.register(request_log.stop)
@@ -0,0 +1,341 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.util import await_only
+from app.database import (
+    DATABASE_URL,
+    DATABASE_SHARD_URLS,
+    engine as primary_engine,
+    SessionLocal,
+    AsyncSessionLocal,
+    async_url,
+    engine_options,
+    pool_stats,
+)
+from app.auth.dependencies import get_current_tenant_context
+from app.auth.schemas import TokenData
+from app.auto_api.models import TableMeta, AuditLog
+from app.auto_api.registry import TableRegistry, note_table_change, table_registry
+from app.auto_api.schema_cache import SchemaCache, schema_cache
+from app.auto_api.singleflight import SingleFlight
+from app.tenants.models import Tenant, TenantPlacement
+
+# Name of the DATABASE_URL database in the shard map; it also holds the catalog.
+SHARD_PRIMARY_NAME = os.getenv("SHARD_PRIMARY_NAME", "primary")
+# Tenants without a placement row: "table" keeps them on the primary (data from
+# before sharding was enabled), "hash" sends them to their consistent-hash shard.
+SHARD_PLACEMENT = os.getenv("SHARD_PLACEMENT", "table")
+SHARD_RING_VNODES = int(os.getenv("SHARD_RING_VNODES", "128"))
+# Placement cache per worker. The tenant move tool waits this long for every
+# worker to observe a freeze, so it also bounds how stale routing can be.
+SHARD_MAP_REFRESH_SECONDS = float(os.getenv("SHARD_MAP_REFRESH_SECONDS", "5"))
+SHARD_MAP_MAX_TENANTS = int(os.getenv("SHARD_MAP_MAX_TENANTS", "100000"))
+# A frozen tenant's placement is re-read at most this often per worker, so a
+# burst of rejected writes costs one catalog query, not one each.
+SHARD_MAP_MOVING_RECHECK_SECONDS = float(os.getenv("SHARD_MAP_MOVING_RECHECK_SECONDS", "1"))
+
+PLACEMENT_ACTIVE = "active"
+PLACEMENT_MOVING = "moving"
+
+# Tables every shard needs besides the tenants' own tables.
+SHARD_LOCAL_TABLES = [Tenant.__table__, TableMeta.__table__, AuditLog.__table__]
+
+logger = logging.getLogger("novabase.shards")
+
+
+def _ring_point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing over shard names with virtual nodes: adding a shard
+    moves only ~1/N of the hashed tenants, all of them onto the new shard.
+    """
+
+    def __init__(self, names, vnodes: int = SHARD_RING_VNODES):
+        points = sorted((_ring_point(f"{name}#{i}"), name) for name in names for i in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def locate(self, key: str) -> str:
+        index = bisect.bisect(self._points, _ring_point(key)) % len(self._points)
+        return self._names[index]
+
+
+class Shard:
+    """One tenant database: its own pool, schema cache and table registry."""
+
+    def __init__(self, name: str, url: str, engine=None, session_factory=None, schemas=None, registry=None):
+        self.name = name
+        self.url = url
+        self.engine = engine if engine is not None else create_engine(url, **engine_options(url))
+        self.session_factory = session_factory or sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.schema_cache = schemas if schemas is not None else SchemaCache()
+        self.table_registry = registry if registry is not None else TableRegistry()
+        self._async_factory = None
+
+    @property
+    def host(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+    def async_session_factory(self) -> Callable:
+        if self.name == SHARD_PRIMARY_NAME:
+            return AsyncSessionLocal
+        if self._async_factory is None:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            url = async_url(self.url)
+            async_engine = create_async_engine(url, **engine_options(url, async_driver=True))
+            shard_map.register_engine(async_engine.sync_engine, self)
+            self._async_factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+        return self._async_factory
+
+    def stats(self) -> dict:
+        return {
+            "host": self.host,
+            "pool": pool_stats(self.engine),
+            "schema_cache": self.schema_cache.stats(),
+            "registry": self.table_registry.stats(),
+        }
+
+
+class ShardMap:
+    """
+    Resolves a tenant id (the JWT tenant claim) to the shard holding its data.
+
+    An explicit row in tenant_placements always wins; it is written when a
+    tenant signs up (at its hash-ring position) and by the move tool. Tenants
+    without one fall back according to SHARD_PLACEMENT. Lookups are cached per
+    worker for SHARD_MAP_REFRESH_SECONDS.
+
+    With no DATABASE_SHARD_URLS there is only the primary and every call is a
+    constant without touching the catalog.
+    """
+
+    def __init__(self, urls: Dict[str, str] = DATABASE_SHARD_URLS, placement: str = SHARD_PLACEMENT):
+        if placement not in ("table", "hash"):
+            raise ValueError(f"Unknown SHARD_PLACEMENT '{placement}'. Use 'table' or 'hash'.")
+        if SHARD_PRIMARY_NAME in urls:
+            raise ValueError(f"Shard name '{SHARD_PRIMARY_NAME}' is reserved for DATABASE_URL.")
+        self.placement_mode = placement
+        # The primary reuses the app-wide engine and caches, so unsharded deployments are unchanged.
+        self.primary = Shard(SHARD_PRIMARY_NAME, DATABASE_URL, primary_engine, SessionLocal, schema_cache, table_registry)
+        self.shards: Dict[str, Shard] = {self.primary.name: self.primary}
+        for name, url in urls.items():
+            self.shards[name] = Shard(name, url)
+        self.ring = HashRing(list(self.shards))
+        self._by_engine = {shard.engine: shard for shard in self.shards.values()}
+        self._placements: "OrderedDict[str, tuple]" = OrderedDict()  # tenant -> (shard, status, loaded_at)
+        self._lock = threading.Lock()
+        self._loading = SingleFlight()
+        self.hits = 0
+        self.lookups = 0
+        self.rejected_writes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.shards) > 1
+
+    def register_engine(self, engine, shard: Shard):
+        self._by_engine[engine] = shard
+
+    # --- tenant -> shard ---
+    def _load(self, tenant_id: str) -> Tuple[str, str]:
+        db = SessionLocal()
+        try:
+            row = db.execute(
+                select(TenantPlacement.shard, TenantPlacement.status).where(TenantPlacement.tenant_id == tenant_id)
+            ).first()
+        finally:
+            db.close()
+        if row is None:
+            fallback = self.ring.locate(tenant_id) if self.placement_mode == "hash" else self.primary.name
+            return fallback, PLACEMENT_ACTIVE
+        return row.shard, row.status
+
+    def _fetch(self, tenant_id: str) -> Tuple[str, str]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._load(tenant_id)
+        # Called from sync code inside AsyncSession.run_sync (the tenant
+        # handshake, the write guard): the catalog query goes through the sync
+        # driver, so run it on a worker thread and suspend the greenlet
+        # instead of blocking the event loop.
+        return await_only(loop.run_in_executor(None, self._load, tenant_id))
+
+    def placement(self, tenant_id: str, refresh: bool = False, max_age: float = SHARD_MAP_REFRESH_SECONDS) -> Tuple[str, str]:
+        """
+        (shard name, status) for a tenant, from a cache entry younger than
+        max_age; refresh=True bypasses the cache. Concurrent misses for the
+        same tenant share one catalog query.
+        """
+        if not self.enabled:
+            return self.primary.name, PLACEMENT_ACTIVE
+        now = time.monotonic()
+        if not refresh:
+            with self._lock:
+                entry = self._placements.get(tenant_id)
+                if entry is not None and now - entry[2] < max_age:
+                    self._placements.move_to_end(tenant_id)
+                    self.hits += 1
+                    return entry[0], entry[1]
+        name, state = self._loading.run(tenant_id, lambda: self._fetch(tenant_id))[0]
+        if name not in self.shards:
+            logger.error(f"Tenant {tenant_id} is placed on unknown shard '{name}'")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Tenant database is not available on this node."
+            )
+        with self._lock:
+            self.lookups += 1
+            self._placements[tenant_id] = (name, state, now)
+            self._placements.move_to_end(tenant_id)
+            while len(self._placements) > SHARD_MAP_MAX_TENANTS:
+                self._placements.popitem(last=False)
+        return name, state
+
+    def shard_for_tenant(self, tenant_id: str) -> Shard:
+        return self.shards[self.placement(tenant_id)[0]]
+
+    def for_bind(self, bind) -> Shard:
+        """
+        Shard owning an Engine or Connection. Unknown binds (read replicas of
+        the primary, ad-hoc engines) count as the primary.
+        """
+        if bind is None or not self.enabled:
+            return self.primary
+        return self._by_engine.get(getattr(bind, "engine", bind), self.primary)
+
+    def for_session(self, db) -> Shard:
+        return self.for_bind(db.get_bind()) if self.enabled else self.primary
+
+    def assign(self, db: Session, tenant: Tenant) -> str:
+        """
+        Pins a new tenant to its hash-ring shard (the caller commits), so adding
+        shards later never moves it, and creates its tenants row on that shard.
+        """
+        if not self.enabled:
+            return self.primary.name
+        name = self.ring.locate(tenant.id)
+        if name != self.primary.name:
+            with self.shards[name].engine.begin() as conn:
+                conn.execute(insert(Tenant.__table__).values(
+                    id=tenant.id, name=tenant.name, slug=tenant.slug, is_active=True
+                ))
+        db.add(TenantPlacement(tenant_id=tenant.id, shard=name, status=PLACEMENT_ACTIVE))
+        return name
+
+    # --- fences ---
+    def _relocating(self):
+        with self._lock:
+            self.rejected_writes += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Tenant data is being relocated. Retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    def check_session(self, db, tenant_id: str):
+        """Refuses a session bound to a shard other than the tenant's."""
+        if self.enabled and self.for_session(db) is not self.shard_for_tenant(tenant_id):
+            raise self._relocating()
+
+    def guard_write(self, db: Session, tenant_id: str):
+        """
+        Runs before a tenant's write commits: rejects it while the tenant is
+        frozen for a move, or when its session is on a shard the tenant has
+        left. A cached freeze is re-read every SHARD_MAP_MOVING_RECHECK_SECONDS,
+        so writes resume within about that long after the move completes.
+        """
+        if not self.enabled:
+            return
+        name, state = self.placement(tenant_id)
+        if state == PLACEMENT_MOVING:
+            name, state = self.placement(tenant_id, max_age=SHARD_MAP_MOVING_RECHECK_SECONDS)
+        if state == PLACEMENT_MOVING or self.for_session(db).name != name:
+            raise self._relocating()
+
+    # --- lifecycle ---
+    def create_tables(self, metadata):
+        """Creates the shard-local tables (tenants, tables_meta, audit_logs) on every other shard."""
+        for shard in self.shards.values():
+            if shard is not self.primary:
+                metadata.create_all(bind=shard.engine, tables=SHARD_LOCAL_TABLES)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.lookups
+            placements = {
+                "cached_tenants": len(self._placements),
+                "hits": self.hits,
+                "lookups": self.lookups,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "rejected_writes": self.rejected_writes,
+            }
+        return {
+            "enabled": self.enabled,
+            "placement": self.placement_mode,
+            "refresh_seconds": SHARD_MAP_REFRESH_SECONDS,
+            "moving_recheck_seconds": SHARD_MAP_MOVING_RECHECK_SECONDS,
+            "placements": placements,
+            "shards": {name: shard.stats() for name, shard in self.shards.items()},
+        }
+
+
+shard_map = ShardMap()
+
+_SHARD_CHANGED_KEY = "novabase_changed_shard_tables"
+
+
+@event.listens_for(TableMeta, "after_insert")
+@event.listens_for(TableMeta, "after_update")
+@event.listens_for(TableMeta, "after_delete")
+def _on_shard_table_meta_change(mapper, connection, target):
+    # The primary's registry is marked by app.auto_api.registry itself.
+    shard = shard_map.for_bind(connection)
+    if shard is not shard_map.primary:
+        if not note_table_change(target, _SHARD_CHANGED_KEY, (shard.name, target.table_name)):
+            shard.table_registry.mark_stale(target.table_name)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed_shard_changes(session: Session):
+    for shard_name, table_name in session.info.pop(_SHARD_CHANGED_KEY, ()):
+        shard_map.shards[shard_name].table_registry.mark_stale(table_name)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_shard_changes(session: Session, previous_transaction):
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_SHARD_CHANGED_KEY, None)
+
+
+def get_tenant_db(context: TokenData = Depends(get_current_tenant_context)):
+    """Request Session on the shard that holds the caller's tenant."""
+    db = shard_map.shard_for_tenant(context.tenant_id).session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_tenant_db(context: TokenData = Depends(get_current_tenant_context)):
+    shard = shard_map.primary
+    if shard_map.enabled:
+        # A placement miss reads the catalog through the sync driver; keep it off the loop.
+        shard = await run_in_threadpool(shard_map.shard_for_tenant, context.tenant_id)
+    async with shard.async_session_factory()() as db:
+        yield db
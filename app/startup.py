@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+# Warm-up run by the lifespan hook: each shard's table registry is loaded and
+# its active tables are reflected (and their validators compiled) before the
+# worker reports ready on /ready, so no request pays cold reflection.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_MAX_TABLES = int(os.getenv("WARMUP_MAX_TABLES", "500"))  # per shard; keep <= SCHEMA_CACHE_MAX_TABLES
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "30"))
+
+# Probe traffic doesn't count as the worker's first real request.
+PROBE_PATHS = frozenset({"/", "/ready", "/metrics"})
+
+logger = logging.getLogger("novabase.startup")
+
+
+class WorkerStartup:
+    """
+    Tracks one worker from import to its first successful request. Times are
+    relative to the import of this module, i.e. roughly process start.
+    A database that is down at boot only delays readiness: the warm-up
+    retries with backoff instead of failing the import.
+    """
+
+    def __init__(self):
+        self.created = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.first_success_at: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.tables_warmed = {}
+        self.missing_tables = 0
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def _warm_shard(self, shard) -> int:
+        from fastapi import HTTPException
+        from app.auto_api.engine import get_reflected_table
+        from app.auto_api.validators import get_validator
+
+        db = shard.session_factory()
+        try:
+            active = shard.table_registry.refresh(db)
+        finally:
+            db.close()
+        warmed = 0
+        with shard.engine.connect() as conn:
+            for name in sorted(active)[:WARMUP_MAX_TABLES]:
+                try:
+                    get_validator(get_reflected_table(name, bind=conn))
+                    warmed += 1
+                except HTTPException:
+                    # Registered in tables_meta but not created yet; the API 404s it anyway.
+                    self.missing_tables += 1
+        return warmed
+
+    def _warm(self):
+        from app.shards import shard_map
+
+        delay = WARMUP_RETRY_SECONDS
+        while not self._stop.is_set():
+            self.attempts += 1
+            started = time.monotonic()
+            try:
+                for shard in shard_map.shards.values():
+                    self.tables_warmed[shard.name] = self._warm_shard(shard)
+            except Exception as e:
+                self.last_error = str(e).splitlines()[0] if str(e) else type(e).__name__
+                logger.warning(f"Schema warm-up attempt {self.attempts} failed, retrying in {delay:.0f}s: {self.last_error}")
+                if self._stop.wait(delay):
+                    return
+                delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+                continue
+            self.warmup_seconds = time.monotonic() - started
+            self.ready_at = time.monotonic()
+            logger.info(
+                f"Worker ready in {self.ready_at - self.created:.2f}s "
+                f"({sum(self.tables_warmed.values())} tables warmed in {self.warmup_seconds:.2f}s)"
+            )
+            return
+
+    def start(self):
+        if not WARMUP_ENABLED:
+            self.ready_at = time.monotonic()
+            return
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._warm, name="schema-warmup", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def observe(self, path: str, status_code: int):
+        """Called per request by OperationalMiddleware; records the first successful one."""
+        if self.first_success_at is None and status_code < 400 and path not in PROBE_PATHS:
+            self.first_success_at = time.monotonic()
+            logger.info(f"First successful request {self.first_success_at - self.created:.2f}s after start")
+
+    def stats(self) -> dict:
+        def since_start(at):
+            return round(at - self.created, 3) if at is not None else None
+
+        return {
+            "ready": self.ready,
+            "warmup_enabled": WARMUP_ENABLED,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "tables_warmed": self.tables_warmed,
+            "missing_tables": self.missing_tables,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "seconds_to_ready": since_start(self.ready_at),
+            "seconds_to_first_success": since_start(self.first_success_at),
+        }
+
+
+worker_startup = WorkerStartup()
@@ -22,3 +22,15 @@ class TenantScopedModel:
     Every custom user table MUST inherit from this to prevent data leaks.
     """
     tenant_id = Column(String, ForeignKey("tenants.id"), nullable=False, index=True)
+
+class TenantPlacement(Base):
+    """
+    Explicit tenant -> shard assignment, kept in the primary (catalog) database.
+    Written at signup and by the tenant move tool; see app.shards.
+    """
+    __tablename__ = "tenant_placements"
+
+    tenant_id = Column(String, ForeignKey("tenants.id"), primary_key=True)
+    shard = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="active")  # active | moving (writes frozen)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,310 @@
+"""
+Online move of one tenant to another shard.
+
+    python -m app.tenants.move <tenant_id> <target_shard> [--purge-source]
+
+1. Copy: every registered table with a tenant_id column, plus the tenant's
+   audit_logs, is streamed from the source shard into the target in batches
+   of SHARD_MOVE_BATCH_ROWS (idempotent upserts) while the tenant stays live.
+2. Freeze: the placement is marked 'moving'. Workers reject the tenant's
+   writes with 503 once their placement cache refreshes, so the tool waits
+   SHARD_MAP_REFRESH_SECONDS + SHARD_MOVE_DRAIN_SECONDS.
+3. Catch-up: rows named by audit_logs entries since the copy started (minus
+   SHARD_MOVE_CATCHUP_MARGIN_SECONDS) are re-copied, or deleted when gone.
+4. Every table's slice (and the tenant's ledger) is compared by row count and
+   content digest, the placement flips to the target and writes resume. Any
+   failure before the flip unfreezes on the source.
+5. With --purge-source, the source rows are deleted only after another
+   SHARD_MAP_REFRESH_SECONDS + SHARD_MOVE_DRAIN_SECONDS, once no worker can
+   still be routing the tenant's reads to the source.
+
+Catch-up trusts the audit ledger to name every change, so moves need
+AUDIT_MODE=sync on every worker: write-behind entries may still be queued,
+or dropped, when the source is read.
+
+Reads keep working throughout; only writes pause, for roughly the wait plus
+the catch-up.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import MetaData, Table, delete, insert, select, text
+from app.database import Base
+from app.auto_api.audit import AUDIT_MODE
+from app.auto_api.engine import UPSERT_DIALECTS
+from app.auto_api.models import AuditLog, TableMeta
+from app.shards import (
+    shard_map,
+    Shard,
+    SHARD_LOCAL_TABLES,
+    SHARD_MAP_REFRESH_SECONDS,
+    PLACEMENT_ACTIVE,
+    PLACEMENT_MOVING,
+)
+from app.tenants.models import Tenant, TenantPlacement
+
+SHARD_MOVE_BATCH_ROWS = int(os.getenv("SHARD_MOVE_BATCH_ROWS", "1000"))
+# Extra wait after the freeze (and before a purge) for in-flight requests to finish.
+SHARD_MOVE_DRAIN_SECONDS = float(os.getenv("SHARD_MOVE_DRAIN_SECONDS", "2"))
+# Catch-up also replays changes stamped this long before the copy started
+# (transactions that began before it but committed after their rows were read).
+SHARD_MOVE_CATCHUP_MARGIN_SECONDS = float(os.getenv("SHARD_MOVE_CATCHUP_MARGIN_SECONDS", "60"))
+
+logger = logging.getLogger("novabase.shards.move")
+
+
+def _tenant_context(conn, tenant_id: str):
+    # RLS sees the tenant; bulk statements run without the per-request timeout.
+    if conn.dialect.name == "postgresql":
+        conn.execute(
+            text("SELECT set_config('app.current_tenant', :tenant_id, true), set_config('statement_timeout', '0', true)"),
+            {"tenant_id": tenant_id},
+        )
+
+
+def _set_placement(tenant_id: str, shard_name: str, state: str):
+    db = shard_map.primary.session_factory()
+    try:
+        placement = db.get(TenantPlacement, tenant_id)
+        if placement is None:
+            db.add(TenantPlacement(tenant_id=tenant_id, shard=shard_name, status=state))
+        else:
+            placement.shard = shard_name
+            placement.status = state
+        db.commit()
+    finally:
+        db.close()
+
+
+def _write_rows(conn, table: Table, rows: List[dict]):
+    """Upsert on the primary key; plain insert for tables without one (or the audit ledger)."""
+    pk = [c.name for c in table.primary_key.columns]
+    if table is AuditLog.__table__ and rows:
+        # Immutable (and partitioned) ledger: no upsert, so skip ids already there.
+        existing = set(conn.execute(select(table.c.id).where(table.c.id.in_([r["id"] for r in rows]))).scalars())
+        rows = [r for r in rows if r["id"] not in existing]
+        if rows:
+            conn.execute(insert(table), rows)
+        return
+    dialect_insert = UPSERT_DIALECTS.get(conn.dialect.name)
+    if not pk or dialect_insert is None:
+        conn.execute(insert(table), rows)
+        return
+    stmt = dialect_insert(table)
+    updatable = {c.name: stmt.excluded[c.name] for c in table.columns if c.name not in pk}
+    if updatable:
+        stmt = stmt.on_conflict_do_update(index_elements=pk, set_=updatable)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=pk)
+    conn.execute(stmt, rows)
+
+
+def _copy(source: Shard, target: Shard, table: Table, tenant_id: str, *where) -> int:
+    """Streams the matching rows through a server-side cursor, one target transaction per batch."""
+    copied = 0
+    with source.engine.connect() as src:
+        _tenant_context(src, tenant_id)
+        result = src.execution_options(stream_results=True, yield_per=SHARD_MOVE_BATCH_ROWS).execute(
+            select(table).where(table.c.tenant_id == tenant_id, *where)
+        )
+        for batch in result.mappings().partitions():
+            rows = [dict(row) for row in batch]
+            with target.engine.begin() as dst:
+                _tenant_context(dst, tenant_id)
+                _write_rows(dst, table, rows)
+            copied += len(rows)
+    return copied
+
+
+def _resync_slice(source: Shard, target: Shard, table: Table, tenant_id: str) -> int:
+    """Tables without a primary key are replaced wholesale."""
+    with target.engine.begin() as dst:
+        _tenant_context(dst, tenant_id)
+        dst.execute(delete(table).where(table.c.tenant_id == tenant_id))
+    return _copy(source, target, table, tenant_id)
+
+
+def _digest(shard: Shard, table: Table, tenant_id: str) -> Tuple[int, str]:
+    """
+    (row count, content digest) of the tenant's slice. Row hashes are summed,
+    so the digest needs no ORDER BY and handles tables without a primary key.
+    """
+    total = rows = 0
+    with shard.engine.connect() as conn:
+        _tenant_context(conn, tenant_id)
+        result = conn.execution_options(stream_results=True, yield_per=SHARD_MOVE_BATCH_ROWS).execute(
+            select(table).where(table.c.tenant_id == tenant_id)
+        )
+        for row in result:
+            encoded = json.dumps(list(row), default=str, sort_keys=True).encode()
+            total += int.from_bytes(hashlib.blake2b(encoded, digest_size=16).digest(), "big")
+            rows += 1
+    return rows, format(total % (1 << 128), "032x")
+
+
+def _prepare_target(source: Shard, target: Shard, tenant_id: str) -> List[Table]:
+    """
+    Reflects the tenant's tables on the source and makes sure the target has
+    them, registered in tables_meta, and has the tenant's catalog row.
+    """
+    if target is not shard_map.primary:
+        Base.metadata.create_all(bind=target.engine, tables=SHARD_LOCAL_TABLES)
+    with source.engine.connect() as src:
+        names = src.execute(select(TableMeta.table_name).where(TableMeta.is_active == True)).scalars().all()
+        tables = []
+        for name in names:
+            table = Table(name, MetaData(), autoload_with=src)
+            if "tenant_id" in table.columns:
+                tables.append(table)
+    with shard_map.primary.engine.connect() as catalog:
+        tenant = catalog.execute(select(Tenant.__table__).where(Tenant.id == tenant_id)).mappings().first()
+    if tenant is None:
+        raise ValueError(f"Tenant '{tenant_id}' does not exist.")
+
+    with target.engine.begin() as dst:
+        for table in tables:
+            table.metadata.create_all(bind=dst, tables=[table], checkfirst=True)
+        registered = set(dst.execute(select(TableMeta.table_name)).scalars())
+        missing = [t.name for t in tables if t.name not in registered]
+        if missing:
+            dst.execute(insert(TableMeta), [{"table_name": name, "is_active": True} for name in missing])
+        if dst.execute(select(Tenant.id).where(Tenant.id == tenant_id)).first() is None:
+            dst.execute(insert(Tenant.__table__), [dict(tenant)])
+    return tables
+
+
+def _changed_records(source: Shard, tenant_id: str, since: datetime) -> Dict[str, Set[str]]:
+    with source.engine.connect() as src:
+        _tenant_context(src, tenant_id)
+        rows = src.execute(
+            select(AuditLog.table_name, AuditLog.record_id)
+            .where(AuditLog.tenant_id == tenant_id, AuditLog.timestamp >= since)
+            .distinct()
+        ).all()
+    changed: Dict[str, Set[str]] = {}
+    for table_name, record_id in rows:
+        changed.setdefault(table_name, set()).add(record_id)
+    return changed
+
+
+def _catch_up(source: Shard, target: Shard, tables: List[Table], tenant_id: str, since: datetime) -> int:
+    """Re-applies rows written since the copy started; rows gone from the source are deleted."""
+    by_name = {table.name: table for table in tables}
+    applied = 0
+    for table_name, record_ids in _changed_records(source, tenant_id, since).items():
+        table = by_name.get(table_name)
+        if table is None:
+            continue
+        pk = [c.name for c in table.primary_key.columns]
+        if pk != ["id"]:
+            applied += _resync_slice(source, target, table, tenant_id)
+            continue
+        ids = sorted(record_ids)
+        for start in range(0, len(ids), SHARD_MOVE_BATCH_ROWS):
+            chunk = ids[start:start + SHARD_MOVE_BATCH_ROWS]
+            with source.engine.connect() as src:
+                _tenant_context(src, tenant_id)
+                rows = [dict(r) for r in src.execute(
+                    select(table).where(table.c.tenant_id == tenant_id, table.c.id.in_(chunk))
+                ).mappings()]
+            present = {str(row["id"]) for row in rows}
+            gone = [record_id for record_id in chunk if record_id not in present]
+            with target.engine.begin() as dst:
+                _tenant_context(dst, tenant_id)
+                if rows:
+                    _write_rows(dst, table, rows)
+                if gone:
+                    dst.execute(delete(table).where(table.c.tenant_id == tenant_id, table.c.id.in_(gone)))
+            applied += len(chunk)
+    applied += _copy(source, target, AuditLog.__table__, tenant_id, AuditLog.timestamp >= since)
+    return applied
+
+
+def _purge(source: Shard, tables: List[Table], tenant_id: str):
+    # audit_logs stays: the ledger is immutable on Postgres.
+    for table in tables:
+        with source.engine.begin() as src:
+            _tenant_context(src, tenant_id)
+            src.execute(delete(table).where(table.c.tenant_id == tenant_id))
+
+
+def move_tenant(tenant_id: str, target_name: str, purge_source: bool = False) -> dict:
+    if not shard_map.enabled:
+        raise ValueError("Sharding is not configured (DATABASE_SHARD_URLS is empty).")
+    if AUDIT_MODE != "sync":
+        raise ValueError(
+            f"Tenant moves need AUDIT_MODE=sync on every worker (found '{AUDIT_MODE}'): "
+            "catch-up replays the audit ledger, and write-behind entries can land after it."
+        )
+    if target_name not in shard_map.shards:
+        raise ValueError(f"Unknown shard '{target_name}'. Configured: {', '.join(shard_map.shards)}.")
+    source_name, state = shard_map.placement(tenant_id, refresh=True)
+    if state != PLACEMENT_ACTIVE:
+        raise ValueError(f"Tenant '{tenant_id}' is already being moved.")
+    if source_name == target_name:
+        raise ValueError(f"Tenant '{tenant_id}' is already on shard '{target_name}'.")
+    source, target = shard_map.shards[source_name], shard_map.shards[target_name]
+    report = {"tenant_id": tenant_id, "source": source_name, "target": target_name}
+
+    # 1. Online copy
+    started = time.monotonic()
+    since = datetime.now(timezone.utc) - timedelta(seconds=SHARD_MOVE_CATCHUP_MARGIN_SECONDS)
+    tables = _prepare_target(source, target, tenant_id)
+    copied = {}
+    for table in tables:
+        if len(table.primary_key.columns):
+            copied[table.name] = _copy(source, target, table, tenant_id)
+        else:
+            copied[table.name] = _resync_slice(source, target, table, tenant_id)
+        logger.info(f"Copied {copied[table.name]} rows of {table.name}")
+    copied["audit_logs"] = _copy(source, target, AuditLog.__table__, tenant_id)
+    report["copied"] = copied
+    report["copy_seconds"] = round(time.monotonic() - started, 3)
+
+    # 2. Freeze writes everywhere, 3. catch up, 4. verify and flip
+    _set_placement(tenant_id, source_name, PLACEMENT_MOVING)
+    frozen = time.monotonic()
+    try:
+        time.sleep(SHARD_MAP_REFRESH_SECONDS + SHARD_MOVE_DRAIN_SECONDS)
+        report["caught_up"] = _catch_up(source, target, tables, tenant_id, since)
+        mismatched = {}
+        for table in tables + [AuditLog.__table__]:
+            (source_rows, source_digest), (target_rows, target_digest) = (
+                _digest(source, table, tenant_id), _digest(target, table, tenant_id)
+            )
+            if source_rows != target_rows or source_digest != target_digest:
+                mismatched[table.name] = {"source_rows": source_rows, "target_rows": target_rows}
+        if mismatched:
+            raise RuntimeError(f"Tenant data differs after catch-up: {mismatched}")
+        _set_placement(tenant_id, target_name, PLACEMENT_ACTIVE)
+    except BaseException:
+        _set_placement(tenant_id, source_name, PLACEMENT_ACTIVE)
+        raise
+    report["write_freeze_seconds"] = round(time.monotonic() - frozen, 3)
+
+    if purge_source:
+        # Workers keep routing to the source until their cached placement expires.
+        time.sleep(SHARD_MAP_REFRESH_SECONDS + SHARD_MOVE_DRAIN_SECONDS)
+        _purge(source, tables, tenant_id)
+    report["purged_source"] = purge_source
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tenant_id")
+    parser.add_argument("target_shard")
+    parser.add_argument("--purge-source", action="store_true", help="delete the tenant's rows from the old shard afterwards")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print(json.dumps(move_tenant(args.tenant_id, args.target_shard, purge_source=args.purge_source), indent=2))
+
+
+if __name__ == "__main__":
+    main()
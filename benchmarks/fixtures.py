@@ -0,0 +1,159 @@
+"""
+Seeded benchmark database: N tenants, T tables registered in tables_meta and
+M rows per table per tenant.
+
+Names and ids are deterministic (tenant bench-tenant-<i>, table
+bench_items_<j>, tenant i owning ids i*M+1 .. (i+1)*M), so the load driver can
+address rows without reading anything back. Re-seeding drops and recreates
+the bench tables.
+
+    python -m benchmarks.fixtures --url postgresql://.../novabase_bench --tenants 10 --tables 3 --rows 1000
+
+On Postgres each table gets a fail-closed RLS policy on app.current_tenant
+like schema.sql (connect as a non-superuser role, superusers bypass RLS).
+SQLite has no RLS or set_config(); install_sqlite_handshake() registers a
+set_config() SQL function so the unmodified tenant handshake runs there too.
+"""
+import argparse
+import datetime
+import decimal
+import json
+import os
+import sqlite3
+import time
+
+# Must precede any app import: app.database reads DATABASE_URL at import time.
+DEFAULT_URL = "sqlite:////tmp/novabase_bench.db"
+os.environ.setdefault("DATABASE_URL", DEFAULT_URL)
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Integer, MetaData, Numeric, String, Table, create_engine, delete, event, func, insert, text,
+)
+from sqlalchemy.engine import Engine
+
+SEED_BATCH_ROWS = 1000
+
+
+def tenant_id(index: int) -> str:
+    return f"bench-tenant-{index}"
+
+
+def table_name(index: int) -> str:
+    return f"bench_items_{index}"
+
+
+def row_ids(tenant_index: int, rows: int) -> range:
+    return range(tenant_index * rows + 1, (tenant_index + 1) * rows + 1)
+
+
+def bench_table(name: str, metadata: MetaData) -> Table:
+    return Table(
+        name, metadata,
+        Column("id", Integer, primary_key=True),
+        Column("tenant_id", String(64), nullable=False, index=True),
+        Column("name", String(64), nullable=False),
+        Column("qty", Integer),
+        Column("amount", Numeric(12, 2)),
+        Column("paid", Boolean),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    )
+
+
+def _sqlite_set_config(name, value, is_local):
+    return value
+
+
+def install_sqlite_handshake():
+    """set_config(name, value, is_local) on every SQLite connection: a no-op that returns value."""
+    @event.listens_for(Engine, "connect")
+    def _register(dbapi_connection, connection_record):
+        # sqlite3, or SQLAlchemy's adapter around an aiosqlite connection (DB_MODE=async)
+        if isinstance(dbapi_connection, sqlite3.Connection) or type(dbapi_connection).__name__ == "AsyncAdapt_aiosqlite_connection":
+            dbapi_connection.create_function("set_config", 3, _sqlite_set_config)
+
+
+def _rls(conn, name: str):
+    conn.execute(text(f"ALTER TABLE {name} ENABLE ROW LEVEL SECURITY"))
+    conn.execute(text(f"ALTER TABLE {name} FORCE ROW LEVEL SECURITY"))
+    conn.execute(text(
+        f"CREATE POLICY {name}_tenant_isolation ON {name} "
+        "USING (tenant_id = current_setting('app.current_tenant', true)) "
+        "WITH CHECK (tenant_id = current_setting('app.current_tenant', true))"
+    ))
+
+
+def seed(url: str = None, tenants: int = 10, tables: int = 3, rows: int = 1000) -> dict:
+    """Creates the fixture and returns its manifest."""
+    from app.database import Base
+    from app.auto_api.models import TableMeta
+    from app.tenants.models import Tenant
+
+    url = url or os.environ["DATABASE_URL"]
+    engine = create_engine(url)
+    is_postgres = engine.dialect.name == "postgresql"
+    Base.metadata.create_all(bind=engine)
+    metadata = MetaData()
+    names = [table_name(j) for j in range(tables)]
+    bench_tables = [bench_table(name, metadata) for name in names]
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        metadata.drop_all(bind=conn, checkfirst=True)
+        metadata.create_all(bind=conn)
+        if is_postgres:
+            for name in names:
+                _rls(conn, name)
+        conn.execute(delete(TableMeta).where(TableMeta.table_name.like("bench_items_%")))
+        conn.execute(insert(TableMeta), [{"table_name": name, "is_active": True} for name in names])
+        ids = [tenant_id(i) for i in range(tenants)]
+        conn.execute(delete(Tenant).where(Tenant.id.in_(ids)))
+        conn.execute(insert(Tenant), [{"id": t, "name": t, "slug": t, "is_active": True} for t in ids])
+
+    created_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for i in range(tenants):
+        rows_for_tenant = [
+            {
+                "id": row_id,
+                "tenant_id": tenant_id(i),
+                "name": f"item-{row_id % 500}",
+                "qty": row_id % 17,
+                "amount": decimal.Decimal(row_id % 10000) / 100,
+                "paid": row_id % 3 == 0,
+                "created_at": created_at + datetime.timedelta(seconds=row_id),
+            }
+            for row_id in row_ids(i, rows)
+        ]
+        for table in bench_tables:
+            with engine.begin() as conn:
+                if is_postgres:
+                    conn.execute(text("SELECT set_config('app.current_tenant', :t, true)"), {"t": tenant_id(i)})
+                for start in range(0, len(rows_for_tenant), SEED_BATCH_ROWS):
+                    conn.execute(insert(table), rows_for_tenant[start:start + SEED_BATCH_ROWS])
+
+    if is_postgres:
+        # Explicit ids leave the serial sequences behind; API inserts continue after them.
+        with engine.begin() as conn:
+            for name in names:
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), :last)"), {"last": max(tenants * rows, 1)})
+    engine.dispose()
+    return {
+        "url": engine.url.render_as_string(hide_password=True),
+        "tenants": tenants,
+        "tables": names,
+        "rows_per_table_per_tenant": rows,
+        "seed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.environ["DATABASE_URL"])
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(seed(args.url, args.tenants, args.tables, args.rows), indent=2))
+
+
+if __name__ == "__main__":
+    main()
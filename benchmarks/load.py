@@ -0,0 +1,220 @@
+"""
+Load driver for the full application against the seeded fixture.
+
+Drives app.main:app in-process through its ASGI interface (middleware, auth,
+routing, the database pool and the real driver; no sockets) with
+--concurrency concurrent clients, each authenticated as one of the fixture
+tenants, and reports p50/p95/p99 latency and requests/s per route.
+
+  list     GET   /api/<table>?limit=50
+  read     GET   /api/<table>/<id>
+  create   POST  /api/<table>
+  update   PATCH /api/<table>/<id>
+  me       GET   /auth/me
+
+    python -m benchmarks.load --seed --concurrency 32 --duration 20 --output load.json
+    python -m benchmarks.load --routes read,update --baseline load.json
+
+DATABASE_URL (or --url) selects the database; DB_MODE and the other app
+settings are read from the environment as usual. Run --seed once, or whenever
+the fixture shape changes; created rows accumulate between runs.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+
+import orjson
+
+ROUTES = ("list", "read", "create", "update", "me")
+
+
+def parse_args():
+    from benchmarks import report
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run (ignored with --requests)")
+    parser.add_argument("--requests", type=int, help="stop after this many requests instead")
+    parser.add_argument("--warmup", type=int, default=200, help="untimed requests first")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="comma-separated mix of: " + ", ".join(ROUTES))
+    parser.add_argument("--seed", action="store_true", help="(re)create the fixture before running")
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=1000)
+    report.add_arguments(parser)
+    args = parser.parse_args()
+    unknown = set(args.routes.split(",")) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+    return args
+
+
+class Client:
+    """One simulated API client bound to a fixture tenant."""
+
+    def __init__(self, app, token: str, tenant_index: int, tables, rows: int, rng: random.Random):
+        self.app = app
+        self.headers = [
+            (b"host", b"bench"),
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"content-type", b"application/json"),
+        ]
+        self.tenant_index = tenant_index
+        self.tables = tables
+        self.rows = rows
+        self.rng = rng
+
+    def _row_id(self) -> int:
+        from benchmarks.fixtures import row_ids
+
+        return self.rng.choice(row_ids(self.tenant_index, self.rows))
+
+    def build(self, route: str):
+        table = self.rng.choice(self.tables)
+        if route == "list":
+            return "GET", f"/api/{table}", b"limit=50", b""
+        if route == "read":
+            return "GET", f"/api/{table}/{self._row_id()}", b"", b""
+        if route == "create":
+            body = {"name": f"load-{self.rng.randrange(1_000_000)}", "qty": self.rng.randrange(100), "amount": "9.99"}
+            return "POST", f"/api/{table}", b"", orjson.dumps(body)
+        if route == "update":
+            return "PATCH", f"/api/{table}/{self._row_id()}", b"", orjson.dumps({"qty": self.rng.randrange(100)})
+        return "GET", "/auth/me", b"", b""
+
+    async def request(self, route: str) -> int:
+        method, path, query, body = self.build(route)
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query, "root_path": "",
+            "headers": self.headers + [(b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+        messages = iter([{"type": "http.request", "body": body, "more_body": False}])
+        status_code = 0
+
+        async def receive():
+            return next(messages, {"type": "http.disconnect"})
+
+        async def send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        await self.app(scope, receive, send)
+        return status_code
+
+
+async def run(app, clients, routes, duration: float, budget: int, warmup: int):
+    samples = {route: [] for route in routes}
+    statuses = {route: Counter() for route in routes}
+    errors = Counter()
+
+    for i in range(warmup):
+        await clients[i % len(clients)].request(routes[i % len(routes)])
+
+    remaining = [budget] if budget else None
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: Client):
+        while True:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            elif time.perf_counter() >= deadline:
+                return
+            route = client.rng.choice(routes)
+            start = time.perf_counter()
+            try:
+                status_code = await client.request(route)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            samples[route].append(time.perf_counter() - start)
+            statuses[route][status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    return samples, statuses, errors, time.perf_counter() - started
+
+
+async def main_async(args) -> dict:
+    from benchmarks import fixtures, report
+
+    fixtures.install_sqlite_handshake()
+    manifest = fixtures.seed(args.url, args.tenants, args.tables, args.rows) if args.seed else None
+
+    from app.auth.jwt import create_access_token
+    from app.main import app
+    from app.request_log import request_log
+    from app.startup import worker_startup
+
+    devnull = open(os.devnull, "w")
+    for handler in request_log.listener.handlers:
+        handler.setStream(devnull)
+
+    tables = [fixtures.table_name(j) for j in range(args.tables)]
+    tokens = [
+        create_access_token({"user_id": str(uuid.uuid4()), "tenant_id": fixtures.tenant_id(i), "role": "admin"})
+        for i in range(args.tenants)
+    ]
+    clients = [
+        Client(app, tokens[c % args.tenants], c % args.tenants, tables, args.rows, random.Random(c))
+        for c in range(args.concurrency)
+    ]
+    routes = args.routes.split(",")
+
+    async with app.router.lifespan_context(app):
+        while not worker_startup.ready:
+            await asyncio.sleep(0.05)
+        samples, statuses, errors, elapsed = await run(
+            app, clients, routes, args.duration, args.requests, args.warmup
+        )
+
+    results = {
+        "config": {
+            "concurrency": args.concurrency,
+            "tenants": args.tenants,
+            "tables": args.tables,
+            "rows": args.rows,
+            "db_mode": os.environ.get("DB_MODE", "sync"),
+        },
+        "routes": {},
+    }
+    if manifest:
+        results["fixture"] = manifest
+    results["startup"] = worker_startup.stats()
+    for route in routes:
+        summary = report.latency_summary(samples[route], elapsed)
+        summary["status"] = {str(code): count for code, count in sorted(statuses[route].items())}
+        results["routes"][route] = summary
+    all_samples = [s for route in routes for s in samples[route]]
+    results["total"] = report.latency_summary(all_samples, elapsed)
+    results["total"]["errors"] = dict(errors)
+    results["total"]["elapsed_s"] = round(elapsed, 3)
+    return results
+
+
+def main():
+    args = parse_args()
+    # Before any app import: the engine, limiter and log settings are read at import time.
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("MAX_REQUESTS_PER_IP", "1000000000")
+    os.environ.setdefault("MAX_REQUESTS_PER_TENANT", "1000000000")
+    from benchmarks import report
+
+    results = asyncio.run(main_async(args))
+    sys.exit(report.emit(results, args.output, args.baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
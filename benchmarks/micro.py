@@ -0,0 +1,120 @@
+"""
+Micro-benchmarks of the per-request building blocks, without HTTP or a pool.
+
+  reflection   cold Table(autoload_with=...) vs a schema-cache hit (get_reflected_table)
+  validation   compiling a CompiledValidator vs validating one payload with it
+  jwt          full jose decode vs decode_access_token on a verified-token cache hit
+  rate_limit   TokenBucketLimiter.hit on the memory and shared-memory stores
+
+Reflection runs against an in-memory SQLite copy of the fixture table, so it
+measures SQLAlchemy + driver work rather than network latency.
+
+    python -m benchmarks.micro --iterations 20000 --output micro.json
+    python -m benchmarks.micro --baseline micro.json
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from multiprocessing import resource_tracker
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from jose import jwt
+from sqlalchemy import MetaData, create_engine
+
+from app.auth.dependencies import decode_access_token
+from app.auth.jwt import ALGORITHM, SECRET_KEY, create_access_token
+from app.auto_api.engine import _reflect_table, get_reflected_table
+from app.auto_api.validators import CompiledValidator
+from app.ratelimit import MemoryBucketStore, SharedMemoryBucketStore, TokenBucketLimiter
+from benchmarks import report
+from benchmarks.fixtures import bench_table, table_name
+
+PAYLOAD = {"name": "widget", "qty": "12", "amount": "19.99", "paid": True}
+
+
+def timed(fn, iterations: int) -> dict:
+    for _ in range(min(iterations, 100)):  # warm-up
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "iterations": iterations,
+        "per_op_us": round(elapsed / iterations * 1e6, 3),
+        "ops_per_s": round(iterations / elapsed, 1),
+    }
+
+
+def bench_reflection(iterations: int) -> dict:
+    engine = create_engine("sqlite://")
+    name = table_name(0)
+    bench_table(name, MetaData()).create(engine)
+    with engine.connect() as conn:
+        return {
+            # Reflection is slow enough that a tenth of the iterations gives a stable number.
+            "cold_reflect": timed(lambda: _reflect_table(name, conn), max(iterations // 10, 1)),
+            "cache_hit": timed(lambda: get_reflected_table(name, bind=conn), iterations),
+        }
+
+
+def bench_validation(iterations: int) -> dict:
+    table = bench_table(table_name(0), MetaData())
+    validator = CompiledValidator(table)
+    return {
+        "compile": timed(lambda: CompiledValidator(table), max(iterations // 10, 1)),
+        "validate_insert": timed(lambda: validator.validate(PAYLOAD), iterations),
+        "validate_update": timed(lambda: validator.validate({"qty": 3}, is_update=True), iterations),
+    }
+
+
+def bench_jwt(iterations: int) -> dict:
+    token = create_access_token({"user_id": str(uuid.uuid4()), "tenant_id": "bench-tenant-0", "role": "admin"})
+    decode_access_token(token)
+    return {
+        "jose_decode": timed(lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), iterations),
+        "cached_decode": timed(lambda: decode_access_token(token), iterations),
+    }
+
+
+def bench_rate_limit(iterations: int) -> dict:
+    results = {}
+    shm = SharedMemoryBucketStore(name=f"novabase_bench_{os.getpid()}", slots=4096)
+    try:
+        for backend, store in (("memory", MemoryBucketStore()), ("shm", shm)):
+            limiter = TokenBucketLimiter("bench", 1_000_000_000, 60, store)
+            keys = [f"10.0.{i // 256}.{i % 256}" for i in range(1024)]
+            counter = iter(range(sys.maxsize))
+            results[backend] = timed(lambda: limiter.hit(keys[next(counter) % 1024]), iterations)
+    finally:
+        # The store unregisters its segment from the resource tracker; re-register so unlink() is clean.
+        resource_tracker.register(shm._shm._name, "shared_memory")
+        shm._shm.close()
+        shm._shm.unlink()
+    return results
+
+
+BENCHMARKS = {
+    "reflection": bench_reflection,
+    "validation": bench_validation,
+    "jwt": bench_jwt,
+    "rate_limit": bench_rate_limit,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated subset of: " + ", ".join(BENCHMARKS))
+    report.add_arguments(parser)
+    args = parser.parse_args()
+
+    results = {name: BENCHMARKS[name](args.iterations) for name in args.only.split(",")}
+    sys.exit(report.emit(results, args.output, args.baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Per-request overhead of OperationalMiddleware on an empty route.
+
+Compares a bare FastAPI app, the previous BaseHTTPMiddleware implementation
+(reproduced below as the baseline), and the current raw-ASGI middleware.
+Requests are driven straight through the ASGI interface, so the numbers are
+middleware + framework cost only (no sockets, no database).
+
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+# Keep the limiter out of the way and route all log output to /dev/null.
+os.environ.setdefault("MAX_REQUESTS_PER_IP", "1000000000")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from app import middleware as operational
+from app.request_log import request_log
+
+DEVNULL = open(os.devnull, "w")
+for handler in request_log.listener.handlers:
+    handler.setStream(DEVNULL)
+
+legacy_logger = logging.getLogger("novabase.bench.legacy")
+legacy_logger.addHandler(logging.StreamHandler(DEVNULL))
+legacy_logger.setLevel(logging.INFO)
+legacy_logger.propagate = False
+
+
+class LegacyOperationalMiddleware(BaseHTTPMiddleware):
+    """The pre-ASGI implementation: BaseHTTPMiddleware + inline json/log I/O."""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        client_ip = request.client.host if request.client else "unknown"
+        allowed, _ = operational.ip_limiter.hit(client_ip)
+        if not allowed:
+            return JSONResponse(status_code=429, content={"error": "Rate limit exceeded"})
+        content_length = request.headers.get("content-length")
+        if content_length and int(content_length) > operational.MAX_PAYLOAD_BYTES:
+            return JSONResponse(status_code=413, content={"error": "Payload too large"})
+        response: Response = await call_next(request)
+        process_time = (time.time() - start_time) * 1000
+        response.headers["X-Request-ID"] = request_id
+        response.headers["X-Process-Time"] = f"{process_time:.2f}ms"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["Content-Security-Policy"] = "default-src 'self'"
+        legacy_logger.info(json.dumps({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "latency_ms": f"{process_time:.2f}",
+            "ip": client_ip,
+        }))
+        return response
+
+
+def build_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    async def send(message):
+        pass
+
+    async def request_once():
+        messages = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+        async def receive():
+            # Body first, then report the client as gone (as a server would after the response).
+            return next(messages, {"type": "http.disconnect"})
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(200):  # warm-up
+        await request_once()
+    start = time.perf_counter()
+    for _ in range(requests):
+        await request_once()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    variants = {
+        "bare": build_app(),
+        "legacy_base_http_middleware": build_app(LegacyOperationalMiddleware),
+        "asgi_operational_middleware": build_app(operational.OperationalMiddleware),
+    }
+    results = {}
+    for name, app in variants.items():
+        elapsed = asyncio.run(drive(app, args.requests))
+        results[name] = {
+            "requests": args.requests,
+            "req_per_s": round(args.requests / elapsed, 1),
+            "mean_us": round(elapsed / args.requests * 1e6, 2),
+        }
+    bare = results["bare"]["mean_us"]
+    for r in results.values():
+        r["overhead_us"] = round(r["mean_us"] - bare, 2)
+    request_log.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
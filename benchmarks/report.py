@@ -0,0 +1,123 @@
+"""
+Shared result handling for the benchmark suite: latency summaries, JSON
+output and comparison against a stored baseline.
+
+Every benchmark accepts --output (write the results as JSON) and --baseline
+(compare against an earlier --output file). Metrics are compared by name:
+keys ending in _ms/_us are lower-is-better, rps/ops_per_s/req_per_s/rows_per_s
+are higher-is-better; a change worse than --tolerance (default 10%) is listed
+as a regression and makes the command exit with status 1.
+"""
+import datetime
+import json
+import math
+import platform
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+LOWER_IS_BETTER = ("_ms", "_us")
+HIGHER_IS_BETTER = ("rps", "ops_per_s", "req_per_s", "rows_per_s")
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def latency_summary(samples: List[float], elapsed: float) -> dict:
+    """Request latencies (seconds) over a run of `elapsed` seconds -> rps and ms percentiles."""
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against an earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown (default 0.10)")
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def _metrics(results: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_metrics(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def _direction(path: str) -> int:
+    name = path.rsplit(".", 1)[-1]
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    if name in HIGHER_IS_BETTER:
+        return 1
+    return 0
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> Tuple[Dict[str, float], List[str]]:
+    """Relative change (%) of every comparable metric, and the ones that regressed."""
+    before = _metrics(baseline)
+    changes, regressions = {}, []
+    for path, value in _metrics(current).items():
+        direction = _direction(path)
+        old = before.get(path)
+        if not direction or not old:
+            continue
+        change = (value - old) / old
+        changes[path] = round(change * 100, 2)
+        if change * direction < -tolerance:
+            regressions.append(path)
+    return changes, regressions
+
+
+def emit(results: dict, output: Optional[str] = None, baseline: Optional[str] = None, tolerance: float = 0.10) -> int:
+    """Prints (and optionally stores) the results; returns the process exit code."""
+    document = {"environment": environment(), "results": results}
+    exit_code = 0
+    if baseline:
+        with open(baseline) as f:
+            stored = json.load(f)
+        changes, regressions = compare(results, stored.get("results", stored), tolerance)
+        document["baseline"] = {
+            "path": baseline,
+            "environment": stored.get("environment"),
+            "tolerance": tolerance,
+            "change_pct": changes,
+            "regressions": regressions,
+        }
+        exit_code = 1 if regressions else 0
+    if output:
+        with open(output, "w") as f:
+            json.dump(document, f, indent=2)
+    json.dump(document, sys.stdout, indent=2)
+    print()
+    return exit_code
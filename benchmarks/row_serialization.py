@@ -0,0 +1,120 @@
+"""
+Cost of turning a page of reflected rows into response bytes.
+
+Rows are real SQLAlchemy RowMappings (UUID, datetime, Numeric, text, int and
+bool columns) read from an in-memory SQLite table, i.e. exactly what
+CrudEngine.read_rows hands to the router. Compared paths:
+
+  jsonable_encoder   FastAPI default: jsonable_encoder + stdlib json (previous path)
+  stdlib_dumps       app.auto_api.serialization without orjson installed
+  orjson_dumps       app.auto_api.serialization with orjson
+
+    python -m benchmarks.row_serialization --rows 10000 --repeat 20
+"""
+import argparse
+import datetime
+import decimal
+import json
+import os
+import time
+import uuid
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import (
+    Boolean, Column, DateTime, Integer, MetaData, Numeric, String, Table, Uuid, create_engine, insert, select,
+)
+
+from app.auto_api import serialization
+
+
+def load_rows(count: int):
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    table = Table(
+        "orders", metadata,
+        Column("id", Uuid, primary_key=True),
+        Column("tenant_id", Uuid),
+        Column("customer", String(64)),
+        Column("quantity", Integer),
+        Column("amount", Numeric(12, 2)),
+        Column("paid", Boolean),
+        Column("created_at", DateTime),
+    )
+    metadata.create_all(engine)
+    tenant = uuid.uuid4()
+    start = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(table), [
+            {
+                "id": uuid.uuid4(),
+                "tenant_id": tenant,
+                "customer": f"customer-{i % 500}",
+                "quantity": i % 17,
+                "amount": decimal.Decimal(i) / 100,
+                "paid": i % 3 == 0,
+                "created_at": start + datetime.timedelta(seconds=i),
+            }
+            for i in range(count)
+        ])
+    with engine.connect() as conn:
+        return conn.execute(select(table)).mappings().all()
+
+
+def legacy(rows) -> bytes:
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def stdlib(rows) -> bytes:
+    fast, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.dumps(rows)
+    finally:
+        serialization.orjson = fast
+
+
+def measure(fn, rows, repeat: int) -> float:
+    fn(rows)  # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = load_rows(args.rows)
+    variants = {"jsonable_encoder": legacy, "stdlib_dumps": stdlib}
+    if serialization.orjson is not None:
+        variants["orjson_dumps"] = serialization.dumps
+
+    # Every path must produce the same document.
+    expected = json.loads(legacy(rows))
+    for name, fn in variants.items():
+        assert json.loads(fn(rows)) == expected, f"{name} output differs from jsonable_encoder"
+
+    results = {}
+    for name, fn in variants.items():
+        best = measure(fn, rows, args.repeat)
+        results[name] = {
+            "rows": args.rows,
+            "best_ms": round(best * 1000, 2),
+            "rows_per_s": round(args.rows / best),
+            "bytes": len(fn(rows)),
+        }
+    baseline = results["jsonable_encoder"]["best_ms"]
+    for r in results.values():
+        r["speedup"] = round(baseline / r["best_ms"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,18 +15,27 @@ CREATE TABLE tenants (
 );
 
 -- 3. AUDIT & AUTH LEDGERS (IMMUTABLE)
+-- Same layout as app.auto_api.models.AuditLog (read by GET /api/_audit and realtime replay).
 CREATE TABLE audit_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     tenant_id UUID NOT NULL,
     user_id UUID,
     action TEXT NOT NULL,
     table_name TEXT NOT NULL,
     record_id TEXT NOT NULL,
-    old_data JSONB,
-    new_data JSONB,
-    session_context JSONB,
-    timestamp TIMESTAMPTZ DEFAULT NOW()
-);
+    payload JSONB,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Monthly partitions (audit_logs_yYYYYmMM) are created ahead of time and
+-- retired by `python -m app.auto_api.ledger`; rows outside them land here.
+CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+CREATE INDEX ix_audit_logs_tenant_timestamp ON audit_logs (tenant_id, timestamp, id);
+CREATE INDEX ix_audit_logs_tenant_record ON audit_logs (tenant_id, table_name, record_id);
+CREATE INDEX ix_audit_logs_timestamp_brin ON audit_logs USING brin (timestamp);
+CREATE INDEX ix_audit_logs_user_id ON audit_logs (user_id);
 
 CREATE TABLE auth_events (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -39,8 +48,17 @@ CREATE TABLE auth_events (
 );
 
 -- Deny all mutations to audit ledgers
-CREATE RULE no_update_audit AS ON UPDATE TO audit_logs DO INSTEAD NOTHING;
-CREATE RULE no_delete_audit AS ON DELETE TO audit_logs DO INSTEAD NOTHING;
+-- Rules don't reach the partitions of audit_logs, so it gets a row trigger,
+-- which every partition inherits (PG13+). Like the rules on auth_events it
+-- skips the row silently (RETURN NULL = DO INSTEAD NOTHING). Retention
+-- detaches whole months.
+CREATE OR REPLACE FUNCTION reject_audit_mutation() RETURNS TRIGGER AS $$
+BEGIN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER no_mutate_audit BEFORE UPDATE OR DELETE ON audit_logs FOR EACH ROW EXECUTE FUNCTION reject_audit_mutation();
 CREATE RULE no_update_auth AS ON UPDATE TO auth_events DO INSTEAD NOTHING;
 CREATE RULE no_delete_auth AS ON DELETE TO auth_events DO INSTEAD NOTHING;
 
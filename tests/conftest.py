@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at throwaway SQLite
+# files before any test module imports it: a primary and one read replica.
+_DATA_DIR = tempfile.mkdtemp(prefix="novabase-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATA_DIR, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{os.path.join(_DATA_DIR, 'replica.db')}"
+os.environ.pop("DATABASE_SHARD_URLS", None)
+os.environ["REPLICA_STICKY_MODE"] = "window"
+os.environ["REPLICA_TRACKER_BACKEND"] = "memory"
+os.environ["REPLICA_TRACKER_SHM_NAME"] = f"novabase_test_writes_{os.getpid()}"
+os.environ["REPLICA_TRACKER_SHM_SLOTS"] = "1024"
@@ -0,0 +1,78 @@
+import os
+import uuid
+from multiprocessing import resource_tracker
+
+import pytest
+
+from app import ratelimit
+from app.ratelimit import MemoryBucketStore, SharedMemoryBucketStore, TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Both stores read the clock through the module (the shm store uses wall time).
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    monkeypatch.setattr(ratelimit.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def shm_store():
+    stores = []
+
+    def make(slots: int, probe: int) -> SharedMemoryBucketStore:
+        store = SharedMemoryBucketStore(name=f"novabase_test_rl_{os.getpid()}_{uuid.uuid4().hex[:8]}", slots=slots, probe=probe)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        # The store unregisters its segment from the resource tracker; re-register so unlink() is clean.
+        resource_tracker.register(store._shm._name, "shared_memory")
+        store._shm.close()
+        store._shm.unlink()
+        os.unlink(store._lock_file.name)
+        store._lock_file.close()
+
+
+@pytest.mark.parametrize("backend", ["memory", "shm"])
+def test_bucket_allows_a_burst_then_refills(clock, shm_store, backend):
+    store = MemoryBucketStore() if backend == "memory" else shm_store(slots=64, probe=8)
+    limiter = TokenBucketLimiter("ip", limit=3, window=3, store=store)  # 1 token/s
+
+    assert [limiter.hit("a")[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = limiter.hit("a")
+    assert not allowed and retry_after == pytest.approx(1.0)
+    assert limiter.hit("b")[0]  # other keys have their own budget
+
+    clock.now += 1.0
+    assert limiter.hit("a")[0]
+    assert not limiter.hit("a")[0]
+
+    clock.now += 10.0  # refill is capped at the burst size
+    assert [limiter.hit("a")[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_shm_store_fails_closed_when_its_probe_window_is_busy(clock, shm_store):
+    store = shm_store(slots=2, probe=2)
+    limiter = TokenBucketLimiter("ip", limit=2, window=2, store=store)  # 1 token/s
+
+    assert limiter.hit("a")[0] and limiter.hit("b")[0]
+    # Both slots hold refilling buckets; a third key may not take one over.
+    allowed, retry_after = limiter.hit("c")
+    assert not allowed and retry_after == pytest.approx(1.0)
+    assert store.saturated == 1
+    # The owners keep their own (partly spent) buckets.
+    assert limiter.hit("a")[0] and not limiter.hit("a")[0]
+
+    clock.now += 2.0  # "b" is fully refilled, so its slot is reusable
+    assert limiter.hit("c")[0]
@@ -0,0 +1,53 @@
+import uuid
+
+from app.auto_api.models import TableMeta
+from app.auto_api.registry import TableRegistry, table_registry
+from app.database import Base, SessionLocal, engine
+
+
+def setup_module():
+    Base.metadata.create_all(bind=engine, tables=[TableMeta.__table__])
+
+
+def test_registration_is_not_negative_cached_before_commit():
+    name = f"t_{uuid.uuid4().hex[:8]}"
+    writer, reader = SessionLocal(), SessionLocal()
+    try:
+        table_registry.refresh(reader)
+        reader.commit()
+        writer.add(TableMeta(table_name=name, is_active=True))
+        writer.flush()
+        # Flushed, not committed: the registry must not have been told yet.
+        assert not table_registry.stats()["stale"]
+        writer.commit()
+        assert table_registry.stats()["stale"]
+        assert table_registry.is_registered(reader, name)
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_rolled_back_registration_leaves_registry_alone():
+    registry_before = table_registry.stats()["refreshes"]
+    db = SessionLocal()
+    try:
+        table_registry.refresh(db)
+        db.add(TableMeta(table_name=f"t_{uuid.uuid4().hex[:8]}", is_active=True))
+        db.flush()
+        db.rollback()
+        assert not table_registry.stats()["stale"]
+        assert table_registry.stats()["refreshes"] == registry_before + 1
+    finally:
+        db.close()
+
+
+def test_unknown_names_are_negative_cached():
+    registry = TableRegistry(refresh_seconds=3600)
+    db = SessionLocal()
+    try:
+        assert not registry.is_registered(db, "no_such_table")
+        assert not registry.is_registered(db, "no_such_table")
+        stats = registry.stats()
+        assert stats["db_lookups"] == 1 and stats["negative_hits"] == 1
+    finally:
+        db.close()
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy.util import greenlet_spawn
+
+from app.auto_api.singleflight import SingleFlight
+
+
+def _counting_loader(calls: list, result="value", delay=0.05):
+    def load():
+        calls.append(1)
+        time.sleep(delay)
+        return result
+    return load
+
+
+def test_threads_share_one_load():
+    flights, calls, results = SingleFlight(), [], []
+    load = _counting_loader(calls)
+    threads = [threading.Thread(target=lambda: results.append(flights.run("k", load))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert {value for value, _ in results} == {"value"}
+    assert len(flights) == 0
+
+
+def test_coroutines_share_one_load():
+    flights, calls = SingleFlight(), []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*[flights.run_async("k", load) for _ in range(8)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ["value"] * 8
+
+
+def test_coroutine_follows_a_thread_leader():
+    flights, calls = SingleFlight(), []
+    leader = threading.Thread(target=flights.run, args=("k", _counting_loader(calls, delay=0.2)))
+    leader.start()
+    time.sleep(0.05)
+
+    async def follow():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        result = await flights.run_async("k", None)
+        ticker.cancel()
+        return result, ticks
+
+    (value, shared), ticks = asyncio.run(follow())
+    leader.join()
+    assert (value, shared) == ("value", True)
+    assert ticks > 5  # the loop kept running while it waited
+    assert len(calls) == 1
+
+
+def test_sync_follower_inside_run_sync_does_not_block_the_loop():
+    flights, calls = SingleFlight(), []
+
+    async def lead():
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "value"
+        return await flights.run_async("k", load)
+
+    async def main():
+        leader = asyncio.create_task(lead())
+        await asyncio.sleep(0)
+        # A greenlet on the loop thread, as inside AsyncSession.run_sync.
+        follower = greenlet_spawn(flights.run, "k", lambda: "unused")
+        return await asyncio.gather(leader, follower)
+
+    assert asyncio.run(main()) == [("value", False), ("value", True)]
+    assert len(calls) == 1
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*[flights.run_async("k", load) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
+    assert len(flights) == 0
+
+
+def test_plain_sync_wait_on_the_loop_thread_falls_back_to_the_event():
+    flights, calls = SingleFlight(), []
+    leader = threading.Thread(target=flights.run, args=("k", _counting_loader(calls, delay=0.1)))
+    leader.start()
+    time.sleep(0.02)
+
+    async def main():
+        # No greenlet bridge here: the wait blocks on the event instead of raising.
+        return flights.run("k", lambda: "unused")
+
+    assert asyncio.run(main()) == ("value", True)
+    leader.join()
+    assert len(calls) == 1
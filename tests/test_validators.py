@@ -0,0 +1,89 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import (
+    JSON, Boolean, Column, Date, DateTime, Enum, Integer, MetaData, Numeric, String, Table, Time, Uuid,
+)
+
+from app.auto_api.validators import CompiledValidator, get_validator
+
+UTC = datetime.timezone.utc
+
+
+@pytest.fixture(scope="module")
+def validator():
+    table = Table(
+        "v_items", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("tenant_id", String, nullable=False),
+        Column("name", String(8), nullable=False),
+        Column("qty", Integer),
+        Column("price", Numeric),
+        Column("active", Boolean),
+        Column("status", Enum("draft", "live", name="status")),
+        Column("ref", Uuid),
+        Column("due", Date),
+        Column("at", DateTime(timezone=True)),
+        Column("opens", Time(timezone=True)),
+        Column("doc", JSON),
+    )
+    return CompiledValidator(table)
+
+
+@pytest.mark.parametrize("field, raw, expected", [
+    ("qty", "42", 42),
+    ("qty", 3.0, 3),
+    ("price", 1.1, decimal.Decimal("1.1")),
+    ("active", "TRUE", True),
+    ("name", 12, "12"),
+    ("status", "live", "live"),
+    ("ref", "12345678-1234-5678-1234-567812345678", uuid.UUID("12345678-1234-5678-1234-567812345678")),
+    ("due", "2024-02-29", datetime.date(2024, 2, 29)),
+    ("at", "2024-01-01T10:00:00Z", datetime.datetime(2024, 1, 1, 10, tzinfo=UTC)),
+    ("at", "2024-01-01T10:00:00z", datetime.datetime(2024, 1, 1, 10, tzinfo=UTC)),
+    ("at", "2024-01-01T10:00:00+02:00", datetime.datetime(2024, 1, 1, 8, tzinfo=UTC)),
+    ("opens", "09:30:00Z", datetime.time(9, 30, tzinfo=UTC)),
+    ("doc", {"a": [1, 2]}, {"a": [1, 2]}),
+    ("doc", [1, "two"], [1, "two"]),
+    ("doc", "scalar", "scalar"),
+])
+def test_values_are_coerced_to_the_column_type(validator, field, raw, expected):
+    assert validator.validate({"name": "n", field: raw}, is_update=True)[field] == expected
+
+
+@pytest.mark.parametrize("field, raw", [
+    ("qty", "4.5"),
+    ("qty", True),
+    ("price", "lots"),
+    ("active", "yes"),
+    ("name", "much too long"),
+    ("name", ["x"]),
+    ("status", "archived"),
+    ("ref", "not-a-uuid"),
+    ("at", "yesterday"),
+    ("at", "2024-01-01T10:00:00ZZ"),
+])
+def test_bad_values_are_rejected(validator, field, raw):
+    with pytest.raises(HTTPException) as raised:
+        validator.validate({"name": "n", field: raw}, is_update=True)
+    assert raised.value.status_code == 400
+    assert field in raised.value.detail
+
+
+def test_protected_unknown_required_and_null_fields(validator):
+    with pytest.raises(HTTPException) as raised:
+        validator.validate({"name": "n", "tenant_id": "other"})
+    assert raised.value.status_code == 403
+    for payload in ({"name": "n", "nope": 1}, {"qty": 1}, {"name": None}, {}):
+        with pytest.raises(HTTPException) as raised:
+            validator.validate(payload)
+        assert raised.value.status_code == 400
+    assert validator.validate({"qty": None}, is_update=True) == {"qty": None}
+
+
+def test_validator_is_compiled_once_per_table():
+    table = Table("v_once", MetaData(), Column("id", Integer, primary_key=True), Column("name", String))
+    assert get_validator(table) is get_validator(table)